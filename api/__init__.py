@@ -1,3 +1,13 @@
 from .doubao_tts_api import DoubaoTTSClient
+from .pool import DoubaoTTSPool
+from .segmenter import TextSegmenter
+from .stream import StreamChunk
+from .sync_client import SyncTTSClient
 
-__all__ = ["DoubaoTTSClient"]
\ No newline at end of file
+__all__ = [
+    "DoubaoTTSClient",
+    "DoubaoTTSPool",
+    "StreamChunk",
+    "SyncTTSClient",
+    "TextSegmenter",
+]
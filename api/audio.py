@@ -0,0 +1,264 @@
+"""PCM 音频后处理：重采样、int16/float 转换、增益与响度归一化、WAV 封装。
+
+全部基于 numpy 向量化计算，transcode() 放到线程池（或进程池）中执行，不阻塞事件循环；
+StreamResampler 逐块重采样，用于边合成边输出。
+同一段 24kHz 合成结果可以一次产出多路输出，例如电话用的 8kHz 和 App 用的 48kHz WAV：
+
+    outputs = [AudioOutput(8000), AudioOutput(48000, loudness_dbfs=-20, container="wav")]
+    narrowband, wideband = await transcode(pcm, 24000, outputs)
+
+服务端返回的 ogg_opus / mp3 已经是封装好的压缩格式，直接写出即可，这里只处理 PCM。
+"""
+
+import asyncio
+import functools
+import struct
+
+import numpy as np
+
+# 低通滤波器的阶数（抽头数），越大过渡带越窄
+FILTER_TAPS = 63
+
+
+def pcm16_to_float(data) -> np.ndarray:
+    """16 bit 小端 PCM 转为 [-1, 1) 的 float32"""
+    if len(data) % 2:
+        data = data[: len(data) - 1]
+    return np.frombuffer(data, dtype="<i2").astype(np.float32) / 32768.0
+
+
+def float_to_pcm16(samples: np.ndarray) -> bytes:
+    scaled = np.clip(np.rint(samples * 32768.0), -32768, 32767)
+    return scaled.astype("<i2").tobytes()
+
+
+@functools.lru_cache(maxsize=32)
+def _lowpass_kernel(cutoff: float) -> np.ndarray:
+    # 加 Hamming 窗的 sinc 低通，cutoff 为相对采样率的截止频率（0 ~ 0.5）
+    n = np.arange(FILTER_TAPS) - (FILTER_TAPS - 1) / 2
+    kernel = 2 * cutoff * np.sinc(2 * cutoff * n) * np.hamming(FILTER_TAPS)
+    return (kernel / kernel.sum()).astype(np.float32)
+
+
+class _StreamFilter:
+    """分块做 FIR 低通，保留上一块末尾 FILTER_TAPS - 1 个样本，输出与 np.convolve(..., "same") 对齐"""
+
+    __slots__ = ("kernel", "history", "skip")
+
+    def __init__(self, kernel: np.ndarray):
+        self.kernel = kernel
+        self.history = np.zeros(FILTER_TAPS - 1, dtype=np.float32)
+        # "same" 模式丢掉卷积结果开头的半个滤波器长度
+        self.skip = (FILTER_TAPS - 1) // 2
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        if len(samples) == 0:
+            return samples
+        window = np.concatenate((self.history, samples))
+        self.history = window[len(window) - (FILTER_TAPS - 1) :]
+        out = np.convolve(window, self.kernel, "valid")
+        if self.skip:
+            skipped = min(self.skip, len(out))
+            self.skip -= skipped
+            out = out[skipped:]
+        return out
+
+    def flush(self) -> np.ndarray:
+        # 补零输出最后半个滤波器长度
+        return self.process(np.zeros((FILTER_TAPS - 1) // 2, dtype=np.float32))
+
+
+class StreamResampler:
+    """逐块重采样，块之间保留滤波器历史和插值的小数位置，分块输出拼起来与 resample() 一次性处理相同：
+
+    resampler = StreamResampler(24000, 8000)
+    for pcm in chunks:
+        out.write(resampler.feed(pcm))
+    out.write(resampler.finish())
+    """
+
+    __slots__ = (
+        "ratio",
+        "_pre",
+        "_post",
+        "_received",
+        "_next",
+        "_last",
+        "_odd",
+    )
+
+    def __init__(self, src_rate: int, dst_rate: int):
+        self.ratio = dst_rate / src_rate
+        self._pre = (
+            _StreamFilter(_lowpass_kernel(0.5 * self.ratio * 0.95))
+            if self.ratio < 1
+            else None
+        )
+        self._post = (
+            _StreamFilter(_lowpass_kernel(0.5 / self.ratio)) if self.ratio > 1 else None
+        )
+        # 已进入插值的样本数、下一个输出样本的序号、上一块的最后一个样本
+        self._received = 0
+        self._next = 0
+        self._last = None
+        # 上一块 PCM 末尾不足一个样本的字节
+        self._odd = b""
+
+    def _interp(self, samples: np.ndarray, final: bool) -> np.ndarray:
+        # 线性插值需要上一块的最后一个样本，缓冲区从全局序号 start 开始
+        if self._last is not None:
+            samples = np.concatenate((self._last, samples))
+        if len(samples) == 0:
+            return samples
+        start = self._received - (self._last is not None)
+        self._received = start + len(samples)
+        self._last = samples[-1:]
+        last = self._received - 1
+        end = int(round(self._received * self.ratio))
+        if not final:
+            # 位置超过已收到的最后一个样本的输出要等后续数据，flush 时按 np.interp 钳位
+            end = min(end, int(last * self.ratio) + 2)
+            while end > self._next and (end - 1) / self.ratio > last:
+                end -= 1
+        if end <= self._next:
+            return np.zeros(0, dtype=np.float32)
+        positions = np.arange(self._next, end) / self.ratio
+        self._next = end
+        return np.interp(positions, np.arange(start, self._received), samples).astype(
+            np.float32
+        )
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        if self.ratio == 1:
+            return samples
+        if self._pre is not None:
+            samples = self._pre.process(samples)
+        out = self._interp(samples, final=False)
+        if self._post is not None:
+            out = self._post.process(out)
+        return out
+
+    def flush(self) -> np.ndarray:
+        if self.ratio == 1:
+            return np.zeros(0, dtype=np.float32)
+        samples = np.zeros(0, dtype=np.float32)
+        if self._pre is not None:
+            samples = self._pre.flush()
+        out = self._interp(samples, final=True)
+        if self._post is not None:
+            out = np.concatenate((self._post.process(out), self._post.flush()))
+        return out
+
+    def feed(self, pcm) -> bytes:
+        """输入 16 bit PCM 字节，块边界可以落在样本中间"""
+        data = self._odd + bytes(pcm) if self._odd else pcm
+        cut = len(data) - len(data) % 2
+        self._odd = bytes(data[cut:])
+        return float_to_pcm16(self.process(pcm16_to_float(data[:cut])))
+
+    def finish(self) -> bytes:
+        return float_to_pcm16(self.flush())
+
+
+def resample(samples: np.ndarray, src_rate: int, dst_rate: int) -> np.ndarray:
+    if src_rate == dst_rate or len(samples) == 0:
+        return samples
+    resampler = StreamResampler(src_rate, dst_rate)
+    return np.concatenate((resampler.process(samples), resampler.flush()))
+
+
+def apply_gain(samples: np.ndarray, gain_db: float) -> np.ndarray:
+    if not gain_db:
+        return samples
+    return samples * np.float32(10 ** (gain_db / 20))
+
+
+def normalize_loudness(
+    samples: np.ndarray, target_dbfs: float = -20.0, peak_dbfs: float = -1.0
+) -> np.ndarray:
+    """按 RMS 把响度调整到 target_dbfs，同时保证峰值不超过 peak_dbfs"""
+    if len(samples) == 0:
+        return samples
+    rms = float(np.sqrt(np.mean(np.square(samples, dtype=np.float64))))
+    if rms == 0:
+        return samples
+    gain = 10 ** (target_dbfs / 20) / rms
+    peak = float(np.max(np.abs(samples)))
+    ceiling = 10 ** (peak_dbfs / 20)
+    if peak * gain > ceiling:
+        gain = ceiling / peak
+    return samples * np.float32(gain)
+
+
+def wav_header(data_bytes: int, sample_rate: int, channels: int = 1) -> bytes:
+    """16 bit PCM 的 44 字节 WAV 头"""
+    block_align = channels * 2
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF",
+        36 + data_bytes,
+        b"WAVE",
+        b"fmt ",
+        16,
+        1,
+        channels,
+        sample_rate,
+        sample_rate * block_align,
+        block_align,
+        16,
+        b"data",
+        data_bytes,
+    )
+
+
+def to_wav(pcm: bytes, sample_rate: int, channels: int = 1) -> bytes:
+    return wav_header(len(pcm), sample_rate, channels) + pcm
+
+
+class AudioOutput:
+    """一路输出的参数。sample_rate 为 None 时保持原采样率，container 为 "pcm" 或 "wav" """
+
+    __slots__ = ("sample_rate", "gain_db", "loudness_dbfs", "container")
+
+    def __init__(
+        self,
+        sample_rate: int | None = None,
+        gain_db: float = 0.0,
+        loudness_dbfs: float | None = None,
+        container: str = "pcm",
+    ):
+        if container not in ("pcm", "wav"):
+            raise Exception(f"unsupported container: {container}")
+        self.sample_rate = sample_rate
+        self.gain_db = gain_db
+        self.loudness_dbfs = loudness_dbfs
+        self.container = container
+
+
+def render(samples: np.ndarray, source_rate: int, output: AudioOutput) -> bytes:
+    sample_rate = output.sample_rate or source_rate
+    samples = resample(samples, source_rate, sample_rate)
+    if output.loudness_dbfs is not None:
+        samples = normalize_loudness(samples, output.loudness_dbfs)
+    samples = apply_gain(samples, output.gain_db)
+    pcm = float_to_pcm16(samples)
+    if output.container == "wav":
+        return to_wav(pcm, sample_rate)
+    return pcm
+
+
+def render_many(pcm: bytes, source_rate: int, outputs: list[AudioOutput]) -> list:
+    # 只解码一次，各路输出共享同一份 float 数据
+    samples = pcm16_to_float(pcm)
+    return [render(samples, source_rate, output) for output in outputs]
+
+
+async def transcode(
+    pcm, source_rate: int, outputs: list[AudioOutput], executor=None
+) -> list:
+    """在 executor（默认线程池）中执行 render_many；使用进程池时 pcm 会被复制一次"""
+    if isinstance(pcm, memoryview):
+        pcm = pcm.tobytes()
+    return await asyncio.get_running_loop().run_in_executor(
+        executor, render_many, pcm, source_rate, outputs
+    )
@@ -0,0 +1,375 @@
+"""离线批量合成：从 JSONL 流式读取任务，在共享连接池上并发合成并边收边写文件。
+
+每行一个任务：
+
+    {"id": "greeting", "text": "您好，欢迎致电。", "speaker": "...", "format": "wav",
+     "sample_rate": 8000, "output": "out/greeting.wav"}
+
+format 为 pcm / wav / ogg_opus / mp3，wav 按 PCM 请求并在本地加文件头。
+
+python -m api.batch jobs.jsonl --checkpoint jobs.ckpt --concurrency 16
+"""
+
+import asyncio
+import itertools
+import json
+import os
+import sys
+import time
+
+from .file_sink import FSYNC_CLOSE, AudioFileSink
+from .pool import DoubaoTTSPool
+from .scheduler import BATCH
+from .retry import Backoff
+
+
+class BatchJob:
+    __slots__ = (
+        "index",
+        "id",
+        "text",
+        "speaker",
+        "audio_format",
+        "sample_rate",
+        "output",
+        "error",
+    )
+
+    def __init__(
+        self,
+        index: int,
+        id: str,
+        text: str,
+        speaker: str | None,
+        audio_format: str,
+        sample_rate: int,
+        output: str,
+        error: str | None = None,
+    ):
+        self.index = index
+        self.id = id
+        self.text = text
+        self.speaker = speaker
+        self.audio_format = audio_format
+        self.sample_rate = sample_rate
+        self.output = output
+        # 无法解析的行，直接记为失败
+        self.error = error
+
+
+_EXTENSIONS = {"ogg_opus": "ogg"}
+
+
+def read_jobs(path: str, output_dir: str = "."):
+    """逐行读取任务，不会把整个文件载入内存"""
+    with open(path, encoding="utf-8") as f:
+        for index, line in enumerate(f):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield _parse_job(index, line, output_dir)
+            except (ValueError, KeyError, TypeError, AttributeError) as e:
+                # 一行格式错误不影响其他任务
+                yield BatchJob(
+                    index, str(index), "", None, "pcm", 24000, "", f"bad job: {e!r}"
+                )
+
+
+def _take(jobs, count: int) -> list:
+    return list(itertools.islice(jobs, count))
+
+
+def _parse_job(index: int, line: str, output_dir: str) -> BatchJob:
+    item = json.loads(line)
+    job_id = str(item.get("id", index))
+    audio_format = item.get("format", "pcm")
+    text = item["text"]
+    if not isinstance(text, str) or not text:
+        raise ValueError("text must be a non-empty string")
+    return BatchJob(
+        index=index,
+        id=job_id,
+        text=text,
+        speaker=item.get("speaker"),
+        audio_format=audio_format,
+        sample_rate=int(item.get("sample_rate", 24000)),
+        output=item.get("output")
+        or os.path.join(
+            output_dir,
+            f"{job_id}.{_EXTENSIONS.get(audio_format, audio_format)}",
+        ),
+    )
+
+
+class Checkpoint:
+    """记录已完成的任务行号。
+
+    只保存连续完成的前缀 watermark 和它之后零散完成的行号，
+    内存占用与并发数相关，与输入文件大小无关。
+    """
+
+    def __init__(self, path: str | None):
+        self.path = path
+        self.watermark = 0
+        self.done: set[int] = set()
+        self.failed: set[int] = set()
+        if path is not None and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            self.watermark = data["watermark"]
+            self.done = set(data["done"])
+            self.failed = set(data["failed"])
+
+    def is_done(self, index: int) -> bool:
+        return index < self.watermark or index in self.done
+
+    def mark(self, index: int, failed: bool = False):
+        if failed:
+            self.failed.add(index)
+        else:
+            self.failed.discard(index)
+
+    def advance(self, index: int):
+        # 该行已经处理完（成功或最终失败）
+        if index >= self.watermark:
+            self.done.add(index)
+        while self.watermark in self.done:
+            self.done.remove(self.watermark)
+            self.watermark += 1
+
+    def save(self):
+        if self.path is None:
+            return
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "watermark": self.watermark,
+                    "done": sorted(self.done),
+                    "failed": sorted(self.failed),
+                },
+                f,
+            )
+        os.replace(tmp, self.path)
+
+
+async def _iterate(jobs):
+    for job in jobs:
+        yield job
+
+
+class BatchStats:
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self.completed = 0
+        self.failed = 0
+        self.skipped = 0
+        self.chars = 0
+        # 只统计 pcm / wav 的音频时长；压缩格式的时长要解析码流才知道，单独计数
+        self.audio_seconds = 0.0
+        self.compressed = 0
+
+    def report(self) -> str:
+        elapsed = max(time.monotonic() - self.started_at, 1e-9)
+        line = (
+            f"completed={self.completed} failed={self.failed} skipped={self.skipped} "
+            f"chars/s={self.chars / elapsed:.1f} "
+            f"pcm-audio-s/s={self.audio_seconds / elapsed:.2f}"
+        )
+        if self.compressed:
+            line += f" compressed={self.compressed} (not in audio-s/s)"
+        return line
+
+
+class BatchRunner:
+    def __init__(
+        self,
+        pool: DoubaoTTSPool,
+        concurrency: int = 8,
+        retries: int = 3,
+        backoff: Backoff | None = None,
+        checkpoint: str | None = None,
+        output_dir: str = ".",
+        write_batch_bytes: int = 256 * 1024,
+        fsync: str = FSYNC_CLOSE,
+        report_interval: float = 5.0,
+        on_progress=None,
+    ):
+        self.pool = pool
+        self.concurrency = concurrency
+        self.retries = retries
+        self.backoff = backoff or Backoff()
+        self.checkpoint = Checkpoint(checkpoint)
+        self.output_dir = output_dir
+        self.write_batch_bytes = write_batch_bytes
+        self.fsync = fsync
+        self.report_interval = report_interval
+        self.on_progress = on_progress or (lambda line: print(line, file=sys.stderr))
+        self.stats = BatchStats()
+
+    async def _synthesize(self, job: BatchJob) -> int:
+        loop = asyncio.get_running_loop()
+        directory = os.path.dirname(job.output)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        part = job.output + ".part"
+        # wav 由本地在 PCM 前加文件头，合成完成后再回填长度
+        wav = job.audio_format == "wav"
+        async with AudioFileSink(
+            part,
+            job.sample_rate,
+            wav=wav,
+            batch_bytes=self.write_batch_bytes,
+            fsync=self.fsync,
+        ) as sink:
+            async with self.pool.session(
+                speaker=job.speaker,
+                audio_format="pcm" if wav else job.audio_format,
+                sample_rate=job.sample_rate,
+                priority=BATCH,
+            ) as client:
+                audio_bytes = await sink.write_stream(client.synthesize(job.text))
+        await loop.run_in_executor(None, os.replace, part, job.output)
+        return audio_bytes
+
+    async def _run_job(self, job: BatchJob):
+        for attempt in range(self.retries + 1):
+            try:
+                audio_bytes = await self._synthesize(job)
+                break
+            except Exception as e:
+                if attempt == self.retries:
+                    self.stats.failed += 1
+                    self.checkpoint.mark(job.index, failed=True)
+                    self.on_progress(f"job {job.id} failed: {e}")
+                    return
+                await asyncio.sleep(self.backoff.delay(attempt))
+
+        self.stats.completed += 1
+        self.stats.chars += len(job.text)
+        if job.audio_format in ("pcm", "wav"):
+            self.stats.audio_seconds += audio_bytes / (2 * job.sample_rate)
+        else:
+            self.stats.compressed += 1
+        self.checkpoint.mark(job.index)
+
+    async def _worker(self, queue: asyncio.Queue):
+        while True:
+            job = await queue.get()
+            if job is None:
+                return
+            await self._run_job(job)
+            self.checkpoint.advance(job.index)
+
+    async def _report(self):
+        while True:
+            await asyncio.sleep(self.report_interval)
+            self.checkpoint.save()
+            self.on_progress(self.stats.report())
+
+    async def _read(self, path: str):
+        # 读文件和解析 JSON 放到线程池，每次取一小批，不阻塞事件循环
+        loop = asyncio.get_running_loop()
+        jobs = read_jobs(path, self.output_dir)
+        try:
+            while True:
+                batch = await loop.run_in_executor(
+                    None, _take, jobs, self.concurrency * 2
+                )
+                if not batch:
+                    return
+                for job in batch:
+                    yield job
+        finally:
+            jobs.close()
+
+    async def run(self, jobs, retry_failed: bool = False) -> BatchStats:
+        """jobs 可以是 JSONL 文件路径，也可以是 BatchJob 的可迭代对象"""
+        if isinstance(jobs, str):
+            jobs = self._read(jobs)
+        else:
+            jobs = _iterate(jobs)
+
+        # 有界队列：读取速度受消费速度约束，内存占用不随输入文件增长
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        workers = [
+            asyncio.create_task(self._worker(queue)) for _ in range(self.concurrency)
+        ]
+        reporter = asyncio.create_task(self._report())
+        try:
+            next_index = 0
+            async for job in jobs:
+                # 空行不会产生任务，直接视为已处理
+                for index in range(next_index, job.index):
+                    self.checkpoint.advance(index)
+                next_index = job.index + 1
+                if self.checkpoint.is_done(job.index) and not (
+                    retry_failed and job.index in self.checkpoint.failed
+                ):
+                    self.stats.skipped += 1
+                    continue
+                if job.error is not None:
+                    self.stats.failed += 1
+                    self.checkpoint.mark(job.index, failed=True)
+                    self.checkpoint.advance(job.index)
+                    self.on_progress(f"job {job.id} failed: {job.error}")
+                    continue
+                await queue.put(job)
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+        finally:
+            await jobs.aclose()
+            reporter.cancel()
+            for worker in workers:
+                worker.cancel()
+            # 等 worker 真正退出，避免还在写的任务和之后保存的检查点不一致
+            await asyncio.gather(reporter, *workers, return_exceptions=True)
+            self.checkpoint.save()
+        self.on_progress(self.stats.report())
+        return self.stats
+
+
+async def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="豆包 TTS 批量合成")
+    parser.add_argument("jobs", help="JSONL 任务文件")
+    parser.add_argument("--uid", default=os.environ.get("DOUBAO_UID", ""))
+    parser.add_argument("--app-id", default=os.environ.get("DOUBAO_APP_ID", ""))
+    parser.add_argument("--token", default=os.environ.get("DOUBAO_TOKEN", ""))
+    parser.add_argument(
+        "--url", default="wss://openspeech.bytedance.com/api/v3/tts/bidirection"
+    )
+    parser.add_argument("--speaker", default="zh_female_wanwanxiaohe_moon_bigtts")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--connections", type=int, default=None)
+    parser.add_argument("--retries", type=int, default=3)
+    parser.add_argument("--checkpoint", default=None)
+    parser.add_argument("--retry-failed", action="store_true")
+    parser.add_argument("--output-dir", default=".")
+    args = parser.parse_args()
+
+    connections = args.connections or args.concurrency
+    async with DoubaoTTSPool(
+        args.uid,
+        args.app_id,
+        args.token,
+        args.url,
+        args.speaker,
+        min_size=min(connections, 4),
+        max_size=connections,
+    ) as pool:
+        runner = BatchRunner(
+            pool,
+            concurrency=args.concurrency,
+            retries=args.retries,
+            checkpoint=args.checkpoint or args.jobs + ".ckpt",
+            output_dir=args.output_dir,
+        )
+        await runner.run(args.jobs, retry_failed=args.retry_failed)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
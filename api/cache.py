@@ -0,0 +1,257 @@
+import hashlib
+import mmap
+import os
+import struct
+from collections import OrderedDict
+
+from .events import SentenceEvent
+from .stream import AUDIO, SENTENCE_END, SENTENCE_START, StreamChunk
+
+_KINDS = [AUDIO, SENTENCE_START, SENTENCE_END]
+_KIND_CODES = {kind: code for code, kind in enumerate(_KINDS)}
+
+# 记录头：magic、key、chunk 数量、数据长度
+_RECORD = struct.Struct(">4s32sII")
+_CHUNK = struct.Struct(">BI")
+_MAGIC = b"DTC1"
+
+
+def cache_key(
+    speaker: str, text: str, audio_format: str = "pcm", sample_rate: int = 24000
+) -> bytes:
+    raw = "\x00".join([speaker, audio_format, str(sample_rate), text])
+    return hashlib.sha256(raw.encode()).digest()
+
+
+def _chunk_size(chunk: StreamChunk) -> int:
+    return len(chunk.data) if chunk.data else 0
+
+
+class SynthesisCache:
+    """按 (speaker, text, 音频格式, 采样率) 缓存合成结果。
+
+    内存层是按字节数限制的 LRU；磁盘层是只追加的分段文件，通过 mmap 读取，
+    总大小超过 disk_bytes 时删除最旧的分段。
+    """
+
+    def __init__(
+        self,
+        memory_bytes: int = 64 * 1024 * 1024,
+        disk_dir: str | None = None,
+        disk_bytes: int = 1024 * 1024 * 1024,
+        segment_bytes: int = 64 * 1024 * 1024,
+        max_entry_bytes: int | None = None,
+    ):
+        self.memory_bytes = memory_bytes
+        self.disk_dir = disk_dir
+        self.disk_bytes = disk_bytes
+        self.segment_bytes = segment_bytes
+        # 单条结果的上限，默认为内存层或单个分段能容纳的大小；客户端录制超过时直接放弃
+        if max_entry_bytes is None:
+            max_entry_bytes = max(memory_bytes, segment_bytes if disk_dir else 0)
+        self.max_entry_bytes = max_entry_bytes
+
+        self._memory: OrderedDict[bytes, tuple[list[StreamChunk], int]] = OrderedDict()
+        self._memory_size = 0
+
+        # key -> (分段序号, 偏移, 长度)
+        self._index: dict[bytes, tuple[int, int, int]] = {}
+        self._segments: list[int] = []
+        self._segment_sizes: dict[int, int] = {}
+        self._maps: dict[int, mmap.mmap] = {}
+        self._fd: int | None = None
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_evictions = 0
+
+        if disk_dir is not None:
+            os.makedirs(disk_dir, exist_ok=True)
+            self._load()
+
+    @property
+    def hits(self) -> int:
+        return self.memory_hits + self.disk_hits
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "disk_evictions": self.disk_evictions,
+            "memory_bytes": self._memory_size,
+            "memory_entries": len(self._memory),
+            "disk_bytes": sum(self._segment_sizes.values()),
+            "disk_entries": len(self._index),
+        }
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.disk_dir, f"segment-{segment:08d}.bin")
+
+    def _load(self):
+        for name in sorted(os.listdir(self.disk_dir)):
+            if name.startswith("segment-") and name.endswith(".bin"):
+                segment = int(name[len("segment-") : -len(".bin")])
+                self._segments.append(segment)
+                self._segment_sizes[segment] = self._scan(segment)
+
+    def _scan(self, segment: int) -> int:
+        # 重建索引；末尾写了一半的记录会被截掉
+        path = self._segment_path(segment)
+        size = os.path.getsize(path)
+        offset = 0
+        with open(path, "rb") as f:
+            while offset + _RECORD.size <= size:
+                f.seek(offset)
+                magic, key, _, length = _RECORD.unpack(f.read(_RECORD.size))
+                end = offset + _RECORD.size + length
+                if magic != _MAGIC or end > size:
+                    break
+                self._index[key] = (segment, offset, end - offset)
+                offset = end
+        if offset != size:
+            os.truncate(path, offset)
+        return offset
+
+    @staticmethod
+    def _unmap(mm: mmap.mmap):
+        try:
+            mm.close()
+        except BufferError:
+            # 命中结果中的 memoryview 仍在使用这段映射，最后一个引用释放时自动解除映射
+            pass
+
+    def _map(self, segment: int, end: int) -> mmap.mmap:
+        mm = self._maps.get(segment)
+        if mm is None or len(mm) < end:
+            if mm is not None:
+                self._unmap(mm)
+            with open(self._segment_path(segment), "rb") as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps[segment] = mm
+        return mm
+
+    def _read_disk(self, key: bytes) -> list[StreamChunk] | None:
+        location = self._index.get(key)
+        if location is None:
+            return None
+        segment, offset, length = location
+        mm = self._map(segment, offset + length)
+        view = memoryview(mm)
+        _, _, count, _ = _RECORD.unpack_from(mm, offset)
+        offset += _RECORD.size
+        chunks = []
+        for _ in range(count):
+            code, size = _CHUNK.unpack_from(mm, offset)
+            offset += _CHUNK.size
+            kind = _KINDS[code]
+            if kind == AUDIO:
+                # 音频直接引用映射中的数据，不复制；映射在这些 memoryview 释放前保持有效
+                data = view[offset : offset + size]
+            else:
+                data = SentenceEvent(kind, mm[offset : offset + size])
+            offset += size
+            chunks.append(StreamChunk(kind, data))
+        return chunks
+
+    def _write_disk(self, key: bytes, chunks: list[StreamChunk]):
+        parts = []
+        for chunk in chunks:
+            data = chunk.data
+            if isinstance(data, SentenceEvent):
+                data = data.payload
+            elif isinstance(data, str):
+                data = data.encode()
+            elif data is None:
+                data = b""
+            parts.append(_CHUNK.pack(_KIND_CODES[chunk.kind], len(data)))
+            parts.append(data)
+        body = b"".join(parts)
+        record = _RECORD.pack(_MAGIC, key, len(chunks), len(body)) + body
+
+        if (
+            self._fd is None
+            or self._segment_sizes[self._segments[-1]] + len(record)
+            > self.segment_bytes
+        ):
+            self._roll_segment()
+        segment = self._segments[-1]
+        offset = self._segment_sizes[segment]
+        os.write(self._fd, record)
+        self._segment_sizes[segment] = offset + len(record)
+        self._index[key] = (segment, offset, len(record))
+
+        while (
+            len(self._segments) > 1
+            and sum(self._segment_sizes.values()) > self.disk_bytes
+        ):
+            self._drop_segment(self._segments[0])
+
+    def _roll_segment(self):
+        if self._fd is not None:
+            os.close(self._fd)
+        segment = self._segments[-1] + 1 if self._segments else 0
+        self._segments.append(segment)
+        self._segment_sizes[segment] = 0
+        self._fd = os.open(
+            self._segment_path(segment), os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644
+        )
+
+    def _drop_segment(self, segment: int):
+        self._segments.remove(segment)
+        del self._segment_sizes[segment]
+        mm = self._maps.pop(segment, None)
+        if mm is not None:
+            self._unmap(mm)
+        for key in [k for k, v in self._index.items() if v[0] == segment]:
+            del self._index[key]
+            self.disk_evictions += 1
+        os.remove(self._segment_path(segment))
+
+    def _put_memory(self, key: bytes, chunks: list[StreamChunk]):
+        size = sum(_chunk_size(chunk) for chunk in chunks)
+        if size > self.memory_bytes:
+            return
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_size -= old[1]
+        self._memory[key] = (chunks, size)
+        self._memory_size += size
+        while self._memory_size > self.memory_bytes:
+            _, (_, evicted) = self._memory.popitem(last=False)
+            self._memory_size -= evicted
+            self.evictions += 1
+
+    def get(self, key: bytes) -> list[StreamChunk] | None:
+        entry = self._memory.get(key)
+        if entry is not None:
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            return entry[0]
+        if self.disk_dir is not None:
+            chunks = self._read_disk(key)
+            if chunks is not None:
+                self.disk_hits += 1
+                self._put_memory(key, chunks)
+                return chunks
+        self.misses += 1
+        return None
+
+    def put(self, key: bytes, chunks: list[StreamChunk]):
+        if sum(_chunk_size(chunk) for chunk in chunks) > self.max_entry_bytes:
+            return
+        self._put_memory(key, chunks)
+        if self.disk_dir is not None and key not in self._index:
+            self._write_disk(key, chunks)
+
+    def close(self):
+        for mm in self._maps.values():
+            self._unmap(mm)
+        self._maps.clear()
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
@@ -0,0 +1,125 @@
+"""抓包：记录客户端收发的原始二进制帧，离线回放。
+
+线上 session 出问题时，打开 recorder 把每条连接上行、下行的原始帧连同单调时钟时间戳写入文件，
+之后不需要密钥就能在本地复现：
+
+    recorder = FrameRecorder("incident.cap")
+    pool = DoubaoTTSPool(uid, app_id, token, url, speaker, client_options={"recorder": recorder})
+    ...
+    recorder.close()
+
+    from api.capture_replay import CaptureReplayer
+
+    replayer = CaptureReplayer("incident.cap")
+    await replayer.replay(MyCallbackHandler())                # 尽快回放
+    await replayer.replay(MyCallbackHandler(), realtime=True)  # 按原来的节奏回放
+
+回放时下行帧经过与线上相同的 _dispatch（解帧、解压、按 session 过滤、回调），
+上行的 StartSession 帧用来切换当前 session id。抓包包含合成文本，注意保管。
+
+文件格式：8 字节 magic、1 字节版本号、8 字节开始时间（time.time()），之后每帧一条记录：
+通道号（每个客户端一个）u32、方向 u8、相对开始的纳秒数 u64、长度 u32，然后是帧内容。
+命令行查看和回放：python -m api.capture_replay dump|replay incident.cap
+"""
+
+import struct
+import time
+
+MAGIC = b"DBTTSCAP"
+VERSION = 1
+
+OUTBOUND = 0
+INBOUND = 1
+
+_HEADER = struct.Struct(">8sBd")
+_RECORD = struct.Struct(">IBQI")
+
+
+class CapturedFrame:
+    __slots__ = ("channel", "direction", "timestamp", "data")
+
+    def __init__(self, channel: int, direction: int, timestamp: float, data: bytes):
+        self.channel = channel
+        self.direction = direction
+        # 相对抓包开始的秒数
+        self.timestamp = timestamp
+        self.data = data
+
+
+class FrameRecorder:
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int | None = None,
+        buffer_size: int = 1024 * 1024,
+    ):
+        self.path = path
+        # 文件超过 max_bytes 后不再记录，避免忘记关闭时写满磁盘
+        self.max_bytes = max_bytes
+        # 写入先进缓冲区，只有缓冲区满时才会在事件循环里同步写盘
+        self._file = open(path, "wb", buffering=buffer_size)
+        self._file.write(_HEADER.pack(MAGIC, VERSION, time.time()))
+        self._start = time.monotonic_ns()
+        self._channels = 0
+
+        self.bytes = _HEADER.size
+        self.frames = 0
+        self.dropped = 0
+
+    def channel(self) -> int:
+        """为一个客户端分配通道号，同一文件里多条连接的帧按通道区分"""
+        self._channels += 1
+        return self._channels
+
+    def record(self, channel: int, direction: int, data: bytes):
+        if self._file is None:
+            return
+        size = _RECORD.size + len(data)
+        if self.max_bytes is not None and self.bytes + size > self.max_bytes:
+            self.dropped += 1
+            return
+        elapsed = time.monotonic_ns() - self._start
+        self._file.write(_RECORD.pack(channel, direction, elapsed, len(data)))
+        self._file.write(data)
+        self.bytes += size
+        self.frames += 1
+
+    def flush(self):
+        if self._file is not None:
+            self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def read_capture(path: str):
+    """按记录顺序产出 CapturedFrame"""
+    with open(path, "rb") as f:
+        header = f.read(_HEADER.size)
+        if len(header) < _HEADER.size:
+            raise Exception(f"{path} is not a capture file")
+        magic, version, _ = _HEADER.unpack(header)
+        if magic != MAGIC:
+            raise Exception(f"{path} is not a capture file")
+        if version != VERSION:
+            raise Exception(f"unsupported capture version: {version}")
+        while True:
+            record = f.read(_RECORD.size)
+            if not record:
+                return
+            if len(record) < _RECORD.size:
+                # 进程异常退出时最后一条记录可能不完整
+                return
+            channel, direction, elapsed, size = _RECORD.unpack(record)
+            data = f.read(size)
+            if len(data) < size:
+                return
+            yield CapturedFrame(channel, direction, elapsed / 1e9, data)
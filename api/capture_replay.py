@@ -0,0 +1,130 @@
+"""离线回放 api.capture 录制的抓包
+
+python -m api.capture_replay dump incident.cap
+python -m api.capture_replay replay incident.cap --realtime --speed 2
+"""
+
+import argparse
+import asyncio
+import time
+
+from .capture import INBOUND, OUTBOUND, CapturedFrame, read_capture
+from .doubao_tts_api import DoubaoTTSClient, ResultCallback
+from .protocol import EVENT_StartSession, decode_client_frame, decode_frame
+
+
+class CaptureReplayer:
+    def __init__(self, path: str, channel: int | None = None):
+        self.path = path
+        self.frames = [
+            frame
+            for frame in read_capture(path)
+            if channel is None or frame.channel == channel
+        ]
+
+    @property
+    def channels(self) -> list[int]:
+        return sorted({frame.channel for frame in self.frames})
+
+    def inbound(self) -> list[bytes]:
+        return [frame.data for frame in self.frames if frame.direction == INBOUND]
+
+    async def _replay_channel(
+        self,
+        frames: list[CapturedFrame],
+        client: DoubaoTTSClient,
+        realtime: bool,
+        speed: float,
+        start: float,
+    ):
+        loop = asyncio.get_running_loop()
+        for frame in frames:
+            if realtime:
+                delay = start + frame.timestamp / speed - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            if frame.direction == OUTBOUND:
+                request = decode_client_frame(frame.data)
+                if request.event == EVENT_StartSession:
+                    # 回放客户端只接收抓包中当前 session 的帧
+                    client.session_id = request.session_id
+                    client._session_id_bytes = bytes(request.raw_session_id)
+            else:
+                await client._dispatch(frame.data)
+
+    async def replay(
+        self,
+        callback: ResultCallback | None = None,
+        realtime: bool = False,
+        speed: float = 1.0,
+    ) -> dict:
+        """把下行帧交给离线的 DoubaoTTSClient 处理，每个通道一个客户端。
+
+        realtime=True 时按抓包中的时间间隔回放，speed 为倍速；否则尽快回放，可用于对比解帧和分发的性能。
+        """
+        callback = callback or ResultCallback()
+        channels: dict[int, list[CapturedFrame]] = {}
+        for frame in self.frames:
+            channels.setdefault(frame.channel, []).append(frame)
+        clients = {
+            channel: DoubaoTTSClient(
+                "replay", "replay", "replay", "", "replay", callback
+            )
+            for channel in channels
+        }
+
+        start = asyncio.get_running_loop().time()
+        begin = time.perf_counter()
+        await asyncio.gather(
+            *[
+                self._replay_channel(frames, clients[channel], realtime, speed, start)
+                for channel, frames in channels.items()
+            ]
+        )
+        elapsed = time.perf_counter() - begin
+        inbound = self.inbound()
+        return {
+            "channels": len(channels),
+            "frames": len(inbound),
+            "bytes": sum(len(data) for data in inbound),
+            "elapsed": elapsed,
+        }
+
+
+def _describe(frame: CapturedFrame) -> str:
+    if frame.direction == OUTBOUND:
+        decoded = decode_client_frame(frame.data)
+        arrow = ">"
+    else:
+        decoded = decode_frame(frame.data)
+        arrow = "<"
+    return (
+        f"{frame.timestamp:>10.4f} #{frame.channel:<4} {arrow} "
+        f"event={decoded.event:<4} {len(frame.data):>8} bytes"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="查看或回放抓包文件")
+    parser.add_argument("command", choices=["dump", "replay"])
+    parser.add_argument("path")
+    parser.add_argument("--channel", type=int, default=None)
+    parser.add_argument("--realtime", action="store_true")
+    parser.add_argument("--speed", type=float, default=1.0)
+    args = parser.parse_args()
+
+    replayer = CaptureReplayer(args.path, args.channel)
+    if args.command == "dump":
+        for frame in replayer.frames:
+            print(_describe(frame))
+        return
+    stats = asyncio.run(replayer.replay(realtime=args.realtime, speed=args.speed))
+    print(
+        f"replayed {stats['frames']} frames ({stats['bytes']:,} bytes) on "
+        f"{stats['channels']} channels in {stats['elapsed']:.3f}s "
+        f"({stats['frames'] / max(stats['elapsed'], 1e-9):,.0f} frames/s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
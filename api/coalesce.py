@@ -0,0 +1,151 @@
+"""合并相同的并发合成请求（single-flight）。
+
+广播类场景下大量客户端几乎同时请求同一段 (speaker, text)。第一个请求发起上游 session，
+同一时间到达的重复请求订阅它的数据流：先重放已经收到的数据块，再继续接收新的，
+每个订阅者都能拿到完整音频。数据块只保存一份，各订阅者按自己的进度读取，
+读得慢的订阅者不会拖慢其他人；上游只按读得最快的订阅者限速：
+
+    coalescer = CoalescingSynthesizer(pool)
+    async for chunk in coalescer.synthesize("直播马上开始。", speaker=speaker):
+        ...
+
+合成结束后不再合并，之后的相同请求可以交给 SynthesisCache。
+"""
+
+import asyncio
+import contextlib
+
+from .cache import cache_key
+from .pool import DoubaoTTSPool
+from .scheduler import INTERACTIVE
+from .stream import AUDIO, StreamChunk
+
+
+class _Flight:
+    __slots__ = (
+        "chunks",
+        "bytes",
+        "read_bytes",
+        "subscribers",
+        "done",
+        "error",
+        "task",
+        "readable",
+        "writable",
+    )
+
+    def __init__(self):
+        # 所有订阅者共享的数据块日志，每个订阅者只保存自己的读取位置
+        self.chunks: list[StreamChunk] = []
+        self.bytes = 0
+        # 读得最快的订阅者已经读到的字节数
+        self.read_bytes = 0
+        self.subscribers = 0
+        self.done = False
+        self.error: BaseException | None = None
+        self.task: asyncio.Task | None = None
+        # 新数据块唤醒订阅者，读取进度唤醒上游，两个条件共用一把锁
+        lock = asyncio.Lock()
+        self.readable = asyncio.Condition(lock)
+        self.writable = asyncio.Condition(lock)
+
+
+class CoalescingSynthesizer:
+    def __init__(self, pool: DoubaoTTSPool, max_ahead_bytes: int = 1024 * 1024):
+        self.pool = pool
+        # 上游最多领先读得最快的订阅者多少字节，超过时暂停读取 socket
+        self.max_ahead_bytes = max_ahead_bytes
+        self._flights: dict[bytes, _Flight] = {}
+
+        self.upstream = 0
+        self.coalesced = 0
+
+    async def _produce(self, key: bytes, flight: _Flight, text: str, options: dict):
+        error = None
+        try:
+            async with self.pool.session(**options) as client:
+                async with contextlib.aclosing(client.synthesize(text)) as chunks:
+                    async for chunk in chunks:
+                        async with flight.writable:
+                            await flight.writable.wait_for(
+                                lambda: flight.bytes - flight.read_bytes
+                                < self.max_ahead_bytes
+                            )
+                            flight.chunks.append(chunk)
+                            if chunk.kind == AUDIO:
+                                flight.bytes += len(chunk.data)
+                            flight.readable.notify_all()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            error = e
+        finally:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        async with flight.readable:
+            flight.done = True
+            flight.error = error
+            flight.readable.notify_all()
+
+    async def synthesize(
+        self,
+        text: str,
+        speaker: str | None = None,
+        audio_format: str | None = None,
+        sample_rate: int | None = None,
+        priority: int = INTERACTIVE,
+    ):
+        """产出 StreamChunk；相同 (speaker, text, 格式, 采样率) 的并发请求共享一个上游 session"""
+        options = {
+            "speaker": speaker or self.pool.speaker,
+            "audio_format": audio_format or self.pool.audio_format,
+            "sample_rate": sample_rate or self.pool.sample_rate,
+            "priority": priority,
+        }
+        key = cache_key(
+            options["speaker"], text, options["audio_format"], options["sample_rate"]
+        )
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = self._flights[key] = _Flight()
+            flight.task = asyncio.create_task(self._produce(key, flight, text, options))
+            self.upstream += 1
+        else:
+            self.coalesced += 1
+
+        flight.subscribers += 1
+        position = 0
+        read_bytes = 0
+        try:
+            while True:
+                async with flight.readable:
+                    await flight.readable.wait_for(
+                        lambda: position < len(flight.chunks) or flight.done
+                    )
+                    if position == len(flight.chunks):
+                        if flight.error is not None:
+                            raise flight.error
+                        return
+                    chunk = flight.chunks[position]
+                    position += 1
+                    if chunk.kind == AUDIO:
+                        read_bytes += len(chunk.data)
+                        if read_bytes > flight.read_bytes:
+                            flight.read_bytes = read_bytes
+                            flight.writable.notify()
+                yield chunk
+        finally:
+            flight.subscribers -= 1
+            if not flight.subscribers and not flight.done:
+                # 所有订阅者都离开了，结束上游 session
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+                flight.task.cancel()
+                await asyncio.gather(flight.task, return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {
+            "upstream": self.upstream,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._flights),
+        }
@@ -0,0 +1,324 @@
+"""进程内共享的建连层：复用 SSLContext 和 TLS 会话、缓存 DNS、多地址并行建连（happy eyeballs）。
+
+默认每次 websockets.connect 都会新建 SSLContext、重新解析域名并完整握手，
+故障切换或流量突增时成百上千个连接同时建立，建连耗时从毫秒级涨到秒级。
+所有 DoubaoTTSClient 默认共享 default_connector()：
+
+- 一个 SSLContext，按域名保存 TLS 会话票据，之后的连接走会话恢复（简化握手）
+- 按 dns_ttl 缓存解析结果，同一域名的并发解析只查询一次
+- 可以通过 addresses 预先指定 IP，跳过 DNS
+- 解析出多个地址时交替 IPv6 / IPv4，前一个地址 happy_eyeballs_delay 秒内没连上就并行尝试下一个
+- 每次建连记录 DNS、TCP、TLS、websocket 握手各阶段耗时
+
+    connector = Connector(dns_ttl=300, addresses={"openspeech.bytedance.com": ["1.2.3.4"]})
+    pool = DoubaoTTSPool(uid, app_id, token, url, speaker, connector=connector)
+"""
+
+import asyncio
+import socket
+import ssl
+import time
+
+import websockets
+from websockets.asyncio.client import ClientConnection
+from websockets.uri import parse_uri
+
+try:
+    from websockets.proxy import get_proxy
+except ImportError:  # websockets < 15 不支持代理
+
+    def get_proxy(uri):
+        return None
+
+
+class ConnectTimes:
+    """一次建连各阶段的耗时（秒），复用 DNS 缓存时 dns 接近 0，非 TLS 连接 tls 为 None"""
+
+    __slots__ = ("dns", "tcp", "tls", "handshake", "tls_resumed", "address")
+
+    def __init__(self):
+        self.dns = None
+        self.tcp = None
+        self.tls = None
+        self.handshake = None
+        self.tls_resumed = None
+        self.address = None
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class _TimedConnection(ClientConnection):
+    # TCP（以及 TLS）就绪的时间，用于区分 TLS 握手和 websocket 握手的耗时
+    transport_ready: float | None = None
+    connect_times: ConnectTimes | None = None
+
+    def connection_made(self, transport):
+        self.transport_ready = time.monotonic()
+        super().connection_made(transport)
+
+
+class _ResumingSSLContext(ssl.SSLContext):
+    """新建 TLS 连接时带上同一域名上次的会话，服务端接受时跳过完整握手"""
+
+    sessions: dict
+
+    def wrap_bio(
+        self,
+        incoming,
+        outgoing,
+        server_side=False,
+        server_hostname=None,
+        session=None,
+    ):
+        if session is None and not server_side:
+            session = self.sessions.get(server_hostname)
+        return super().wrap_bio(
+            incoming, outgoing, server_side, server_hostname, session
+        )
+
+
+def create_ssl_context(cafile: str | None = None) -> ssl.SSLContext:
+    """与 ssl.create_default_context() 相同的校验设置，支持会话恢复"""
+    context = _ResumingSSLContext(ssl.PROTOCOL_TLS_CLIENT)
+    context.sessions = {}
+    if cafile is None:
+        context.load_default_certs(ssl.Purpose.SERVER_AUTH)
+    else:
+        context.load_verify_locations(cafile)
+    return context
+
+
+def _interleave(infos: list) -> list:
+    # RFC 8305：按第一个地址的协议族开始，IPv6 / IPv4 交替尝试
+    if not infos:
+        return infos
+    first = [info for info in infos if info[0] == infos[0][0]]
+    other = [info for info in infos if info[0] != infos[0][0]]
+    result = []
+    for index in range(max(len(first), len(other))):
+        result.extend(group[index] for group in (first, other) if index < len(group))
+    return result
+
+
+class Connector:
+    def __init__(
+        self,
+        ssl_context: ssl.SSLContext | None = None,
+        cafile: str | None = None,
+        dns_ttl: float = 60.0,
+        happy_eyeballs_delay: float = 0.25,
+        addresses: dict[str, list[str]] | None = None,
+    ):
+        # 传入自己的 SSLContext 时需要用 create_ssl_context() 创建才能恢复会话
+        self.ssl_context = ssl_context or create_ssl_context(cafile)
+        self.dns_ttl = dns_ttl
+        self.happy_eyeballs_delay = happy_eyeballs_delay
+        self.addresses = addresses or {}
+
+        self._dns: dict[tuple, tuple[float, list]] = {}
+        self._lookups: dict[tuple, asyncio.Task] = {}
+
+        self.connects = 0
+        self.connect_failures = 0
+        self.dns_hits = 0
+        self.dns_misses = 0
+        self.tls_resumed = 0
+        self.tls_full = 0
+
+    async def resolve(self, host: str, port: int) -> list:
+        """返回 getaddrinfo 格式的地址列表，结果缓存 dns_ttl 秒"""
+        loop = asyncio.get_running_loop()
+        if host in self.addresses:
+            infos = []
+            for address in self.addresses[host]:
+                infos += await loop.getaddrinfo(
+                    address,
+                    port,
+                    type=socket.SOCK_STREAM,
+                    flags=socket.AI_NUMERICHOST,
+                )
+            return infos
+
+        key = (host, port)
+        cached = self._dns.get(key)
+        if cached is not None and cached[0] > time.monotonic():
+            self.dns_hits += 1
+            return cached[1]
+
+        # 同一域名的并发解析合并成一次查询，调用方被取消时查询继续进行
+        lookup = self._lookups.get(key)
+        if lookup is None or lookup.get_loop() is not loop:
+            self.dns_misses += 1
+            lookup = self._lookups[key] = loop.create_task(self._lookup(host, port))
+        else:
+            self.dns_hits += 1
+        return await asyncio.shield(lookup)
+
+    async def _lookup(self, host: str, port: int) -> list:
+        key = (host, port)
+        try:
+            infos = await asyncio.get_running_loop().getaddrinfo(
+                host, port, type=socket.SOCK_STREAM
+            )
+            self._dns[key] = (time.monotonic() + self.dns_ttl, infos)
+            return infos
+        finally:
+            if self._lookups.get(key) is asyncio.current_task():
+                del self._lookups[key]
+
+    def invalidate(self, host: str, port: int | None = None):
+        for key in list(self._dns):
+            if key[0] == host and (port is None or key[1] == port):
+                del self._dns[key]
+
+    @staticmethod
+    async def _connect_one(info, recv_buffer: int | None = None) -> socket.socket:
+        family, type_, proto, _, address = info
+        sock = socket.socket(family, type_, proto)
+        try:
+            sock.setblocking(False)
+            if recv_buffer:
+                # 需要在 connect 之前设置，TCP 窗口按它协商
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, recv_buffer)
+            await asyncio.get_running_loop().sock_connect(sock, address)
+        except BaseException:
+            sock.close()
+            raise
+        return sock
+
+    async def _open_socket(
+        self, infos: list, recv_buffer: int | None = None
+    ) -> socket.socket:
+        pending: set[asyncio.Task] = set()
+        errors = []
+        sock = None
+        remaining = iter(_interleave(infos))
+        try:
+            while sock is None:
+                info = next(remaining, None)
+                if info is not None:
+                    pending.add(
+                        asyncio.create_task(self._connect_one(info, recv_buffer))
+                    )
+                elif not pending:
+                    break
+                # 当前地址失败或超过 happy_eyeballs_delay 仍未连上时开始尝试下一个
+                done, pending = await asyncio.wait(
+                    pending,
+                    timeout=self.happy_eyeballs_delay if info is not None else None,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                for task in done:
+                    if task.exception() is not None:
+                        errors.append(task.exception())
+                    elif sock is None:
+                        sock = task.result()
+                    else:
+                        task.result().close()
+        finally:
+            for task in pending:
+                task.cancel()
+            for result in await asyncio.gather(*pending, return_exceptions=True):
+                if isinstance(result, socket.socket):
+                    result.close()
+        if sock is None:
+            raise OSError(
+                "all connection attempts failed: "
+                + "; ".join(str(e) for e in errors or ["no address"])
+            )
+        return sock
+
+    async def connect(
+        self,
+        url: str,
+        open_timeout: float | None = 10,
+        recv_buffer: int | None = None,
+        **kwargs,
+    ):
+        """建立 websocket 连接，返回值的 connect_times 为各阶段耗时。
+
+        kwargs 传给 websockets.connect；open_timeout 限制包括 DNS 在内的整个建连过程。
+        recv_buffer 设置 socket 的接收缓冲区（SO_RCVBUF），同时限制每次从 socket 读出、
+        在进程内解析排队的数据量。
+        """
+        self.connects += 1
+        try:
+            return await asyncio.wait_for(
+                self._connect(url, recv_buffer, kwargs), open_timeout
+            )
+        except BaseException:
+            self.connect_failures += 1
+            raise
+
+    async def _connect(self, url: str, recv_buffer: int | None, kwargs: dict):
+        uri = parse_uri(url)
+        times = ConnectTimes()
+        if uri.secure:
+            kwargs.setdefault("ssl", self.ssl_context)
+        kwargs.setdefault("create_connection", _TimedConnection)
+        start = time.monotonic()
+
+        if get_proxy(uri) is not None:
+            # 经过代理时由 websockets 负责建连，只复用 SSLContext
+            websocket = await websockets.connect(url, open_timeout=None, **kwargs)
+        else:
+            infos = await self.resolve(uri.host, uri.port)
+            resolved = time.monotonic()
+            times.dns = resolved - start
+            try:
+                sock = await self._open_socket(infos, recv_buffer)
+            except OSError:
+                self.invalidate(uri.host, uri.port)
+                raise
+            start = time.monotonic()
+            times.tcp = start - resolved
+            times.address = sock.getpeername()[0]
+            try:
+                websocket = await websockets.connect(
+                    url, sock=sock, open_timeout=None, **kwargs
+                )
+            except BaseException:
+                sock.close()
+                raise
+
+        finished = time.monotonic()
+        ready = getattr(websocket, "transport_ready", None) or start
+        ssl_object = websocket.transport.get_extra_info("ssl_object")
+        if ssl_object is not None:
+            times.tls = ready - start
+            times.tls_resumed = ssl_object.session_reused
+            if times.tls_resumed:
+                self.tls_resumed += 1
+            else:
+                self.tls_full += 1
+            # TLS 1.3 的会话票据在握手之后才到达，websocket 握手完成时已经收到
+            session = ssl_object.session
+            sessions = getattr(self.ssl_context, "sessions", None)
+            if sessions is not None and session is not None and session.has_ticket:
+                sessions[ssl_object.server_hostname] = session
+        times.handshake = finished - ready
+        websocket.connect_times = times
+        return websocket
+
+    def stats(self) -> dict:
+        return {
+            "connects": self.connects,
+            "connect_failures": self.connect_failures,
+            "dns_hits": self.dns_hits,
+            "dns_misses": self.dns_misses,
+            "dns_cached": len(self._dns),
+            "tls_resumed": self.tls_resumed,
+            "tls_full": self.tls_full,
+        }
+
+
+_default: Connector | None = None
+
+
+def default_connector() -> Connector:
+    """同一进程内的客户端默认共享的 Connector"""
+    global _default
+    if _default is None:
+        _default = Connector()
+    return _default
@@ -1,63 +1,98 @@
 import websockets
+import contextlib
 import json
+import time
 import uuid
 import asyncio
+import warnings
 
 # import fastrand
 from websockets.protocol import State
 
-PROTOCOL_VERSION = 0b0001
-DEFAULT_HEADER_SIZE = 0b0001
-
-# Message Type:
-FULL_CLIENT_REQUEST = 0b0001
-AUDIO_ONLY_RESPONSE = 0b1011
-FULL_SERVER_RESPONSE = 0b1001
-ERROR_INFORMATION = 0b1111
-
-# Message Type Specific Flags
-MsgTypeFlagNoSeq = 0b0000  # Non-terminal packet with no sequence
-MsgTypeFlagPositiveSeq = 0b1  # Non-terminal packet with sequence > 0
-MsgTypeFlagLastNoSeq = 0b10  # last packet with no sequence
-MsgTypeFlagNegativeSeq = 0b11  # Payload contains event number (int32)
-MsgTypeFlagWithEvent = 0b100
-# Message Serialization
-NO_SERIALIZATION = 0b0000
-JSON = 0b0001
-# Message Compression
-COMPRESSION_NO = 0b0000
-COMPRESSION_GZIP = 0b0001
-
-EVENT_NONE = 0
-EVENT_Start_Connection = 1
-
-EVENT_FinishConnection = 2
-
-EVENT_ConnectionStarted = 50  # 成功建连
-
-EVENT_ConnectionFailed = 51  # 建连失败（可能是无法通过权限认证）
-
-EVENT_ConnectionFinished = 52  # 连接结束
-
-# 上行Session事件
-EVENT_StartSession = 100
-
-EVENT_FinishSession = 102
-# 下行Session事件
-EVENT_SessionStarted = 150
-EVENT_SessionFinished = 152
-
-EVENT_SessionFailed = 153
-
-# 上行通用事件
-EVENT_TaskRequest = 200
-
-# 下行TTS事件
-EVENT_TTSSentenceStart = 350
-
-EVENT_TTSSentenceEnd = 351
+from .protocol import (  # noqa: F401
+    PROTOCOL_VERSION,
+    DEFAULT_HEADER_SIZE,
+    FULL_CLIENT_REQUEST,
+    AUDIO_ONLY_RESPONSE,
+    FULL_SERVER_RESPONSE,
+    ERROR_INFORMATION,
+    MsgTypeFlagNoSeq,
+    MsgTypeFlagPositiveSeq,
+    MsgTypeFlagLastNoSeq,
+    MsgTypeFlagNegativeSeq,
+    MsgTypeFlagWithEvent,
+    NO_SERIALIZATION,
+    JSON,
+    COMPRESSION_NO,
+    COMPRESSION_GZIP,
+    EVENT_NONE,
+    EVENT_Start_Connection,
+    EVENT_FinishConnection,
+    EVENT_ConnectionStarted,
+    EVENT_ConnectionFailed,
+    EVENT_ConnectionFinished,
+    EVENT_StartSession,
+    EVENT_FinishSession,
+    EVENT_SessionStarted,
+    EVENT_SessionFinished,
+    EVENT_SessionFailed,
+    EVENT_TaskRequest,
+    EVENT_TTSSentenceStart,
+    EVENT_TTSSentenceEnd,
+    EVENT_TTSResponse,
+    FrameEncoder,
+    decode_frame,
+    decompress_frame,
+    peek_event,
+)
+from .audio import StreamResampler
+from .cache import SynthesisCache, cache_key
+from .capture import INBOUND, OUTBOUND, FrameRecorder
+from .connector import ConnectTimes, Connector, default_connector
+from .events import ALL_EVENTS, OTHER, AlignmentIndex, SentenceEvent
+from .metrics import MetricsHook, SessionStats
+from .replay import ReplayTracker
+from .retry import Backoff
+from .scheduler import INTERACTIVE, QuotaScheduler
+from .segmenter import TextSegmenter
+from .stream import AUDIO, SENTENCE_END, SENTENCE_START, ChunkQueue, StreamChunk
+
+# DoubaoTTSClient 的状态位
+_CONNECTED = 1
+_SESSION_STARTED = 2
+_SESSION_FINISHED = 4
+_FAILED = 8
+# 句子结束或 session 结束，只用于兼容旧的 complete_event
+_COMPLETE = 16
+
+# 单机高密度部署时的连接参数，按需传给 DoubaoTTSClient 或 DoubaoTTSPool(client_options=...)：
+# 关闭 permessage-deflate、限制单帧大小和读写缓冲，并固定 socket 接收缓冲区
+HIGH_DENSITY_OPTIONS = {
+    "max_frame_bytes": 8 * 1024 * 1024,
+    "max_queue": 4,
+    "read_buffer_bytes": 32 * 1024,
+    "write_limit": 16 * 1024,
+    "ws_compression": None,
+}
+
+
+def _compat_event(name: str, flag: int):
+    """旧版本公开的 asyncio.Event 属性，按需创建并与状态位同步"""
+
+    def get(self) -> asyncio.Event:
+        warnings.warn(
+            f"DoubaoTTSClient.{name} is deprecated", DeprecationWarning, stacklevel=2
+        )
+        if self._compat_events is None:
+            self._compat_events = {}
+        event = self._compat_events.get(flag)
+        if event is None:
+            event = self._compat_events[flag] = asyncio.Event()
+            if self._state & flag:
+                event.set()
+        return event
 
-EVENT_TTSResponse = 352
+    return property(get)
 
 
 class Header:
@@ -146,6 +181,9 @@ class ResultCallback:
     def on_data(self, data: bytes) -> None:
         pass
 
+    def on_sentence(self, event: SentenceEvent) -> None:
+        pass
+
 
 class Request:
     def __init__(self, uid: str):
@@ -158,7 +196,11 @@ class Request:
         speaker="",
         audio_format="pcm",
         audio_sample_rate=24000,
+        enable_timestamp=False,
     ):
+        audio_params = {"format": audio_format, "sample_rate": audio_sample_rate}
+        if enable_timestamp:
+            audio_params["enable_timestamp"] = True
         return str.encode(
             json.dumps(
                 {
@@ -168,10 +210,7 @@ class Request:
                     "req_params": {
                         "text": text,
                         "speaker": speaker,
-                        "audio_params": {
-                            "format": audio_format,
-                            "sample_rate": audio_sample_rate,
-                        },
+                        "audio_params": audio_params,
                     },
                 }
             )
@@ -186,14 +225,27 @@ class Request:
         payload = str.encode("{}")
         return (header, optional, payload)
 
-    async def start_session(self, speaker, session_id: str):
+    async def start_session(
+        self,
+        speaker,
+        session_id: str,
+        audio_format: str = "pcm",
+        audio_sample_rate: int = 24000,
+        enable_timestamp: bool = False,
+    ):
         header = Header(
             message_type=FULL_CLIENT_REQUEST,
             message_type_specific_flags=MsgTypeFlagWithEvent,
             serial_method=JSON,
         ).as_bytes()
         optional = Optional(event=EVENT_StartSession, sessionId=session_id).as_bytes()
-        payload = self.get_payload_bytes(event=EVENT_StartSession, speaker=speaker)
+        payload = self.get_payload_bytes(
+            event=EVENT_StartSession,
+            speaker=speaker,
+            audio_format=audio_format,
+            audio_sample_rate=audio_sample_rate,
+            enable_timestamp=enable_timestamp,
+        )
         return (header, optional, payload)
 
     async def finish_session(self, session_id):
@@ -218,6 +270,73 @@ class Request:
 
 
 class DoubaoTTSClient:
+    # 每个连接一个实例，常用属性放在 __slots__ 中；保留 __dict__（只在设置其他属性时才创建），
+    # 调用方和子类仍然可以给实例添加属性
+    __slots__ = (
+        "__dict__",
+        "_compat_events",
+        "uid",
+        "app_id",
+        "token",
+        "url",
+        "speaker",
+        "callback",
+        "audio_format",
+        "sample_rate",
+        "keep_alive",
+        "cache",
+        "_cache_hit",
+        "_cache_text",
+        "_cache_recorded",
+        "_cache_bytes",
+        "websocket",
+        "websocket_task",
+        "stats",
+        "hooks",
+        "_connection_times",
+        "_connect_phases",
+        "connector",
+        "max_frame_bytes",
+        "max_queue",
+        "read_buffer_bytes",
+        "write_limit",
+        "ws_compression",
+        "recorder",
+        "_capture_channel",
+        "events",
+        "alignment",
+        "_ignored_events",
+        "_stream",
+        "request",
+        "_encoder",
+        "decompress_in_executor_bytes",
+        "connect_timeout",
+        "session_timeout",
+        "finish_timeout",
+        "reconnect_retries",
+        "reconnect_backoff",
+        "_replay",
+        "scheduler",
+        "priority",
+        "_holds_slot",
+        "_resume_task",
+        "_resuming",
+        "_deferred",
+        "_reconnect_attempts",
+        "_finishing",
+        "_closing",
+        "_failure",
+        "_lock",
+        "_send_lock",
+        "_is_started",
+        "_is_stopped",
+        "_is_first",
+        "session_id",
+        "_session_id_bytes",
+        "_state",
+        "_state_waiter",
+    )
+
     def __init__(
         self,
         uid: str,
@@ -226,6 +345,29 @@ class DoubaoTTSClient:
         url: str,
         speaker: str,
         callback: ResultCallback,
+        keep_alive: bool = False,
+        cache: SynthesisCache | None = None,
+        compression_threshold: int | None = None,
+        decompress_in_executor_bytes: int = 64 * 1024,
+        hooks: list[MetricsHook] | None = None,
+        connect_timeout: float = 5.0,
+        session_timeout: float = 5.0,
+        finish_timeout: float = 5.0,
+        reconnect_retries: int = 3,
+        reconnect_backoff: Backoff | None = None,
+        audio_format: str = "pcm",
+        sample_rate: int = 24000,
+        scheduler: QuotaScheduler | None = None,
+        priority: int = INTERACTIVE,
+        connector: Connector | None = None,
+        max_frame_bytes: int = 100 * 1024 * 1024,
+        max_queue: int = 16,
+        read_buffer_bytes: int | None = None,
+        write_limit: int = 32 * 1024,
+        ws_compression: str | None = "deflate",
+        recorder: FrameRecorder | None = None,
+        events=ALL_EVENTS,
+        alignment: bool = False,
     ):
         self.uid = uid
         self.app_id = app_id
@@ -233,10 +375,75 @@ class DoubaoTTSClient:
         self.url = url
         self.speaker = speaker
         self.callback = callback
+        # 音频格式：pcm / ogg_opus / mp3，可以在两个 session 之间修改
+        self.audio_format = audio_format
+        self.sample_rate = sample_rate
+        # keep_alive 模式下连接在多个 session 之间复用，只在 close() 或服务端失败时断开
+        self.keep_alive = keep_alive
+        # synthesize(str) 和回调模式下命中缓存时直接回放，不走网络
+        self.cache = cache
+        # 回调模式：第一段文本命中的缓存，在 streaming_complete 时回放
+        self._cache_hit: list[StreamChunk] | None = None
+        # 回调模式：未命中时记录本 session 的文本和回调数据，结束后写入缓存
+        self._cache_text: list[str] | None = None
+        self._cache_recorded: list[StreamChunk] | None = None
+        self._cache_bytes = 0
         self.websocket = None
         self.websocket_task = None
+        # 当前（或最近一个）session 的耗时统计，结束时交给 hooks
+        self.stats: SessionStats | None = None
+        self.hooks = hooks or []
+        self._connection_times = (None, None, None)
+        self._connect_phases: ConnectTimes | None = None
+        # 建连层：默认整个进程共享 SSLContext、TLS 会话和 DNS 缓存
+        self.connector = connector or default_connector()
+        # 单帧上限、读缓冲帧数和写缓冲高水位，连接数很多时决定了每条连接的内存上限。
+        # 音频已经是压缩格式或 PCM，websocket 层的 permessage-deflate 几乎没有收益，
+        # 每条连接却要常驻约 50KB 的 zlib 状态，默认关闭
+        self.max_frame_bytes = max_frame_bytes
+        self.max_queue = max_queue
+        self.read_buffer_bytes = read_buffer_bytes
+        self.write_limit = write_limit
+        self.ws_compression = ws_compression
+        # 打开后记录本连接收发的原始帧，用于离线复现问题（见 api.capture）
+        self.recorder = recorder
+        self._capture_channel = recorder.channel() if recorder is not None else 0
+        # 订阅的事件（SENTENCE_START / SENTENCE_END / OTHER），未订阅的句子事件读完 header 就丢弃
+        self.events = frozenset(events)
+        # 音频字节偏移到文本位置的索引，每个 session 重建
+        self.alignment = AlignmentIndex() if alignment else None
+        self._ignored_events = set()
+        if SENTENCE_START not in self.events:
+            self._ignored_events.add(EVENT_TTSSentenceStart)
+        if SENTENCE_END not in self.events:
+            self._ignored_events.add(EVENT_TTSSentenceEnd)
+        # synthesize() 期间音频与句子事件写入该队列，而不是同步回调 on_data
+        self._stream: ChunkQueue | None = None
 
         self.request = Request(uid=self.uid)
+        self._encoder = FrameEncoder(self.uid, compression_threshold)
+        # 超过该大小的压缩帧放到线程池中解压，避免阻塞事件循环
+        self.decompress_in_executor_bytes = decompress_in_executor_bytes
+
+        self.connect_timeout = connect_timeout
+        self.session_timeout = session_timeout
+        self.finish_timeout = finish_timeout
+        # session 进行中连接意外断开时，最多重连 reconnect_retries 次并重放未合成完的文本
+        self.reconnect_retries = reconnect_retries
+        self.reconnect_backoff = reconnect_backoff or Backoff(base=0.2, max_delay=5.0)
+        self._replay = ReplayTracker()
+        # 按 app_id 的并发与字符速率配额，priority 越小越优先
+        self.scheduler = scheduler
+        self.priority = priority
+        self._holds_slot = False
+        self._resume_task: asyncio.Task | None = None
+        self._resuming = False
+        # 重放过程中新提交的文本，在重放的文本之后发送
+        self._deferred: list[str] = []
+        self._reconnect_attempts = 0
+        self._finishing = False
+        self._closing = False
+        self._failure = None
 
         self._lock = asyncio.Lock()
         self._send_lock = asyncio.Lock()
@@ -246,10 +453,28 @@ class DoubaoTTSClient:
         self._is_first = True
 
         self.session_id = str(uuid.uuid4())
-
-        self.start_connection_event = asyncio.Event()
-        self.start_session_event = asyncio.Event()
-        self.complete_event = asyncio.Event()
+        self._session_id_bytes = self.session_id.encode()
+
+        # 连接与 session 的状态位，状态变化时唤醒 _state_waiter 上的所有等待者，
+        # 代替每个客户端一组常驻的 asyncio.Event
+        self._state = 0
+        self._state_waiter: asyncio.Future | None = None
+        self._compat_events: dict[int, asyncio.Event] | None = None
+
+    start_connection_event = _compat_event("start_connection_event", _CONNECTED)
+    start_session_event = _compat_event("start_session_event", _SESSION_STARTED)
+    complete_event = _compat_event("complete_event", _COMPLETE)
+    session_finished_event = _compat_event("session_finished_event", _SESSION_FINISHED)
+    failed_event = _compat_event("failed_event", _FAILED)
+
+    @property
+    def is_connected(self) -> bool:
+        return (
+            self.websocket is not None
+            and self.websocket.state == State.OPEN
+            and self.websocket_task is not None
+            and bool(self._state & _CONNECTED)
+        )
 
     # def gen_log_id(self):
     #     ts = int(time.time() * 1000)
@@ -269,52 +494,396 @@ class DoubaoTTSClient:
                     payload_size = len(payload).to_bytes(4, "big", signed=True)
                     full_client_request.extend(payload_size)
                     full_client_request.extend(payload)
+                if self.recorder is not None:
+                    self.recorder.record(
+                        self._capture_channel, OUTBOUND, full_client_request
+                    )
                 await self.websocket.send(full_client_request)
 
+    def _set_state(self, flags: int):
+        if flags & _SESSION_FINISHED:
+            flags |= _COMPLETE
+        self._state |= flags
+        waiter = self._state_waiter
+        if waiter is not None:
+            self._state_waiter = None
+            if not waiter.done():
+                waiter.set_result(None)
+        if self._compat_events is not None:
+            for flag, event in self._compat_events.items():
+                if flags & flag:
+                    event.set()
+
+    def _clear_state(self, flags: int):
+        if flags & _SESSION_FINISHED:
+            flags |= _COMPLETE
+        self._state &= ~flags
+        if self._compat_events is not None:
+            for flag, event in self._compat_events.items():
+                if flags & flag:
+                    event.clear()
+
+    async def _wait_state(self, flags: int):
+        """等待 flags 中任意一个状态位被设置"""
+        while not self._state & flags:
+            if self._state_waiter is None:
+                self._state_waiter = asyncio.get_running_loop().create_future()
+            # 多个等待者共享同一个 future，单个等待者超时取消时不影响其他人
+            await asyncio.shield(self._state_waiter)
+
+    async def _on_connection_started(self, frame):
+        self._set_state(_CONNECTED)
+
+    async def _on_session_started(self, frame):
+        self._set_state(_SESSION_STARTED)
+
+    def _release_slot(self):
+        if self._holds_slot:
+            self._holds_slot = False
+            self.scheduler.release_session()
+
+    def _finish_stats(self, failed: bool):
+        self._release_slot()
+        stats = self.stats
+        if stats is None or stats.finished is not None:
+            return
+        stats.finished = time.monotonic()
+        stats.failed = failed
+        for hook in self.hooks:
+            hook.on_session_end(stats)
+
+    async def _on_tts_response(self, frame):
+        if frame.message_type != AUDIO_ONLY_RESPONSE:
+            return await self._on_other(frame)
+        payload = self._replay.audio(frame.payload)
+        if payload is None:
+            return
+        self._reconnect_attempts = 0
+        if self.alignment is not None:
+            self.alignment.audio(len(payload))
+        stats = self.stats
+        if stats is not None:
+            first = stats.first_audio is None
+            stats.on_audio(len(payload))
+            if first:
+                for hook in self.hooks:
+                    hook.on_first_audio(stats)
+        if self._stream is not None:
+            await self._stream.put(AUDIO, payload)
+        elif self.callback:
+            # 回调拿到的数据可能被保存到帧缓冲释放之后，按接口约定交出 bytes；synthesize() 仍是零拷贝
+            data = bytes(payload)
+            if self._cache_recorded is not None:
+                self.__record(StreamChunk(AUDIO, data))
+            self.callback.on_data(data)
+
+    async def _on_sentence_start(self, frame):
+        if not self._replay.sentence_start():
+            return
+        if self.alignment is not None:
+            self.alignment.sentence_start()
+        if SENTENCE_START not in self.events:
+            return
+        event = SentenceEvent(SENTENCE_START, bytes(frame.payload or b""))
+        if self._stream is not None:
+            await self._stream.put(SENTENCE_START, event)
+        elif self.callback:
+            if self._cache_recorded is not None:
+                self.__record(StreamChunk(SENTENCE_START, event))
+            self.callback.on_sentence(event)
+
+    async def _on_sentence_end(self, frame):
+        if self._compat_events is not None:
+            self._set_state(_COMPLETE)
+        # 只保存原始字节，用到时才解析
+        event = SentenceEvent(SENTENCE_END, bytes(frame.payload or b""))
+        if not self._replay.sentence_end(event):
+            return
+        if self.alignment is not None:
+            self.alignment.sentence_end(event)
+        if self._stream is None and self._cache_recorded is not None:
+            self.__record(StreamChunk(SENTENCE_END, event))
+        if SENTENCE_END in self.events:
+            if self._stream is not None:
+                await self._stream.put(SENTENCE_END, event)
+            elif self.callback:
+                self.callback.on_sentence(event)
+        if self.callback:
+            self.callback.on_complete()
+
+    async def _on_session_finished(self, frame):
+        self._finish_stats(failed=False)
+        if self._stream is not None:
+            self._stream.finish()
+        self._set_state(_SESSION_FINISHED)
+
+    async def _on_failed(self, frame):
+        if frame.event == EVENT_ConnectionFailed:
+            self._clear_state(_CONNECTED)
+        self._finish_stats(failed=True)
+        self._is_started = False
+        self._is_stopped = True
+        meta = frame.meta_json
+        self._failure = meta
+        if self.scheduler is not None and self.scheduler.is_throttle(meta):
+            self.scheduler.report_throttled()
+        if self._stream is not None:
+            self._stream.finish(Exception(meta))
+        self._set_state(_FAILED | _SESSION_FINISHED)
+        if self.callback:
+            self.callback.on_error(meta)
+
+    async def _on_other(self, frame):
+        if OTHER in self.events and self.callback:
+            self.callback.on_event(frame.payload_json)
+
+    _handlers = {
+        EVENT_ConnectionStarted: _on_connection_started,
+        EVENT_SessionStarted: _on_session_started,
+        EVENT_TTSResponse: _on_tts_response,
+        EVENT_TTSSentenceStart: _on_sentence_start,
+        EVENT_TTSSentenceEnd: _on_sentence_end,
+        EVENT_SessionFinished: _on_session_finished,
+        EVENT_ConnectionFailed: _on_failed,
+        EVENT_SessionFailed: _on_failed,
+    }
+
+    async def _dispatch(self, message: bytes):
+        if self._ignored_events:
+            event = peek_event(message)
+            if event in self._ignored_events and not self._tracks_sentence(event):
+                # 没有订阅、也没有其他地方需要的句子事件，读完 header 就丢弃
+                return
+        frame = decode_frame(message)
+        if (
+            frame.raw_session_id is not None
+            and frame.raw_session_id != self._session_id_bytes
+        ):
+            # 连接复用时，丢弃上一个 session 迟到的帧
+            return
+        if frame.compression == COMPRESSION_GZIP:
+            if len(message) >= self.decompress_in_executor_bytes:
+                await asyncio.get_running_loop().run_in_executor(
+                    None, decompress_frame, frame
+                )
+            else:
+                decompress_frame(frame)
+        await self._handlers.get(frame.event, DoubaoTTSClient._on_other)(self, frame)
+
+    def _tracks_sentence(self, event: int) -> bool:
+        # 断线重放和对齐索引依赖句子边界，on_complete 依赖句子结束；
+        # 这些情况下未订阅的句子事件仍然解帧，但不交给调用方
+        if self.reconnect_retries > 0 or self.alignment is not None:
+            return True
+        return (
+            event == EVENT_TTSSentenceEnd
+            and self.callback is not None
+            and type(self.callback).on_complete is not ResultCallback.on_complete
+        )
+
+    def _on_closed(self):
+        # 连接已断开，唤醒所有等待中的 session
+        if self._is_started:
+            self._finish_stats(failed=True)
+        if self._stream is not None:
+            self._stream.finish(Exception("TTS connection is closed"))
+        self._clear_state(_CONNECTED)
+        self._set_state(_FAILED | _SESSION_FINISHED)
+
+    def _can_resume(self) -> bool:
+        return (
+            self.reconnect_retries > 0
+            and not self._closing
+            and self._is_started
+            and not self._is_stopped
+            and not self._state & _SESSION_FINISHED
+        )
+
     async def _message_loop(self):
         try:
             async for message in self.websocket:
-                if isinstance(message, str):
-                    pass
-                elif isinstance(message, bytes):
-                    res = self.parser_response(message)
-                    if res.optional.event == EVENT_ConnectionStarted:
-                        self.start_connection_event.set()
-                    elif res.optional.event == EVENT_SessionStarted:
-                        self.start_session_event.set()
-                    elif (
-                        res.optional.event == EVENT_TTSResponse
-                        and res.header.message_type == AUDIO_ONLY_RESPONSE
-                    ):
-                        if self.callback:
-                            self.callback.on_data(res.payload)
-                    elif res.optional.event == EVENT_TTSSentenceStart:
-                        pass
-                    elif res.optional.event == EVENT_TTSSentenceEnd:
-                        self.complete_event.set()
-                        if self.callback:
-                            self.callback.on_complete()
-                    elif res.optional.event in [
-                        EVENT_ConnectionFailed,
-                        EVENT_SessionFailed,
-                    ]:
-                        self._is_started = False
-                        self._is_stopped = True
-                        self.complete_event.set()
-                        if self.callback:
-                            self.callback.on_error(res.response_meta_json)
-                    else:
-                        if self.callback:
-                            self.callback.on_event(res.payload_json)
+                if isinstance(message, bytes):
+                    if self.recorder is not None:
+                        self.recorder.record(self._capture_channel, INBOUND, message)
+                    await self._dispatch(message)
         except websockets.exceptions.ConnectionClosed:
-            self.websocket_task = None
-            self.callback.on_close()
+            pass
         except asyncio.CancelledError:
             self.websocket_task = None
             self.callback.on_close()
+            self._on_closed()
+            return
         except Exception as e:
             self.websocket_task = None
             self.callback.on_error(e)
+            self._on_closed()
+            return
+
+        self.websocket_task = None
+        if self._resuming:
+            # 重连中的新连接又断开，由 _resume() 继续重试
+            self._clear_state(_CONNECTED)
+            self._set_state(_FAILED)
+        elif self._can_resume():
+            self._resuming = True
+            self._resume_task = asyncio.create_task(self._resume())
+        else:
+            self.callback.on_close()
+            self._on_closed()
+
+    async def _resume(self):
+        """连接意外断开后重连，开启新 session 并重放还没有合成完的文本"""
+        error = None
+        # 重连次数在收到新的音频后才清零，避免每次重连都在同一位置断开时无限重试
+        while self._reconnect_attempts < self.reconnect_retries:
+            attempt = self._reconnect_attempts
+            self._reconnect_attempts += 1
+            if attempt:
+                await asyncio.sleep(self.reconnect_backoff.delay(attempt - 1))
+            if self._is_stopped:
+                break
+            try:
+                async with self._lock:
+                    await self.__connect()
+                    await self.__start_session(resume=True)
+            except Exception as e:
+                error = e
+                if self.websocket and self.websocket.state == State.OPEN:
+                    await self.websocket.close()
+                continue
+
+            if self.stats is not None:
+                self.stats.reconnects += 1
+            # 重放完成、补发 FinishSession 之前 _resuming 保持为 True，
+            # 期间提交的文本记入 _deferred，streaming_complete 也不会自己发送 FinishSession
+            pending = self._replay.replay()
+            self._deferred = []
+            try:
+                for text in pending:
+                    await self.__replay_text(text)
+                while self._deferred:
+                    await self.__replay_text(self._deferred.pop(0))
+                if self._finishing:
+                    if not self._is_open():
+                        raise websockets.exceptions.ConnectionClosed(None, None)
+                    await self.__send_finish()
+            except websockets.exceptions.ConnectionClosed as e:
+                # 新连接在重放时又断开，等它的消息循环退出后重新连接并从头重放
+                error = e
+                await self.websocket.close()
+                if self.websocket_task is not None:
+                    await asyncio.wait({self.websocket_task})
+                continue
+            self._resuming = False
+            self._resume_task = None
+            return
+
+        self._resuming = False
+        self._resume_task = None
+        if self._is_stopped:
+            # ConnectionFailed / SessionFailed 已经通过 _on_failed 通知
+            return
+        self.callback.on_error(error or Exception("TTS connection is closed"))
+        self._on_closed()
+
+    def _is_open(self) -> bool:
+        return self.websocket is not None and self.websocket.state == State.OPEN
+
+    async def __replay_text(self, text: str):
+        # __send_frame 在连接关闭时什么都不发，重放时要当作断线处理；
+        # 发送后再检查一次，等待发送锁期间连接可能已经断开
+        if not self._is_open():
+            raise websockets.exceptions.ConnectionClosed(None, None)
+        await self.__send_text(text)
+        if not self._is_open():
+            raise websockets.exceptions.ConnectionClosed(None, None)
+
+    async def __wait_for(self, flag: int, timeout: float):
+        """等待状态位 flag，收到 ConnectionFailed / SessionFailed 或连接断开时立即失败"""
+        try:
+            await asyncio.wait_for(self._wait_state(flag | _FAILED), timeout)
+        except asyncio.TimeoutError:
+            pass
+        if self._state & flag:
+            return
+        if self._state & _FAILED:
+            raise Exception(self._failure or "TTS connection is closed")
+        raise asyncio.TimeoutError()
+
+    async def __connect(self):
+        # log_id = self.gen_log_id()
+        headers = {
+            "X-Api-App-Key": self.app_id,
+            "X-Api-Access-Key": self.token,
+            "X-Api-Resource-Id": "volc.service_type.10029",
+            "X-Api-Connect-Id": str(uuid.uuid4()),
+            # "X-Tt-Logid": log_id,
+        }
+        self._clear_state(_CONNECTED | _FAILED)
+        self._failure = None
+        self._closing = False
+        connect_start = time.monotonic()
+        self.websocket = await self.connector.connect(
+            self.url,
+            additional_headers=headers,
+            max_size=self.max_frame_bytes,
+            max_queue=self.max_queue,
+            recv_buffer=self.read_buffer_bytes,
+            write_limit=self.write_limit,
+            compression=self.ws_compression,
+            open_timeout=self.connect_timeout,
+        )
+        connected = time.monotonic()
+        self._connect_phases = self.websocket.connect_times
+        start_request = await self.request.start_connection()
+        await self.__send_event(*start_request)
+
+        self.websocket_task = asyncio.create_task(self._message_loop())
+
+        await self.__wait_for(_CONNECTED, self.connect_timeout)
+        self._connection_times = (connect_start, connected, time.monotonic())
+
+    async def __start_session(self, resume: bool = False):
+        self._clear_state(_SESSION_STARTED | _SESSION_FINISHED | _FAILED)
+        self._failure = None
+        if not resume:
+            self._replay.reset(self.reconnect_retries > 0)
+            self._deferred = []
+            self._reconnect_attempts = 0
+            self._finishing = False
+            if self.alignment is not None:
+                self.alignment.reset(
+                    self.sample_rate * 2 if self.audio_format == "pcm" else None
+                )
+
+        self.session_id = str(uuid.uuid4())
+        self._session_id_bytes = self.session_id.encode()
+        self._encoder.start_session(
+            self.session_id, self.speaker, self.audio_format, self.sample_rate
+        )
+        start_session_request = await self.request.start_session(
+            self.speaker,
+            self.session_id,
+            self.audio_format,
+            self.sample_rate,
+            enable_timestamp=self.alignment is not None,
+        )
+        # 重连后的 session 沿用原来的时间线
+        stats = None if resume else self.stats
+        if stats is not None:
+            stats.session_id = self.session_id
+            stats.session_start_sent = time.monotonic()
+        await self.__send_event(*start_session_request)
+
+        await self.__wait_for(_SESSION_STARTED, self.session_timeout)
+        if stats is not None:
+            stats.session_started = time.monotonic()
+
+    async def connect(self):
+        """建立连接并完成 StartConnection 握手，不开启 session"""
+        async with self._lock:
+            if not self.is_connected:
+                await self.__connect()
 
     async def __start_task(self):
         if self.callback is None:
@@ -323,54 +892,80 @@ class DoubaoTTSClient:
         if self._is_started:
             raise Exception("TTS is already started")
 
+        stats = SessionStats(
+            self.speaker, self.url, self.audio_format, self.sample_rate
+        )
+        self.stats = stats
+        if self.scheduler is not None:
+            await self.scheduler.acquire_session(self.priority)
+            self._holds_slot = True
         try:
-            # log_id = self.gen_log_id()
-            headers = {
-                "X-Api-App-Key": self.app_id,
-                "X-Api-Access-Key": self.token,
-                "X-Api-Resource-Id": "volc.service_type.10029",
-                "X-Api-Connect-Id": str(uuid.uuid4()),
-                # "X-Tt-Logid": log_id,
-            }
-            self.websocket = await websockets.connect(
-                self.url,
-                additional_headers=headers,
-                max_size=1024 * 1024 * 100,
-            )
-            start_request = await self.request.start_connection()
-            await self.__send_event(*start_request)
-
-            self.websocket_task = asyncio.create_task(self._message_loop())
-
-            await asyncio.wait_for(self.start_connection_event.wait(), timeout=5)
-
-            self.session_id = str(uuid.uuid4())
-            start_session_request = await self.request.start_session(
-                self.speaker, self.session_id
-            )
-            await self.__send_event(*start_session_request)
-
-            await asyncio.wait_for(self.start_session_event.wait(), timeout=5)
+            async with self._lock:
+                if not self.is_connected:
+                    await self.__connect()
+                    (
+                        stats.connect_start,
+                        stats.connected,
+                        stats.connection_started,
+                    ) = self._connection_times
+                    stats.set_connect_phases(self._connect_phases)
+                await self.__start_session()
 
             self._is_started = True
+            if self.scheduler is not None:
+                self.scheduler.report_success()
+            for hook in self.hooks:
+                hook.on_session_start(stats)
             if self.callback:
                 self.callback.on_open()
+        except asyncio.CancelledError:
+            self._release_slot()
+            if not self._is_started and self.is_connected:
+                # StartSession 可能已经发出但还没有确认，服务端的 session 状态未知，
+                # 关闭连接，连接池不会再复用它
+                await self.close()
+            raise
         except asyncio.TimeoutError:
+            self._release_slot()
             raise Exception("TTS is not started")
         except Exception as e:
+            self._release_slot()
+            # 握手阶段的 HTTP 429 同样视为限流
+            response = getattr(e, "response", None)
+            if (
+                self.scheduler is not None
+                and getattr(response, "status_code", None) == 429
+            ):
+                self.scheduler.report_throttled()
+            if self._state & _FAILED:
+                # 失败原因已经通过 on_error / on_close 通知，不用再等待超时
+                raise Exception(f"TTS is not started: {e}")
             self.callback.on_error(e)
 
-    async def __send_text(self, speaker: str, text: str, session_id):
-        header = Header(
-            message_type=FULL_CLIENT_REQUEST,
-            message_type_specific_flags=MsgTypeFlagWithEvent,
-            serial_method=JSON,
-        ).as_bytes()
-        optional = Optional(event=EVENT_TaskRequest, sessionId=session_id).as_bytes()
-        payload = self.request.get_payload_bytes(
-            event=EVENT_TaskRequest, text=text, speaker=speaker
-        )
-        return await self.__send_event(header, optional, payload)
+    def _reset_session(self):
+        self._release_slot()
+        self._is_started = False
+        self._is_stopped = False
+        self._is_first = True
+        self._clear_state(_SESSION_STARTED | _SESSION_FINISHED)
+        self._cache_hit = self._cache_text = self._cache_recorded = None
+
+    async def __send_frame(self, frame: bytes):
+        async with self._send_lock:
+            if self.websocket and self.websocket.state == State.OPEN:
+                if self.recorder is not None:
+                    self.recorder.record(self._capture_channel, OUTBOUND, frame)
+                await self.websocket.send(frame)
+
+    async def __send_text(self, text: str):
+        return await self.__send_frame(self._encoder.task_request(text))
+
+    async def __send_finish(self):
+        finish_session_request = await self.request.finish_session(self.session_id)
+        await self.__send_event(*finish_session_request)
+        if not self.keep_alive:
+            finish_connection_request = await self.request.finish_connection()
+            await self.__send_event(*finish_connection_request)
 
     async def __submit_text(self, text: str):
         if not self._is_started:
@@ -379,54 +974,344 @@ class DoubaoTTSClient:
         if self._is_stopped:
             raise Exception("TTS is stopped")
 
-        await self.__send_text(self.speaker, text, self.session_id)
+        if self.scheduler is not None:
+            await self.scheduler.consume(len(text), self.priority)
+        self._replay.sent(text)
+        if self.alignment is not None:
+            self.alignment.add_text(text)
+        if self._resuming:
+            # 重连成功后随未合成完的文本一起重放
+            self._deferred.append(text)
+            return
+        if not self._is_open():
+            # 连接正在关闭，消息循环会发起重连并重放这段文本
+            if not self.reconnect_retries:
+                raise Exception("TTS connection is closed")
+            return
+        try:
+            await self.__send_text(text)
+        except websockets.exceptions.ConnectionClosed:
+            if not self.reconnect_retries:
+                raise
+
+    def __lookup_cache(self, text: str) -> bool:
+        """回调模式下第一段文本命中缓存时返回 True，session 推迟到 streaming_complete"""
+        if self.cache is None or self._stream is not None:
+            return False
+        cached = self.cache.get(
+            cache_key(self.speaker, text, self.audio_format, self.sample_rate)
+        )
+        if cached is None:
+            self._cache_text = []
+            self._cache_recorded = []
+            self._cache_bytes = 0
+            return False
+        self._cache_hit = cached
+        self._cache_text = [text]
+        return True
+
+    def __record(self, chunk: StreamChunk):
+        self._cache_recorded.append(chunk)
+        self._cache_bytes += len(chunk.data)
+        if self._cache_bytes > self.cache.max_entry_bytes:
+            # 超过缓存的单条上限，写入时也会被丢弃，不再继续占用内存
+            self._cache_recorded = None
+
+    def __replay_cache(self, chunks: list[StreamChunk]):
+        completed = False
+        for chunk in chunks:
+            if chunk.kind == AUDIO:
+                self.callback.on_data(bytes(chunk.data))
+            elif chunk.kind == SENTENCE_START:
+                if SENTENCE_START in self.events:
+                    self.callback.on_sentence(chunk.data)
+            else:
+                if SENTENCE_END in self.events:
+                    self.callback.on_sentence(chunk.data)
+                self.callback.on_complete()
+                completed = True
+        if not completed:
+            # 缓存中没有句子结束事件（例如由未订阅 SENTENCE_END 的 synthesize() 写入）
+            self.callback.on_complete()
 
     async def streaming_call(self, text: str):
+        if self._cache_hit is not None:
+            # 又有新的文本，完整文本与缓存的不同，改走网络并记录
+            text = "".join(self._cache_text) + text
+            self._cache_hit = None
+            self._cache_text = []
+            self._cache_recorded = []
+            self._cache_bytes = 0
+        elif self._is_first and self.__lookup_cache(text):
+            return
+
         if self._is_first:
             self._is_first = False
             await self.__start_task()
 
+        if self._cache_text is not None:
+            self._cache_text.append(text)
         await self.__submit_text(text)
 
+    async def __feed(self, text, stream: ChunkQueue):
+        try:
+            if isinstance(text, str):
+                await self.streaming_call(text)
+            else:
+                async for delta in text:
+                    await self.streaming_call(delta)
+            await self.streaming_complete()
+        except Exception as e:
+            stream.finish(e)
+
+    async def synthesize(
+        self,
+        text,
+        max_buffer_bytes: int = 256 * 1024,
+        segmenter: TextSegmenter | None = None,
+        output_sample_rate: int | None = None,
+    ):
+        """async for chunk in client.synthesize(text): ...
+
+        text 可以是字符串或文本片段的异步迭代器。产出 StreamChunk，
+        缓冲超过 max_buffer_bytes 时暂停读取 socket，由消费端控制节奏。
+        传入 segmenter 时，异步文本流先合并成按标点切分的文本块再发送。
+        传入 output_sample_rate 时 PCM 音频逐块重采样到该采样率后产出。
+        """
+        chunks = self.__synthesize(text, max_buffer_bytes, segmenter)
+        if output_sample_rate is None or output_sample_rate == self.sample_rate:
+            async with contextlib.aclosing(chunks) as chunks:
+                async for chunk in chunks:
+                    yield chunk
+            return
+        if self.audio_format != "pcm":
+            await chunks.aclose()
+            raise Exception("output_sample_rate requires pcm audio_format")
+
+        resampler = StreamResampler(self.sample_rate, output_sample_rate)
+        async with contextlib.aclosing(chunks) as chunks:
+            async for chunk in chunks:
+                if chunk.kind != AUDIO:
+                    yield chunk
+                    continue
+                data = resampler.feed(chunk.data)
+                if data:
+                    yield StreamChunk(AUDIO, data)
+        # 滤波器延迟的最后几毫秒音频在结束时输出
+        data = resampler.finish()
+        if data:
+            yield StreamChunk(AUDIO, data)
+
+    async def __synthesize(
+        self, text, max_buffer_bytes: int, segmenter: TextSegmenter | None
+    ):
+        if self._stream is not None:
+            raise Exception("TTS is already started")
+        if self.callback is None:
+            self.callback = ResultCallback()
+        if segmenter is not None and not isinstance(text, str):
+            text = segmenter.segment(text)
+
+        if self.cache is None or not isinstance(text, str):
+            async with contextlib.aclosing(
+                self.__stream(text, max_buffer_bytes)
+            ) as chunks:
+                async for chunk in chunks:
+                    yield chunk
+            return
+
+        key = cache_key(self.speaker, text, self.audio_format, self.sample_rate)
+        cached = self.cache.get(key)
+        if cached is not None:
+            for chunk in cached:
+                # 回调模式写入的缓存可能包含未订阅的句子事件
+                if chunk.kind == AUDIO or chunk.kind in self.events:
+                    yield chunk
+            return
+
+        recorded = []
+        size = 0
+        async with contextlib.aclosing(self.__stream(text, max_buffer_bytes)) as chunks:
+            async for chunk in chunks:
+                if recorded is not None:
+                    # 音频是指向原始帧的 memoryview，入缓存前需要复制
+                    recorded.append(
+                        StreamChunk(chunk.kind, bytes(chunk.data))
+                        if chunk.kind == AUDIO
+                        else chunk
+                    )
+                    size += len(chunk.data)
+                    if size > self.cache.max_entry_bytes:
+                        recorded = None
+                yield chunk
+        if recorded is not None:
+            self.cache.put(key, recorded)
+
+    async def __stream(self, text, max_buffer_bytes: int):
+        stream = ChunkQueue(max_buffer_bytes)
+        self._stream = stream
+        feeder = asyncio.create_task(self.__feed(text, stream))
+        try:
+            while True:
+                chunk = await stream.get()
+                if chunk is None:
+                    break
+                yield chunk
+            await feeder
+        finally:
+            stream.close()
+            if not feeder.done():
+                feeder.cancel()
+                try:
+                    await feeder
+                except asyncio.CancelledError:
+                    pass
+            self._stream = None
+            if self._is_started or self._is_stopped:
+                try:
+                    await self.streaming_cancel()
+                except Exception:
+                    pass
+
     async def streaming_complete(self):
-        if not self._is_started:
-            raise Exception("TTS is not started")
+        if self._cache_hit is not None:
+            chunks = self._cache_hit
+            self._reset_session()
+            self.__replay_cache(chunks)
+            return
 
+        # SessionFailed 会清掉 _is_started，先处理 _is_stopped，keep_alive 连接才能开始下一个 session
         if self._is_stopped:
+            if self.keep_alive:
+                self._reset_session()
             raise Exception("TTS is stopped")
 
-        finish_session_request = await self.request.finish_session(self.session_id)
-        await self.__send_event(*finish_session_request)
-
-        finish_connection_request = await self.request.finish_connection()
-        await self.__send_event(*finish_connection_request)
+        if not self._is_started:
+            raise Exception("TTS is not started")
 
-        await self.complete_event.wait()
+        self._finishing = True
+        if not self._resuming:
+            try:
+                await self.__send_finish()
+            except websockets.exceptions.ConnectionClosed:
+                # 重连成功后由 _resume() 补发
+                if not self.reconnect_retries:
+                    raise
+
+        if not await self.__wait_finished():
+            # 服务端没有结束 session，这条连接不能再复用
+            await self.close()
+            if self.keep_alive:
+                self._reset_session()
+            else:
+                self._is_stopped = True
+                self._is_started = False
+            raise Exception("TTS session is not finished")
+        stats = self.stats
+        # 非 keep_alive 时连接随后就会断开，以 session 统计判断是否成功结束
+        if (
+            self._cache_recorded is not None
+            and stats is not None
+            and stats.finished is not None
+            and not stats.failed
+        ):
+            self.cache.put(
+                cache_key(
+                    self.speaker,
+                    "".join(self._cache_text),
+                    self.audio_format,
+                    self.sample_rate,
+                ),
+                self._cache_recorded,
+            )
+        self._cache_text = self._cache_recorded = None
+        if self.keep_alive:
+            self._reset_session()
+            return
 
         await self.close()
         self._is_stopped = True
         self._is_started = False
 
+    async def __wait_finished(self) -> bool:
+        """等待 SessionFinished，超过 finish_timeout 没有任何进展时返回 False"""
+        while True:
+            try:
+                await asyncio.wait_for(
+                    self._wait_state(_SESSION_FINISHED), timeout=self.finish_timeout
+                )
+                return True
+            except asyncio.TimeoutError:
+                pass
+            # 仍在收音频、正在重连，或消费端跟不上暂停了读取 socket 时继续等待
+            last_audio = self.stats.last_audio if self.stats is not None else None
+            stream = self._stream
+            if (
+                self._resuming
+                or (
+                    last_audio is not None
+                    and time.monotonic() - last_audio < self.finish_timeout
+                )
+                or (stream is not None and stream.buffered_bytes >= stream.max_bytes)
+            ):
+                continue
+            return False
+
     async def streaming_cancel(self):
-        if not self._is_started:
-            raise Exception("TTS is not started")
+        if self._cache_hit is not None:
+            self._reset_session()
+            return
 
         if self._is_stopped:
+            if self.keep_alive:
+                self._reset_session()
             return
 
+        if not self._is_started:
+            raise Exception("TTS is not started")
+
+        if self._resuming:
+            # 放弃重连，直接结束
+            await self.close()
+
         finish_session_request = await self.request.finish_session(self.session_id)
         await self.__send_event(*finish_session_request)
 
+        if self.keep_alive:
+            try:
+                await asyncio.wait_for(
+                    self._wait_state(_SESSION_FINISHED), timeout=self.finish_timeout
+                )
+            except asyncio.TimeoutError:
+                # 服务端没有结束 session，这条连接不能再复用
+                await self.close()
+            self._reset_session()
+            return
+
         finish_connection_request = await self.request.finish_connection()
         await self.__send_event(*finish_connection_request)
 
         await self.close()
         self._is_stopped = True
         self._is_started = False
-        self.start_connection_event.set()
-        self.complete_event.set()
+        self._set_state(_CONNECTED | _SESSION_FINISHED)
 
     async def close(self):
+        self._closing = True
+        resume_task = self._resume_task
+        if resume_task is not None and resume_task is not asyncio.current_task():
+            self._resume_task = None
+            self._resuming = False
+            resume_task.cancel()
+            try:
+                await resume_task
+            except asyncio.CancelledError:
+                pass
+            if self.websocket_task is None:
+                self._on_closed()
+        if self.keep_alive and self.websocket and self.websocket.state == State.OPEN:
+            finish_connection_request = await self.request.finish_connection()
+            await self.__send_event(*finish_connection_request)
         if self.websocket and self.websocket.state == State.OPEN:
             await self.websocket.close()
         if self.websocket_task:
@@ -0,0 +1,204 @@
+"""句子事件与音频-文本对齐。
+
+TTSSentenceStart / TTSSentenceEnd 的 payload 是 JSON，大部分调用方并不关心。
+SentenceEvent 只保存原始字节，访问 text / words 时才解码和解析；
+客户端的 events 参数决定订阅哪些事件，没有订阅的事件读完 header 就丢弃：
+
+    client = DoubaoTTSClient(..., events={SENTENCE_END}, alignment=True)
+    async for chunk in client.synthesize(text):
+        if chunk.kind == SENTENCE_END:
+            for word in chunk.data.words:
+                print(word.word, word.start, word.end)
+    sentence = client.alignment.find(audio_offset)  # 播放到第 audio_offset 字节时的句子
+
+开启 alignment 时会在 StartSession 中请求 enable_timestamp，服务端在 TTSSentenceEnd 中返回逐字时间戳。
+"""
+
+import bisect
+import json
+
+from .stream import SENTENCE_END, SENTENCE_START
+
+# 除句子以外的其他服务端事件，交给 ResultCallback.on_event
+OTHER = "event"
+
+ALL_EVENTS = frozenset({SENTENCE_START, SENTENCE_END, OTHER})
+
+
+class WordTiming:
+    __slots__ = ("word", "start", "end")
+
+    def __init__(self, word: str, start: float, end: float):
+        self.word = word
+        # 相对句子开始的秒数
+        self.start = start
+        self.end = end
+
+    def __repr__(self):
+        return f"WordTiming({self.word!r}, {self.start:.3f}, {self.end:.3f})"
+
+
+class SentenceEvent:
+    """惰性解析的句子事件，len() 为原始 payload 的字节数，str() 为原始 JSON"""
+
+    __slots__ = ("kind", "payload", "_json")
+
+    def __init__(self, kind: str, payload: bytes):
+        self.kind = kind
+        self.payload = payload
+        self._json = None
+
+    def __len__(self):
+        return len(self.payload)
+
+    def __str__(self):
+        return self.raw
+
+    def __repr__(self):
+        return f"SentenceEvent({self.kind!r}, {len(self.payload)} bytes)"
+
+    @property
+    def raw(self) -> str:
+        return str(self.payload, "utf8")
+
+    @property
+    def json(self) -> dict:
+        if self._json is None:
+            try:
+                value = json.loads(self.payload) if self.payload else {}
+            except ValueError:
+                value = {}
+            self._json = value if isinstance(value, dict) else {}
+        return self._json
+
+    @property
+    def text(self) -> str:
+        data = self.json
+        text = data.get("text")
+        if text is None:
+            params = data.get("res_params")
+            if isinstance(params, dict):
+                text = params.get("text")
+        return text if isinstance(text, str) else ""
+
+    @property
+    def words(self) -> list[WordTiming]:
+        words = []
+        for item in self.json.get("words") or []:
+            try:
+                words.append(
+                    WordTiming(
+                        item["word"], float(item["startTime"]), float(item["endTime"])
+                    )
+                )
+            except (KeyError, TypeError, ValueError):
+                continue
+        return words
+
+
+class AlignedSentence:
+    __slots__ = ("text", "char_start", "char_end", "audio_start", "audio_end", "words")
+
+    def __init__(self, text, char_start, char_end, audio_start, audio_end, words):
+        self.text = text
+        # 在 session 提交的全部文本中的位置，无法定位时为 None
+        self.char_start = char_start
+        self.char_end = char_end
+        # 在 session 音频中的字节范围 [audio_start, audio_end)
+        self.audio_start = audio_start
+        self.audio_end = audio_end
+        self.words = words
+
+    def __repr__(self):
+        return (
+            f"AlignedSentence({self.text!r}, chars {self.char_start}-{self.char_end}, "
+            f"audio {self.audio_start}-{self.audio_end})"
+        )
+
+
+class AlignmentIndex:
+    """一个 session 内音频字节偏移到文本位置的索引。
+
+    合成过程中只记录每句的音频范围和未解析的 SentenceEvent，第一次查询时才解析 JSON。
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self, bytes_per_second: int | None = None):
+        # PCM 时每秒的字节数，用于把逐字时间戳换算成字节偏移；压缩格式为 None
+        self.bytes_per_second = bytes_per_second
+        self.audio_bytes = 0
+        self._text: list[str] = []
+        self._sentence_start: int | None = None
+        self._pending: list[tuple[int, int, SentenceEvent]] = []
+        self._sentences: list[AlignedSentence] = []
+        self._starts: list[int] = []
+        self._search_from = 0
+
+    def add_text(self, text: str):
+        self._text.append(text)
+
+    def audio(self, size: int):
+        self.audio_bytes += size
+
+    def sentence_start(self):
+        self._sentence_start = self.audio_bytes
+
+    def sentence_end(self, event: SentenceEvent):
+        start = self._sentence_start
+        if start is None:
+            start = self._pending[-1][1] if self._pending else self._last_end()
+        self._pending.append((start, self.audio_bytes, event))
+        self._sentence_start = None
+
+    def _last_end(self) -> int:
+        return self._sentences[-1].audio_end if self._sentences else 0
+
+    def _resolve(self):
+        if not self._pending:
+            return
+        source = "".join(self._text)
+        self._text = [source]
+        for start, end, event in self._pending:
+            text = event.text.strip()
+            index = source.find(text, self._search_from) if text else -1
+            if index >= 0:
+                char_start, char_end = index, index + len(text)
+                self._search_from = char_end
+            else:
+                char_start = char_end = None
+            self._sentences.append(
+                AlignedSentence(text, char_start, char_end, start, end, event.words)
+            )
+            self._starts.append(start)
+        self._pending = []
+
+    @property
+    def sentences(self) -> list[AlignedSentence]:
+        self._resolve()
+        return self._sentences
+
+    def find(self, audio_offset: int) -> AlignedSentence | None:
+        """返回 audio_offset 处的句子"""
+        self._resolve()
+        index = bisect.bisect_right(self._starts, audio_offset) - 1
+        if index < 0:
+            return None
+        sentence = self._sentences[index]
+        if audio_offset >= sentence.audio_end:
+            return None
+        return sentence
+
+    def word_at(self, audio_offset: int) -> WordTiming | None:
+        """返回 audio_offset 处的字，需要 PCM 音频和服务端返回的时间戳"""
+        if not self.bytes_per_second:
+            return None
+        sentence = self.find(audio_offset)
+        if sentence is None:
+            return None
+        seconds = (audio_offset - sentence.audio_start) / self.bytes_per_second
+        for word in sentence.words:
+            if word.start <= seconds < word.end:
+                return word
+        return None
@@ -0,0 +1,237 @@
+"""把合成的音频写入文件，不在事件循环里做磁盘 I/O。
+
+音频块先攒成批（batch_bytes），整批用 os.writev 在线程池中写入，同一文件同时最多一次写入在进行，
+写盘跟不上时 write() 等待上一批完成，按文件反压而不是阻塞整个事件循环。
+音频块不拷贝，直接以 memoryview 交给 writev。
+
+WAV 文件开头先写一个长度未知的文件头（多数播放器可以边写边播），关闭时再回填实际长度：
+
+    async with AudioFileSink("output.wav", sample_rate=24000) as sink:
+        async for chunk in client.synthesize(text):
+            if chunk.kind == "audio":
+                await sink.write(chunk.data)
+
+回调模式下在 on_data 中调用 sink.write_nowait(data)，最后 await sink.close()。
+
+fsync 策略：never 交给操作系统；close 在关闭时 fsync 一次（默认）；batch 每批写入后 fsync。
+"""
+
+import asyncio
+import os
+import struct
+
+from .audio import wav_header
+from .stream import AUDIO
+
+FSYNC_NEVER = "never"
+FSYNC_CLOSE = "close"
+FSYNC_BATCH = "batch"
+
+# 长度未知时的 RIFF / data 长度，写完后回填
+_UNKNOWN_SIZE = 0xFFFFFFFF
+
+# 一次 writev 最多的块数（Linux / macOS 的 IOV_MAX）
+_IOV_MAX = 1024
+
+
+def _streaming_wav_header(sample_rate: int, channels: int) -> bytes:
+    header = bytearray(wav_header(0, sample_rate, channels))
+    struct.pack_into("<I", header, 4, _UNKNOWN_SIZE)
+    struct.pack_into("<I", header, 40, _UNKNOWN_SIZE)
+    return bytes(header)
+
+
+def _writev(fd: int, chunks: list, fsync: bool) -> int:
+    written = 0
+    while chunks:
+        batch = chunks[:_IOV_MAX]
+        if hasattr(os, "writev"):
+            size = os.writev(fd, batch)
+        else:
+            size = os.write(fd, b"".join(batch))
+        written += size
+        # 处理部分写入：跳过已写完的块，截掉写了一半的块
+        rest = []
+        for chunk in chunks:
+            if size >= len(chunk):
+                size -= len(chunk)
+            elif size:
+                rest.append(memoryview(chunk)[size:])
+                size = 0
+            else:
+                rest.append(chunk)
+        chunks = rest
+    if fsync:
+        os.fsync(fd)
+    return written
+
+
+def _finalize(fd: int, header: bytes | None, fsync: bool):
+    try:
+        if header is not None:
+            os.pwrite(fd, header, 0)
+        if fsync:
+            os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class AudioFileSink:
+    def __init__(
+        self,
+        path: str,
+        sample_rate: int = 24000,
+        channels: int = 1,
+        wav: bool | None = None,
+        batch_bytes: int = 256 * 1024,
+        fsync: str = FSYNC_CLOSE,
+        executor=None,
+    ):
+        if fsync not in (FSYNC_NEVER, FSYNC_CLOSE, FSYNC_BATCH):
+            raise Exception(f"unknown fsync policy: {fsync}")
+        self.path = path
+        self.sample_rate = sample_rate
+        self.channels = channels
+        # 默认按扩展名决定是否写 WAV 头，音频需要是 16 bit PCM
+        self.wav = path.endswith(".wav") if wav is None else wav
+        self.batch_bytes = batch_bytes
+        self.fsync = fsync
+        self.executor = executor
+
+        self._fd: int | None = None
+        self._opening: asyncio.Task | None = None
+        self._chunks: list = []
+        self._buffered = 0
+        # 正在写入的一批，写完之前不提交下一批，保证顺序
+        self._writing: asyncio.Future | None = None
+        self._closed = False
+        self._error: BaseException | None = None
+
+        self.audio_bytes = 0
+        self.writes = 0
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor, func, *args
+        )
+
+    def _open_file(self) -> int:
+        fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        if self.wav:
+            try:
+                os.write(fd, _streaming_wav_header(self.sample_rate, self.channels))
+            except BaseException:
+                os.close(fd)
+                raise
+        return fd
+
+    async def open(self):
+        if self._fd is None:
+            if self._opening is None:
+                self._opening = asyncio.ensure_future(self._run(self._open_file))
+            self._fd = await asyncio.shield(self._opening)
+
+    async def _flush_batch(self, chunks: list):
+        await self.open()
+        self.writes += 1
+        await self._run(_writev, self._fd, chunks, self.fsync == FSYNC_BATCH)
+
+    def _submit(self):
+        # 上一批写完后调用，提交当前缓冲
+        chunks, self._chunks, self._buffered = self._chunks, [], 0
+        self._writing = asyncio.ensure_future(self._flush_batch(chunks))
+        self._writing.add_done_callback(self._on_written)
+
+    def _on_written(self, future: asyncio.Future):
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None and self._error is None:
+            self._error = error
+
+    def _append(self, data):
+        if self._closed:
+            raise Exception("file sink is closed")
+        if self._error is not None:
+            raise self._error
+        if not data:
+            return
+        self._chunks.append(data)
+        self._buffered += len(data)
+        self.audio_bytes += len(data)
+
+    async def write(self, data):
+        """data 在写入之前不能被修改（synthesize() 产出的 memoryview 指向只读的帧）"""
+        self._append(data)
+        if self._buffered < self.batch_bytes:
+            return
+        if self._writing is not None:
+            # 调用方被取消时不能中断进行中的写入
+            await asyncio.shield(self._writing)
+        if self._error is not None:
+            raise self._error
+        self._submit()
+
+    def write_nowait(self, data):
+        """在同步回调（例如 on_data）中使用，不做反压；上一批还在写时继续缓冲"""
+        self._append(data)
+        if self._buffered >= self.batch_bytes and (
+            self._writing is None or self._writing.done()
+        ):
+            self._submit()
+
+    async def flush(self):
+        while self._writing is not None and not self._writing.done():
+            await asyncio.shield(self._writing)
+        if self._chunks and self._error is None:
+            self._submit()
+            await asyncio.shield(self._writing)
+        if self._error is not None:
+            raise self._error
+
+    async def close(self):
+        """写完剩余音频，回填 WAV 长度，按策略 fsync 后关闭文件"""
+        if self._closed:
+            return
+        try:
+            await self.flush()
+            await self.open()
+        finally:
+            self._closed = True
+            fd, self._fd = self._fd, None
+            if fd is not None:
+                header = None
+                if self.wav and self._error is None:
+                    header = wav_header(
+                        self.audio_bytes, self.sample_rate, self.channels
+                    )
+                await self._run(
+                    _finalize,
+                    fd,
+                    header,
+                    self.fsync != FSYNC_NEVER and self._error is None,
+                )
+
+    async def write_stream(self, chunks) -> int:
+        """把 synthesize() 产出的音频写入文件，返回音频字节数"""
+        async for chunk in chunks:
+            if chunk.kind == AUDIO:
+                await self.write(chunk.data)
+        return self.audio_bytes
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            # 写入失败的文件不需要落盘
+            self.fsync = FSYNC_NEVER
+        await self.close()
+
+    def stats(self) -> dict:
+        return {
+            "audio_bytes": self.audio_bytes,
+            "writes": self.writes,
+            "buffered_bytes": self._buffered,
+        }
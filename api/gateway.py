@@ -0,0 +1,370 @@
+"""内部 TTS 网关：一个不依赖 web 框架的 ASGI 应用。
+
+各业务服务只需要 HTTP 调用网关，不再各自持有火山引擎密钥和 websocket 连接。
+网关在 DoubaoTTSPool 上复用长连接，按租户限制并发，收到首个音频帧就开始回传：
+
+    POST /v1/tts?speaker=...&format=pcm&sample_rate=24000
+    X-Tenant-Id: order-service
+    Content-Type: text/plain        # 请求体可以分块上传，边收边合成
+
+    -> 200 chunked 音频；Accept: text/event-stream 时返回 SSE 事件
+    GET /healthz -> 连接池状态
+
+uvicorn api.gateway:app 或 python -m api.gateway --port 8080 启动（需要安装 uvicorn）。
+"""
+
+import asyncio
+import base64
+import codecs
+import contextlib
+import json
+import os
+from urllib.parse import parse_qs
+
+from .pool import DoubaoTTSPool
+from .segmenter import TextSegmenter
+from .stream import AUDIO
+
+_CONTENT_TYPES = {"pcm": "audio/pcm", "mp3": "audio/mpeg", "ogg_opus": "audio/ogg"}
+
+
+class _HTTPError(Exception):
+    def __init__(self, status: int, message: str, headers=()):
+        super().__init__(message)
+        self.status = status
+        self.headers = list(headers)
+
+
+class _ClientWatch:
+    """请求体读完之后继续读 receive()，在客户端断开时返回，用来及时取消上游 session"""
+
+    def __init__(self, receive):
+        self.receive = receive
+        self.body_done = asyncio.Event()
+        self.disconnected = asyncio.Event()
+
+    async def wait(self):
+        # 分块上传时请求体由 _text_stream 读取，读完之前不能在这里并发 receive()
+        await self.body_done.wait()
+        while not self.disconnected.is_set():
+            message = await self.receive()
+            if message["type"] == "http.disconnect":
+                self.disconnected.set()
+
+
+class TTSGateway:
+    def __init__(
+        self,
+        pool: DoubaoTTSPool,
+        tenant_limit: int = 16,
+        tenant_limits: dict[str, int] | None = None,
+        tenant_header: str = "x-tenant-id",
+        max_text_bytes: int = 1024 * 1024,
+    ):
+        self.pool = pool
+        # 每个租户同时进行的合成数，超出时直接返回 429，不在网关排队
+        self.tenant_limit = tenant_limit
+        self.tenant_limits = tenant_limits or {}
+        self.tenant_header = tenant_header.lower().encode()
+        self.max_text_bytes = max_text_bytes
+        self._active: dict[str, int] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            return await self._lifespan(receive, send)
+        if scope["type"] != "http":
+            return
+
+        try:
+            if scope["path"] == "/healthz":
+                return await self._health(send)
+            if scope["path"] != "/v1/tts":
+                raise _HTTPError(404, "not found")
+            if scope["method"] != "POST":
+                raise _HTTPError(405, "method not allowed")
+            await self._tts(scope, receive, send)
+        except _HTTPError as e:
+            await self._send_json(send, e.status, {"error": str(e)}, e.headers)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    await self.pool.start()
+                except Exception as e:
+                    await send({"type": "lifespan.startup.failed", "message": str(e)})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.pool.close()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    @staticmethod
+    async def _send_json(send, status: int, body: dict, headers=()):
+        data = json.dumps(body, ensure_ascii=False).encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(data)).encode()),
+                    *headers,
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": data})
+
+    async def _health(self, send):
+        closed = self.pool._closed
+        await self._send_json(
+            send,
+            503 if closed else 200,
+            {
+                "status": "closed" if closed else "ok",
+                "connections": self.pool.size,
+                "idle": self.pool.idle,
+                "active": dict(self._active),
+                "last_connect_error": (
+                    str(self.pool.last_connect_error)
+                    if self.pool.last_connect_error
+                    else None
+                ),
+            },
+        )
+
+    @contextlib.contextmanager
+    def _tenant_slot(self, tenant: str):
+        limit = self.tenant_limits.get(tenant, self.tenant_limit)
+        active = self._active.get(tenant, 0)
+        if active >= limit:
+            raise _HTTPError(
+                429, "too many concurrent requests", [(b"retry-after", b"1")]
+            )
+        self._active[tenant] = active + 1
+        try:
+            yield
+        finally:
+            self._active[tenant] -= 1
+            if not self._active[tenant]:
+                del self._active[tenant]
+
+    async def _read_body(self, receive) -> bytes | None:
+        body = bytearray()
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return None
+            body += message.get("body", b"")
+            if len(body) > self.max_text_bytes:
+                raise _HTTPError(413, "request body too large")
+            if not message.get("more_body"):
+                return bytes(body)
+
+    async def _text_stream(self, watch: _ClientWatch, first: bytes):
+        # 分块上传：边收请求体边发送给上游，按 UTF-8 增量解码避免截断多字节字符
+        decoder = codecs.getincrementaldecoder("utf-8")("replace")
+        received = len(first)
+        try:
+            text = decoder.decode(first)
+            if text:
+                yield text
+            while True:
+                message = await watch.receive()
+                if message["type"] == "http.disconnect":
+                    watch.disconnected.set()
+                    return
+                chunk = message.get("body", b"")
+                received += len(chunk)
+                if received > self.max_text_bytes:
+                    raise _HTTPError(413, "request body too large")
+                more = message.get("more_body", False)
+                text = decoder.decode(chunk, final=not more)
+                if text:
+                    yield text
+                if not more:
+                    return
+        finally:
+            watch.body_done.set()
+
+    async def _tts(self, scope, receive, send):
+        headers = dict(scope["headers"])
+        query = {k: v[-1] for k, v in parse_qs(scope["query_string"].decode()).items()}
+        tenant = headers.get(self.tenant_header, b"default").decode()
+        sse = b"text/event-stream" in headers.get(b"accept", b"")
+        try:
+            length = int(headers.get(b"content-length", 0))
+        except ValueError:
+            raise _HTTPError(400, "invalid content-length")
+        if length > self.max_text_bytes:
+            raise _HTTPError(413, "request body too large")
+
+        first = await receive()
+        if first["type"] == "http.disconnect":
+            return
+        watch = _ClientWatch(receive)
+        if headers.get(b"content-type", b"").startswith(b"application/json"):
+            body = first.get("body", b"")
+            if first.get("more_body"):
+                rest = await self._read_body(receive)
+                if rest is None:
+                    return
+                body += rest
+            try:
+                request = json.loads(body)
+                text = request["text"]
+                if not isinstance(text, str):
+                    raise TypeError(text)
+            except (ValueError, KeyError, TypeError):
+                raise _HTTPError(400, "expected JSON body with a text field")
+            query.update({k: v for k, v in request.items() if k != "text"})
+        elif first.get("more_body"):
+            text = TextSegmenter().segment(
+                self._text_stream(watch, first.get("body", b""))
+            )
+        else:
+            text = first.get("body", b"").decode("utf-8", "replace")
+        if isinstance(text, str):
+            watch.body_done.set()
+        if isinstance(text, str) and not text.strip():
+            raise _HTTPError(400, "empty text")
+
+        audio_format = query.get("format") or self.pool.audio_format
+        try:
+            sample_rate = int(query.get("sample_rate") or self.pool.sample_rate)
+        except ValueError:
+            raise _HTTPError(400, "invalid sample_rate")
+
+        with self._tenant_slot(tenant):
+            try:
+                client = await self.pool.acquire(
+                    speaker=query.get("speaker"),
+                    audio_format=audio_format,
+                    sample_rate=sample_rate,
+                )
+            except Exception as e:
+                raise _HTTPError(503, f"no upstream connection: {e}")
+            try:
+                async with contextlib.aclosing(client.synthesize(text)) as chunks:
+                    responding = asyncio.create_task(
+                        self._respond(send, chunks, audio_format, sample_rate, sse)
+                    )
+                    watcher = asyncio.create_task(watch.wait())
+                    try:
+                        await asyncio.wait(
+                            {responding, watcher}, return_when=asyncio.FIRST_COMPLETED
+                        )
+                    finally:
+                        # 客户端断开时取消合成，尽快归还上游连接和租户配额
+                        watcher.cancel()
+                        if not responding.done():
+                            responding.cancel()
+                        await asyncio.wait({responding, watcher})
+                    if not responding.cancelled():
+                        responding.result()
+            finally:
+                await self.pool.release(client)
+
+    async def _respond(self, send, chunks, audio_format, sample_rate, sse):
+        started = False
+
+        async def start():
+            nonlocal started
+            started = True
+            content_type = (
+                "text/event-stream"
+                if sse
+                else _CONTENT_TYPES.get(audio_format, "application/octet-stream")
+            )
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": 200,
+                    "headers": [
+                        (b"content-type", content_type.encode()),
+                        (b"cache-control", b"no-cache"),
+                        (b"x-sample-rate", str(sample_rate).encode()),
+                    ],
+                }
+            )
+
+        try:
+            async for chunk in chunks:
+                if sse:
+                    data = (
+                        base64.b64encode(chunk.data).decode()
+                        if chunk.kind == AUDIO
+                        else str(chunk.data)
+                    )
+                    body = f"event: {chunk.kind}\ndata: {data}\n\n".encode()
+                elif chunk.kind == AUDIO:
+                    body = chunk.data
+                else:
+                    continue
+                # 收到首个数据块才发响应头，之前的上游错误仍然可以返回 502
+                if not started:
+                    await start()
+                await send(
+                    {"type": "http.response.body", "body": body, "more_body": True}
+                )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if not started:
+                if isinstance(e, _HTTPError):
+                    # 分块上传超过 max_text_bytes 等请求错误，原样返回
+                    raise
+                raise _HTTPError(502, f"upstream error: {e}")
+            if not sse:
+                # 响应头已经发出，中断连接，不让截断的音频看起来像完整结果
+                raise Exception(f"response aborted: {e}")
+            body = f"event: error\ndata: {json.dumps(str(e))}\n\n".encode()
+            await send({"type": "http.response.body", "body": body, "more_body": True})
+        if not started:
+            await start()
+        await send({"type": "http.response.body", "body": b""})
+
+
+def _pool_from_env() -> DoubaoTTSPool:
+    return DoubaoTTSPool(
+        os.environ.get("DOUBAO_UID", ""),
+        os.environ.get("DOUBAO_APP_ID", ""),
+        os.environ.get("DOUBAO_TOKEN", ""),
+        os.environ.get(
+            "DOUBAO_URL", "wss://openspeech.bytedance.com/api/v3/tts/bidirection"
+        ),
+        os.environ.get("DOUBAO_SPEAKER", "zh_female_wanwanxiaohe_moon_bigtts"),
+        min_size=int(os.environ.get("DOUBAO_MIN_CONNECTIONS", "2")),
+        max_size=int(os.environ.get("DOUBAO_MAX_CONNECTIONS", "64")),
+    )
+
+
+def __getattr__(name):
+    # uvicorn api.gateway:app：第一次访问时按环境变量创建，导入模块本身不会读取配置
+    if name == "app":
+        app = TTSGateway(
+            _pool_from_env(),
+            tenant_limit=int(os.environ.get("DOUBAO_TENANT_LIMIT", "16")),
+        )
+        globals()["app"] = app
+        return app
+    raise AttributeError(name)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="豆包 TTS HTTP 网关")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    uvicorn.run("api.gateway:app", host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""对冲请求：首个音频迟迟不到时，在另一条连接上发起同一段合成，用先出声的那一路。
+
+首包延迟的长尾通常来自个别连接或服务端实例，偶尔多占用一个 session 换取尾延迟下降。
+等待阈值可以固定，也可以按最近的首包延迟分位数学习。学习用的是第一路自己的首包延迟：
+对冲赢了时在后台继续等第一路最多 sample_timeout 秒，超时按已等待的时间记一个下界。
+只记录胜出一路的延迟会让样本偏小，阈值越学越小：
+
+    hedger = HedgedSynthesizer(pool, delay=0.5, percentile=0.95)
+    async for chunk in hedger.synthesize("您好，欢迎致电。"):
+        ...
+    hedger.stats()  # {"requests": ..., "hedged": ..., "hedge_wins": ..., ...}
+
+落后的一路走连接池归还时的 streaming_cancel（FinishSession）结束。
+只支持字符串文本：异步文本流无法在第二条连接上重放。
+"""
+
+import asyncio
+from collections import deque
+
+from .pool import DoubaoTTSPool
+from .stream import AUDIO
+
+
+class HedgedSynthesizer:
+    def __init__(
+        self,
+        pool: DoubaoTTSPool,
+        delay: float = 0.5,
+        percentile: float | None = None,
+        window: int = 200,
+        min_samples: int = 20,
+        min_delay: float = 0.05,
+        max_buffer_bytes: int = 256 * 1024,
+        sample_timeout: float = 5.0,
+    ):
+        self.pool = pool
+        # 固定阈值；设置 percentile 时在样本不足 min_samples 之前使用
+        self.delay = delay
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.max_buffer_bytes = max_buffer_bytes
+        self.sample_timeout = sample_timeout
+        self._latencies: deque[float] = deque(maxlen=window)
+        self._cleanup: set[asyncio.Task] = set()
+
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    @property
+    def threshold(self) -> float:
+        """发起第二路请求前等待首个音频的时间"""
+        count = len(self._latencies)
+        if self.percentile is None or count < self.min_samples:
+            return self.delay
+        latencies = sorted(self._latencies)
+        index = min(count - 1, int(self.percentile * count))
+        return max(self.min_delay, latencies[index])
+
+    async def _start(self, text: str, session_options: dict):
+        # 读到第一个音频帧（或合成结束）为止，返回连接、剩余的数据流和已读到的数据块
+        client = await self.pool.acquire(**session_options)
+        chunks = client.synthesize(text, self.max_buffer_bytes)
+        prefix = []
+        try:
+            async for chunk in chunks:
+                prefix.append(chunk)
+                if chunk.kind == AUDIO:
+                    break
+            return client, chunks, prefix
+        except BaseException:
+            await chunks.aclose()
+            await self.pool.release(client)
+            raise
+
+    async def _abandon(self, task: asyncio.Task, started: float | None = None):
+        if started is not None:
+            # 落后的是第一路：等到它的首个音频（或超时）再记录延迟样本
+            loop = asyncio.get_running_loop()
+            await asyncio.wait([task], timeout=self.sample_timeout)
+            if not task.done() or task.exception() is None:
+                self._latencies.append(loop.time() - started)
+        task.cancel()
+        await asyncio.wait([task])
+        if task.cancelled() or task.exception() is not None:
+            return
+        # 两路几乎同时出声，落后的一路已经开始合成
+        client, chunks, _ = task.result()
+        await chunks.aclose()
+        await self.pool.release(client)
+
+    @staticmethod
+    async def _first(tasks: list[asyncio.Task]) -> asyncio.Task:
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in tasks:
+                if task in done and task.exception() is None:
+                    return task
+        # 全部失败时抛出第一路的错误
+        return await tasks[0]
+
+    async def synthesize(self, text: str, **session_options):
+        """产出 StreamChunk，session_options 同 DoubaoTTSPool.acquire"""
+        if not isinstance(text, str):
+            raise Exception("hedged synthesis requires the full text")
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        self.requests += 1
+        tasks = [asyncio.create_task(self._start(text, session_options))]
+        winner = None
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self.threshold)
+            if not done:
+                self.hedged += 1
+                tasks.append(asyncio.create_task(self._start(text, session_options)))
+            winner = await self._first(tasks)
+        finally:
+            for task in tasks:
+                if task is not winner:
+                    # 关闭落后的连接可能要等服务端响应，放到后台，不推迟第一个音频
+                    sample = (
+                        started
+                        if task is tasks[0]
+                        and winner is not None
+                        and self.percentile is not None
+                        else None
+                    )
+                    cleanup = asyncio.create_task(self._abandon(task, sample))
+                    self._cleanup.add(cleanup)
+                    cleanup.add_done_callback(self._cleanup.discard)
+
+        if winner is tasks[0]:
+            self._latencies.append(loop.time() - started)
+        else:
+            self.hedge_wins += 1
+
+        client, chunks, prefix = winner.result()
+        try:
+            for chunk in prefix:
+                yield chunk
+            async for chunk in chunks:
+                yield chunk
+        finally:
+            await chunks.aclose()
+            await self.pool.release(client)
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "hedge_rate": self.hedged / self.requests if self.requests else 0.0,
+            "win_rate": self.hedge_wins / self.hedged if self.hedged else 0.0,
+            "threshold": self.threshold,
+        }
@@ -0,0 +1,170 @@
+"""长文本并行合成：按句子和段落把文档切成多段，每段一个 session，在多条连接上并发合成，再按顺序拼接。
+
+单个 session 只能按服务端的实时倍率顺序合成，整本书的耗时约等于音频时长除以这个倍率。
+分段并发后总耗时接近 1/concurrency；第一段很短并且边合成边输出，首包延迟不受影响。
+已经合成好、但还没轮到输出的段落暂存在有上限的重排缓冲区里：
+
+    longform = LongformSynthesizer(pool, concurrency=8)
+    async for chunk in longform.synthesize(article):
+        if chunk.kind == "audio":
+            f.write(chunk.data)
+
+pcm / mp3 可以直接拼接；ogg_opus 拼接后是多个连续的 Ogg 流。
+"""
+
+import asyncio
+import contextlib
+from collections import deque
+
+from .pool import DoubaoTTSPool
+from .segmenter import TextSegmenter
+from .stream import AUDIO, StreamChunk
+
+
+def split_document(
+    text: str,
+    min_chars: int = 200,
+    max_chars: int = 1000,
+    first_max_chars: int = 60,
+) -> list[str]:
+    """在句末标点或换行处切分，第一段不超过 first_max_chars 以尽快出声"""
+    segmenter = TextSegmenter(
+        first_min_chars=min(8, first_max_chars),
+        first_max_chars=first_max_chars,
+        first_timeout=None,
+        min_chars=min_chars,
+        max_chars=max_chars,
+    )
+    segments = segmenter.feed(text)
+    tail = segmenter.flush()
+    if tail:
+        segments.append(tail)
+    return segments
+
+
+class _Segment:
+    __slots__ = ("text", "chunks", "done", "error")
+
+    def __init__(self, text: str):
+        self.text = text
+        self.chunks: deque[StreamChunk] = deque()
+        self.done = False
+        self.error: BaseException | None = None
+
+
+class _ReorderBuffer:
+    """按段落顺序输出的缓冲区。
+
+    正在输出的段落（head）总能写入一个数据块，其余段落在缓冲超过 max_bytes 时等待，
+    缓冲区满时后面的连接暂停读取，内存占用有上限且不会死锁。
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.head = 0
+        self._changed = asyncio.Condition()
+
+    async def put(self, index: int, segment: _Segment, chunk: StreamChunk):
+        size = len(chunk.data) if chunk.kind == AUDIO else 0
+        async with self._changed:
+            await self._changed.wait_for(
+                lambda: self.bytes < self.max_bytes
+                or (index == self.head and not segment.chunks)
+            )
+            segment.chunks.append(chunk)
+            self.bytes += size
+            self._changed.notify_all()
+
+    async def finish(self, segment: _Segment, error: BaseException | None = None):
+        async with self._changed:
+            segment.done = True
+            segment.error = error
+            self._changed.notify_all()
+
+    async def get(self, segment: _Segment) -> StreamChunk | None:
+        async with self._changed:
+            await self._changed.wait_for(lambda: segment.chunks or segment.done)
+            if not segment.chunks:
+                if segment.error is not None:
+                    raise segment.error
+                self.head += 1
+                self._changed.notify_all()
+                return None
+            chunk = segment.chunks.popleft()
+            if chunk.kind == AUDIO:
+                self.bytes -= len(chunk.data)
+            self._changed.notify_all()
+            return chunk
+
+
+class LongformSynthesizer:
+    def __init__(
+        self,
+        pool: DoubaoTTSPool,
+        concurrency: int = 4,
+        max_buffer_bytes: int = 16 * 1024 * 1024,
+        min_chars: int = 200,
+        max_chars: int = 1000,
+        first_max_chars: int = 60,
+    ):
+        self.pool = pool
+        # 同时合成的段落数，不要超过连接池的 max_size 和 app 的并发配额
+        self.concurrency = concurrency
+        self.max_buffer_bytes = max_buffer_bytes
+        self.min_chars = min_chars
+        self.max_chars = max_chars
+        self.first_max_chars = first_max_chars
+
+    async def _run(
+        self,
+        index: int,
+        segment: _Segment,
+        buffer: _ReorderBuffer,
+        session_options: dict,
+    ):
+        try:
+            async with self.pool.session(**session_options) as client:
+                async with contextlib.aclosing(
+                    client.synthesize(segment.text)
+                ) as chunks:
+                    async for chunk in chunks:
+                        await buffer.put(index, segment, chunk)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await buffer.finish(segment, e)
+            return
+        await buffer.finish(segment)
+
+    async def synthesize(self, text: str, **session_options):
+        """按原文顺序产出 StreamChunk，session_options 同 DoubaoTTSPool.acquire"""
+        segments = [
+            _Segment(part)
+            for part in split_document(
+                text, self.min_chars, self.max_chars, self.first_max_chars
+            )
+        ]
+        buffer = _ReorderBuffer(self.max_buffer_bytes)
+        tasks: list[asyncio.Task] = []
+        try:
+            for index, segment in enumerate(segments):
+                # 只提前合成 concurrency 个段落，后面的段落等前面的输出完再开始
+                while len(tasks) < min(index + self.concurrency, len(segments)):
+                    position = len(tasks)
+                    tasks.append(
+                        asyncio.create_task(
+                            self._run(
+                                position, segments[position], buffer, session_options
+                            )
+                        )
+                    )
+                while True:
+                    chunk = await buffer.get(segment)
+                    if chunk is None:
+                        break
+                    yield chunk
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,283 @@
+import bisect
+import time
+
+# 每个采样点占用的字节数，用于从音频字节数推算时长
+_BYTES_PER_SAMPLE = {"pcm": 2}
+
+
+class SessionStats:
+    """单个 session 的时间线（time.monotonic() 秒）与音频统计"""
+
+    __slots__ = (
+        "speaker",
+        "endpoint",
+        "session_id",
+        "audio_format",
+        "sample_rate",
+        "connect_start",
+        "connected",
+        "connection_started",
+        "dns_time",
+        "tcp_time",
+        "tls_time",
+        "tls_resumed",
+        "session_start_sent",
+        "session_started",
+        "first_audio",
+        "last_audio",
+        "finished",
+        "failed",
+        "reconnects",
+        "chunks",
+        "audio_bytes",
+        "inter_arrival",
+    )
+
+    def __init__(
+        self,
+        speaker: str,
+        endpoint: str,
+        audio_format: str = "pcm",
+        sample_rate: int = 24000,
+    ):
+        self.speaker = speaker
+        self.endpoint = endpoint
+        self.session_id = None
+        self.audio_format = audio_format
+        self.sample_rate = sample_rate
+        # 复用已有连接时，连接相关的时间点为 None
+        self.connect_start = None
+        self.connected = None
+        self.connection_started = None
+        # 建连各阶段的耗时（秒），见 api.connector.ConnectTimes
+        self.dns_time = None
+        self.tcp_time = None
+        self.tls_time = None
+        self.tls_resumed = None
+        self.session_start_sent = None
+        self.session_started = None
+        self.first_audio = None
+        self.last_audio = None
+        self.finished = None
+        self.failed = False
+        self.reconnects = 0
+        self.chunks = 0
+        self.audio_bytes = 0
+        self.inter_arrival: list[float] = []
+
+    def set_connect_phases(self, times) -> None:
+        if times is None:
+            return
+        self.dns_time = times.dns
+        self.tcp_time = times.tcp
+        self.tls_time = times.tls
+        self.tls_resumed = times.tls_resumed
+
+    def on_audio(self, size: int):
+        now = time.monotonic()
+        if self.first_audio is None:
+            self.first_audio = now
+        else:
+            self.inter_arrival.append(now - self.last_audio)
+        self.last_audio = now
+        self.chunks += 1
+        self.audio_bytes += size
+
+    @staticmethod
+    def _span(start, end):
+        if start is None or end is None:
+            return None
+        return end - start
+
+    @property
+    def connect_time(self) -> float | None:
+        return self._span(self.connect_start, self.connected)
+
+    @property
+    def connection_start_time(self) -> float | None:
+        return self._span(self.connected, self.connection_started)
+
+    @property
+    def session_start_time(self) -> float | None:
+        return self._span(self.session_start_sent, self.session_started)
+
+    @property
+    def time_to_first_audio(self) -> float | None:
+        return self._span(self.session_start_sent, self.first_audio)
+
+    @property
+    def duration(self) -> float | None:
+        return self._span(self.session_start_sent, self.finished)
+
+    @property
+    def audio_seconds(self) -> float | None:
+        bytes_per_sample = _BYTES_PER_SAMPLE.get(self.audio_format)
+        if bytes_per_sample is None:
+            return None
+        return self.audio_bytes / (bytes_per_sample * self.sample_rate)
+
+    @property
+    def real_time_factor(self) -> float | None:
+        """合成耗时 / 音频时长，小于 1 表示比实时更快"""
+        audio_seconds = self.audio_seconds
+        if not audio_seconds or self.duration is None:
+            return None
+        return self.duration / audio_seconds
+
+    def as_dict(self) -> dict:
+        return {
+            "speaker": self.speaker,
+            "endpoint": self.endpoint,
+            "session_id": self.session_id,
+            "failed": self.failed,
+            "reconnects": self.reconnects,
+            "connect_time": self.connect_time,
+            "dns_time": self.dns_time,
+            "tcp_time": self.tcp_time,
+            "tls_time": self.tls_time,
+            "tls_resumed": self.tls_resumed,
+            "connection_start_time": self.connection_start_time,
+            "session_start_time": self.session_start_time,
+            "time_to_first_audio": self.time_to_first_audio,
+            "duration": self.duration,
+            "chunks": self.chunks,
+            "audio_bytes": self.audio_bytes,
+            "audio_seconds": self.audio_seconds,
+            "real_time_factor": self.real_time_factor,
+            "max_inter_arrival": max(self.inter_arrival, default=None),
+        }
+
+
+class MetricsHook:
+    """DoubaoTTSClient(hooks=[...]) 的回调接口"""
+
+    def on_session_start(self, stats: SessionStats) -> None:
+        pass
+
+    def on_first_audio(self, stats: SessionStats) -> None:
+        pass
+
+    def on_session_end(self, stats: SessionStats) -> None:
+        pass
+
+
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _labels(labels: dict) -> str:
+    def escape(value):
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    return ",".join(f'{k}="{escape(v)}"' for k, v in labels.items())
+
+
+class PrometheusExporter(MetricsHook):
+    """按 speaker / endpoint 汇总直方图，render() 输出 Prometheus 文本格式"""
+
+    _HISTOGRAMS = {
+        "connect_seconds": "websocket 建连耗时",
+        "dns_seconds": "建连时 DNS 解析的耗时",
+        "tcp_connect_seconds": "建连时 TCP 连接的耗时",
+        "tls_handshake_seconds": "建连时 TLS 握手的耗时",
+        "connection_start_seconds": "StartConnection 到 ConnectionStarted 的耗时",
+        "session_start_seconds": "StartSession 到 SessionStarted 的耗时",
+        "time_to_first_audio_seconds": "StartSession 到首个 TTSResponse 的耗时",
+        "chunk_interval_seconds": "相邻音频帧的到达间隔",
+        "session_duration_seconds": "StartSession 到 SessionFinished 的耗时",
+        "real_time_factor": "合成耗时与音频时长之比",
+    }
+
+    def __init__(self, prefix: str = "doubao_tts", buckets=DEFAULT_BUCKETS):
+        self.prefix = prefix
+        self.buckets = buckets
+        self._histograms: dict[str, dict[tuple, Histogram]] = {
+            name: {} for name in self._HISTOGRAMS
+        }
+        self._sessions: dict[tuple, int] = {}
+        self._audio_bytes: dict[tuple, int] = {}
+
+    def _observe(self, name: str, key: tuple, value: float | None):
+        if value is None:
+            return
+        histogram = self._histograms[name].get(key)
+        if histogram is None:
+            histogram = self._histograms[name][key] = Histogram(self.buckets)
+        histogram.observe(value)
+
+    def on_session_end(self, stats: SessionStats) -> None:
+        key = (stats.speaker, stats.endpoint)
+        self._observe("connect_seconds", key, stats.connect_time)
+        self._observe("dns_seconds", key, stats.dns_time)
+        self._observe("tcp_connect_seconds", key, stats.tcp_time)
+        self._observe("tls_handshake_seconds", key, stats.tls_time)
+        self._observe("connection_start_seconds", key, stats.connection_start_time)
+        self._observe("session_start_seconds", key, stats.session_start_time)
+        self._observe("time_to_first_audio_seconds", key, stats.time_to_first_audio)
+        for interval in stats.inter_arrival:
+            self._observe("chunk_interval_seconds", key, interval)
+        self._observe("session_duration_seconds", key, stats.duration)
+        self._observe("real_time_factor", key, stats.real_time_factor)
+
+        status_key = key + ("failed" if stats.failed else "ok",)
+        self._sessions[status_key] = self._sessions.get(status_key, 0) + 1
+        self._audio_bytes[key] = self._audio_bytes.get(key, 0) + stats.audio_bytes
+
+    def render(self) -> str:
+        lines = []
+        for name, help_text in self._HISTOGRAMS.items():
+            metric = f"{self.prefix}_{name}"
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} histogram")
+            for (speaker, endpoint), histogram in self._histograms[name].items():
+                labels = {"speaker": speaker, "endpoint": endpoint}
+                cumulative = 0
+                for bound, count in zip(
+                    histogram.buckets + (float("inf"),), histogram.counts
+                ):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(
+                        f"{metric}_bucket{{{_labels({**labels, 'le': le})}}} {cumulative}"
+                    )
+                lines.append(f"{metric}_sum{{{_labels(labels)}}} {histogram.sum}")
+                lines.append(f"{metric}_count{{{_labels(labels)}}} {histogram.count}")
+
+        metric = f"{self.prefix}_sessions_total"
+        lines.append(f"# HELP {metric} 结束的 session 数")
+        lines.append(f"# TYPE {metric} counter")
+        for (speaker, endpoint, status), count in self._sessions.items():
+            labels = {"speaker": speaker, "endpoint": endpoint, "status": status}
+            lines.append(f"{metric}{{{_labels(labels)}}} {count}")
+
+        metric = f"{self.prefix}_audio_bytes_total"
+        lines.append(f"# HELP {metric} 收到的音频字节数")
+        lines.append(f"# TYPE {metric} counter")
+        for (speaker, endpoint), count in self._audio_bytes.items():
+            labels = {"speaker": speaker, "endpoint": endpoint}
+            lines.append(f"{metric}{{{_labels(labels)}}} {count}")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,386 @@
+"""本地 mock TTS 服务端，实现与豆包双向流式 TTS 相同的二进制协议。
+
+用于在没有真实密钥和网络的环境下测试客户端、做性能回归：
+
+    async with MockTTSServer(chunk_size=3200, chunk_delay=0.01) as server:
+        client = DoubaoTTSClient("uid", "app", "token", server.url, "speaker", callback)
+"""
+
+import asyncio
+import gzip
+import hashlib
+import json
+import random
+import re
+import uuid
+
+import websockets
+
+from .protocol import (
+    AUDIO_ONLY_RESPONSE,
+    COMPRESSION_GZIP,
+    EVENT_ConnectionFailed,
+    EVENT_ConnectionFinished,
+    EVENT_ConnectionStarted,
+    EVENT_FinishConnection,
+    EVENT_FinishSession,
+    EVENT_SessionFailed,
+    EVENT_SessionFinished,
+    EVENT_SessionStarted,
+    EVENT_StartSession,
+    EVENT_Start_Connection,
+    EVENT_TaskRequest,
+    EVENT_TTSResponse,
+    EVENT_TTSSentenceEnd,
+    EVENT_TTSSentenceStart,
+    FULL_SERVER_RESPONSE,
+    NO_SERIALIZATION,
+    decode_client_frame,
+    decompress_frame,
+    encode_server_frame,
+)
+
+_SENTENCE_END = re.compile(r"[。！？!?；;]|[.](?=\s|$)|\n")
+
+
+class MockTTSServer:
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        chunk_size: int = 3200,
+        chunk_delay: float = 0.0,
+        bytes_per_char: int = 9600,
+        connection_delay: float = 0.0,
+        session_delay: float = 0.0,
+        slow_session_rate: float = 0.0,
+        slow_session_delay: float = 1.0,
+        fail_connection_rate: float = 0.0,
+        fail_session_rate: float = 0.0,
+        drop_after_chunks: int | None = None,
+        ignore_finish: bool = False,
+        max_sessions: int | None = None,
+        token: str | None = None,
+        seed: int | None = None,
+        ssl=None,
+        compress_responses: bool = False,
+    ):
+        self.host = host
+        self.port = port
+        # 每个音频帧的大小与发送间隔
+        self.chunk_size = chunk_size
+        self.chunk_delay = chunk_delay
+        # 每个字符合成多少字节音频，默认约 0.2 秒 24kHz PCM
+        self.bytes_per_char = bytes_per_char
+        self.connection_delay = connection_delay
+        self.session_delay = session_delay
+        # 按概率让个别 session 启动得很慢，模拟首包延迟的长尾
+        self.slow_session_rate = slow_session_rate
+        self.slow_session_delay = slow_session_delay
+        # 错误注入
+        self.fail_connection_rate = fail_connection_rate
+        self.fail_session_rate = fail_session_rate
+        self.drop_after_chunks = drop_after_chunks
+        # 收到 FinishSession 后不再回复，模拟服务端卡住
+        self.ignore_finish = ignore_finish
+        # 模拟按 app 的并发配额，超出时返回限流错误
+        self.max_sessions = max_sessions
+        self.active_sessions = 0
+        self.throttled_sessions = 0
+        self.token = token
+        self.ssl = ssl
+        # 用 gzip 压缩下行 JSON 帧
+        self.compress_responses = compress_responses
+        self._random = random.Random(seed)
+        self._server = None
+
+        self.connections = 0
+        self.sessions = 0
+        self.text_frames = 0
+        self.audio_bytes = 0
+        # 每个 session 请求的 audio_params
+        self.audio_params: list[dict] = []
+
+    @property
+    def url(self) -> str:
+        scheme = "wss" if self.ssl else "ws"
+        return f"{scheme}://{self.host}:{self.port}"
+
+    async def start(self):
+        self._server = await websockets.serve(
+            self._handler, self.host, self.port, ssl=self.ssl, max_size=None
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def _fail(self, rate: float) -> bool:
+        return rate > 0 and self._random.random() < rate
+
+    def _encode(self, message_type: int, event: int, **fields) -> bytes:
+        if self.compress_responses and message_type == FULL_SERVER_RESPONSE:
+            for name in ("meta", "payload"):
+                if fields.get(name) is not None:
+                    fields[name] = gzip.compress(fields[name])
+            fields["compression"] = COMPRESSION_GZIP
+        return encode_server_frame(message_type, event, **fields)
+
+    @staticmethod
+    def _meta(status_code: int, message: str) -> bytes:
+        return json.dumps({"status_code": status_code, "message": message}).encode()
+
+    def synthesize(
+        self, sentence: str, audio_format: str = "pcm", sample_rate: int = 24000
+    ) -> bytes:
+        # 同一句话总是得到相同的音频，便于校验去重与缓存
+        seed = hashlib.sha256(f"{audio_format}:{sample_rate}:{sentence}".encode())
+        seed = seed.digest()
+        size = max(len(sentence), 1) * self.bytes_per_char * sample_rate // 24000
+        if audio_format == "pcm":
+            size -= size % 2
+        else:
+            # 压缩格式大约是 PCM 的十分之一
+            size = max(size // 10, 1)
+        return (seed * (size // len(seed) + 1))[:size]
+
+    def _timestamps(self, sentence: str) -> bytes:
+        # 把句子的时长平均分给每个非空白字符，格式与服务端的逐字时间戳相同
+        duration = max(len(sentence), 1) * self.bytes_per_char / 48000
+        step = duration / max(len(sentence), 1)
+        words = [
+            {
+                "word": char,
+                "startTime": round(index * step, 6),
+                "endTime": round((index + 1) * step, 6),
+            }
+            for index, char in enumerate(sentence)
+            if not char.isspace()
+        ]
+        return json.dumps(
+            {"text": sentence, "words": words}, ensure_ascii=False
+        ).encode()
+
+    async def _handler(self, websocket):
+        self.connections += 1
+        sessions: dict[bytes, str] = {}
+        params: dict[bytes, dict] = {}
+        sent_chunks = 0
+
+        async def send_sentence(session_id: bytes, sentence: str):
+            nonlocal sent_chunks
+            payload = json.dumps({"text": sentence}, ensure_ascii=False).encode()
+            await websocket.send(
+                self._encode(
+                    FULL_SERVER_RESPONSE,
+                    EVENT_TTSSentenceStart,
+                    session_id=session_id,
+                    payload=payload,
+                )
+            )
+            audio_params = params[session_id]
+            audio = self.synthesize(
+                sentence,
+                audio_params.get("format", "pcm"),
+                audio_params.get("sample_rate", 24000),
+            )
+            for offset in range(0, len(audio), self.chunk_size):
+                if self.chunk_delay:
+                    await asyncio.sleep(self.chunk_delay)
+                if (
+                    self.drop_after_chunks is not None
+                    and sent_chunks >= self.drop_after_chunks
+                ):
+                    websocket.transport.abort()
+                    return
+                chunk = audio[offset : offset + self.chunk_size]
+                await websocket.send(
+                    self._encode(
+                        AUDIO_ONLY_RESPONSE,
+                        EVENT_TTSResponse,
+                        session_id=session_id,
+                        payload=chunk,
+                        serialization=NO_SERIALIZATION,
+                    )
+                )
+                sent_chunks += 1
+                self.audio_bytes += len(chunk)
+            if audio_params.get("enable_timestamp"):
+                payload = self._timestamps(sentence)
+            await websocket.send(
+                self._encode(
+                    FULL_SERVER_RESPONSE,
+                    EVENT_TTSSentenceEnd,
+                    session_id=session_id,
+                    payload=payload,
+                )
+            )
+
+        async def flush(session_id: bytes, final: bool):
+            text = sessions[session_id]
+            while True:
+                match = _SENTENCE_END.search(text)
+                if match is None:
+                    break
+                sentence, text = text[: match.end()].strip(), text[match.end() :]
+                if sentence:
+                    await send_sentence(session_id, sentence)
+            if final and text.strip():
+                await send_sentence(session_id, text.strip())
+                text = ""
+            sessions[session_id] = text
+
+        try:
+            async for message in websocket:
+                if not isinstance(message, bytes):
+                    continue
+                frame = decompress_frame(decode_client_frame(message))
+                session_id = (
+                    bytes(frame.raw_session_id)
+                    if frame.raw_session_id is not None
+                    else None
+                )
+
+                if frame.event == EVENT_Start_Connection:
+                    if self.connection_delay:
+                        await asyncio.sleep(self.connection_delay)
+                    headers = websocket.request.headers
+                    if (
+                        self.token is not None
+                        and headers.get("X-Api-Access-Key") != self.token
+                    ) or self._fail(self.fail_connection_rate):
+                        await websocket.send(
+                            self._encode(
+                                FULL_SERVER_RESPONSE,
+                                EVENT_ConnectionFailed,
+                                meta=self._meta(45000000, "mock connection failed"),
+                            )
+                        )
+                        await websocket.close()
+                        return
+                    await websocket.send(
+                        self._encode(
+                            FULL_SERVER_RESPONSE,
+                            EVENT_ConnectionStarted,
+                            connection_id=str(uuid.uuid4()).encode(),
+                        )
+                    )
+                elif frame.event == EVENT_StartSession:
+                    if self.session_delay:
+                        await asyncio.sleep(self.session_delay)
+                    if self._fail(self.slow_session_rate):
+                        await asyncio.sleep(self.slow_session_delay)
+                    self.sessions += 1
+                    if (
+                        self.max_sessions is not None
+                        and self.active_sessions >= self.max_sessions
+                    ):
+                        self.throttled_sessions += 1
+                        await websocket.send(
+                            self._encode(
+                                FULL_SERVER_RESPONSE,
+                                EVENT_SessionFailed,
+                                session_id=session_id,
+                                meta=self._meta(
+                                    45000292,
+                                    "quota exceeded: too many concurrent sessions",
+                                ),
+                            )
+                        )
+                        continue
+                    if self._fail(self.fail_session_rate):
+                        await websocket.send(
+                            self._encode(
+                                FULL_SERVER_RESPONSE,
+                                EVENT_SessionFailed,
+                                session_id=session_id,
+                                meta=self._meta(55000000, "mock session failed"),
+                            )
+                        )
+                        continue
+                    request = json.loads(bytes(frame.payload))
+                    audio_params = request["req_params"].get("audio_params", {})
+                    self.audio_params.append(audio_params)
+                    sessions[session_id] = ""
+                    params[session_id] = audio_params
+                    self.active_sessions += 1
+                    await websocket.send(
+                        self._encode(
+                            FULL_SERVER_RESPONSE,
+                            EVENT_SessionStarted,
+                            session_id=session_id,
+                            meta=b"{}",
+                        )
+                    )
+                elif frame.event == EVENT_TaskRequest:
+                    if session_id not in sessions:
+                        continue
+                    self.text_frames += 1
+                    request = json.loads(bytes(frame.payload))
+                    sessions[session_id] += request["req_params"]["text"]
+                    await flush(session_id, final=False)
+                elif frame.event == EVENT_FinishSession:
+                    if session_id not in sessions or self.ignore_finish:
+                        continue
+                    await flush(session_id, final=True)
+                    del sessions[session_id]
+                    del params[session_id]
+                    self.active_sessions -= 1
+                    await websocket.send(
+                        self._encode(
+                            FULL_SERVER_RESPONSE,
+                            EVENT_SessionFinished,
+                            session_id=session_id,
+                            meta=self._meta(20000000, "OK"),
+                        )
+                    )
+                elif frame.event == EVENT_FinishConnection:
+                    await websocket.send(
+                        self._encode(
+                            FULL_SERVER_RESPONSE,
+                            EVENT_ConnectionFinished,
+                            meta=self._meta(20000000, "OK"),
+                        )
+                    )
+                    await websocket.close()
+                    return
+        except websockets.exceptions.ConnectionClosed:
+            pass
+        finally:
+            self.active_sessions -= len(sessions)
+
+
+async def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="本地 mock 豆包 TTS 服务端")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--chunk-size", type=int, default=3200)
+    parser.add_argument("--chunk-delay", type=float, default=0.0)
+    parser.add_argument("--fail-session-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    async with MockTTSServer(
+        args.host,
+        args.port,
+        chunk_size=args.chunk_size,
+        chunk_delay=args.chunk_delay,
+        fail_session_rate=args.fail_session_rate,
+    ) as server:
+        print(f"mock TTS server listening on {server.url}")
+        await asyncio.Future()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,365 @@
+"""实时播放用的音频输出：预分配的 numpy 环形缓冲区 + 可替换的输出后端。
+
+生产者（事件循环中的 on_data 或 synthesize 消费端）写入 16 bit PCM，
+输出后端（声卡回调、文件写入线程或无声设备）按自己的节奏取数据。
+缓冲区攒够 prebuffer_seconds 后才开始播放，欠载后重新攒够再继续，
+用少量延迟换取负载抖动时不出现断续。
+
+    with PlaybackSink(SoundDeviceBackend(), sample_rate=24000) as sink:
+        async for chunk in client.synthesize(text):
+            if chunk.kind == "audio":
+                await sink.write(chunk.data)
+        sink.finish()
+        await sink.drain()
+"""
+
+import asyncio
+import threading
+import time
+
+import numpy as np
+
+from .audio import wav_header
+
+
+class RingBuffer:
+    """单生产者单消费者的 int16 环形缓冲区。
+
+    读写位置只增不减，分别只由消费者和生产者修改，先复制数据再更新位置，
+    两端不需要加锁。
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._data = np.zeros(capacity, dtype=np.int16)
+        self._read = 0
+        self._write = 0
+
+    def __len__(self) -> int:
+        return self._write - self._read
+
+    @property
+    def free(self) -> int:
+        return self.capacity - (self._write - self._read)
+
+    def write(self, samples: np.ndarray) -> int:
+        count = min(len(samples), self.free)
+        start = self._write % self.capacity
+        first = min(count, self.capacity - start)
+        self._data[start : start + first] = samples[:first]
+        self._data[: count - first] = samples[first:count]
+        self._write += count
+        return count
+
+    def read_into(self, out: np.ndarray) -> int:
+        count = min(len(out), len(self))
+        start = self._read % self.capacity
+        first = min(count, self.capacity - start)
+        out[:first] = self._data[start : start + first]
+        out[first:count] = self._data[: count - first]
+        self._read += count
+        return count
+
+
+class PlaybackSink:
+    def __init__(
+        self,
+        backend=None,
+        sample_rate: int = 24000,
+        capacity_seconds: float = 5.0,
+        prebuffer_seconds: float = 0.2,
+    ):
+        self.backend = backend or NullBackend()
+        self.sample_rate = sample_rate
+        self.buffer = RingBuffer(int(capacity_seconds * sample_rate))
+        # 开始播放（以及欠载后恢复播放）前需要缓冲的样本数
+        self.prebuffer = min(int(prebuffer_seconds * sample_rate), self.buffer.capacity)
+
+        self.underruns = 0
+        self.overruns = 0
+        self.dropped_samples = 0
+        self.played_samples = 0
+
+        self._playing = False
+        self._finished = False
+        self._carry = b""
+        self._data_ready = threading.Event()
+        self._drained = threading.Event()
+        self._drained.set()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._space: asyncio.Future | None = None
+        self._started = False
+
+    def start(self):
+        if not self._started:
+            self._started = True
+            self.backend.start(self)
+        return self
+
+    def close(self):
+        if self._started:
+            self._started = False
+            self._data_ready.set()
+            self.backend.stop()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _samples(self, data) -> np.ndarray:
+        # 音频帧的长度不一定是 2 的倍数，多出的半个样本留到下一次
+        if self._carry:
+            data = self._carry + bytes(data)
+            self._carry = b""
+        if len(data) % 2:
+            self._carry = bytes(data[-1:])
+            data = data[:-1]
+        if self._finished:
+            self._finished = False
+        self._drained.clear()
+        return np.frombuffer(data, dtype=np.int16)
+
+    def write_nowait(self, data) -> int:
+        """不阻塞地写入，缓冲区满时丢弃多出的部分并计入 overruns。
+
+        可以直接作为 ResultCallback.on_data 使用，返回写入的样本数。
+        """
+        samples = self._samples(data)
+        written = self.buffer.write(samples)
+        if written < len(samples):
+            self.overruns += 1
+            self.dropped_samples += len(samples) - written
+        self._data_ready.set()
+        return written
+
+    async def write(self, data):
+        """写入全部数据，缓冲区满时等待播放腾出空间"""
+        samples = self._samples(data)
+        offset = 0
+        while True:
+            offset += self.buffer.write(samples[offset:])
+            self._data_ready.set()
+            if offset >= len(samples):
+                return
+            loop = asyncio.get_running_loop()
+            self._loop = loop
+            self._space = loop.create_future()
+            # 创建 future 之前消费端可能已经腾出空间
+            if self.buffer.free == 0:
+                await self._space
+            self._space = None
+
+    def finish(self):
+        """本段音频已经全部写入，剩余数据不足 prebuffer 也会播放完"""
+        self._carry = b""
+        self._finished = True
+        if len(self.buffer) == 0:
+            self._drained.set()
+        self._data_ready.set()
+
+    def wait_drained(self, timeout: float | None = None) -> bool:
+        return self._drained.wait(timeout)
+
+    async def drain(self):
+        """等待 finish() 之前写入的音频全部播放完"""
+        if not self._drained.is_set():
+            await asyncio.get_running_loop().run_in_executor(None, self._drained.wait)
+
+    def ready(self) -> bool:
+        """是否有可以播放的数据：未开始播放时需要攒够 prebuffer"""
+        available = len(self.buffer)
+        if self._playing:
+            return available > 0
+        return available >= self.prebuffer or (self._finished and available > 0)
+
+    def _wake_writer(self):
+        space = self._space
+        if space is not None and not space.done():
+            self._loop.call_soon_threadsafe(_resolve, space)
+
+    def fill(self, out: np.ndarray) -> int:
+        """由输出后端调用：把音频读入 out，不足部分补静音，返回有效样本数"""
+        if not self._playing:
+            if not self.ready():
+                out[:] = 0
+                return 0
+            self._playing = True
+
+        count = self.buffer.read_into(out)
+        if count < len(out):
+            out[count:] = 0
+            if not self._finished:
+                # 欠载：重新攒够 prebuffer 再继续播放
+                self.underruns += 1
+            self._playing = False
+        self.played_samples += count
+        if count:
+            self._wake_writer()
+        if self._finished and len(self.buffer) == 0:
+            self._drained.set()
+        return count
+
+    def stats(self) -> dict:
+        return {
+            "buffered_samples": len(self.buffer),
+            "played_samples": self.played_samples,
+            "underruns": self.underruns,
+            "overruns": self.overruns,
+            "dropped_samples": self.dropped_samples,
+        }
+
+
+def _resolve(future: asyncio.Future):
+    if not future.done():
+        future.set_result(None)
+
+
+class OutputBackend:
+    """输出后端：start(sink) 之后按自己的节奏调用 sink.fill() 取数据"""
+
+    def start(self, sink: PlaybackSink) -> None:
+        pass
+
+    def stop(self) -> None:
+        pass
+
+
+class ThreadBackend(OutputBackend):
+    """在后台线程中取数据的后端。
+
+    realtime=True 时按采样率的节奏取数据（模拟声卡时钟，会产生欠载），
+    否则有多少取多少。没有数据时阻塞等待，空闲时不占用 CPU。
+    """
+
+    def __init__(self, block_size: int = 1024, realtime: bool = False):
+        self.block_size = block_size
+        self.realtime = realtime
+        self._thread: threading.Thread | None = None
+        self._sink: PlaybackSink | None = None
+        self._stopped = threading.Event()
+
+    def output(self, samples: np.ndarray) -> None:
+        pass
+
+    def start(self, sink: PlaybackSink) -> None:
+        self._stopped.clear()
+        self._sink = sink
+        self._thread = threading.Thread(target=self._run, args=(sink,), daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._sink is not None:
+            self._sink._data_ready.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _wait_ready(self, sink: PlaybackSink) -> bool:
+        while not self._stopped.is_set():
+            if sink.ready():
+                return True
+            sink._data_ready.clear()
+            # clear() 之后再检查一次，避免错过写入或 stop() 的唤醒
+            if not sink.ready() and not self._stopped.is_set():
+                sink._data_ready.wait()
+        return False
+
+    def _run(self, sink: PlaybackSink):
+        block = np.zeros(self.block_size, dtype=np.int16)
+        interval = self.block_size / sink.sample_rate
+        while self._wait_ready(sink):
+            if not self.realtime:
+                count = sink.fill(block[: min(len(sink.buffer), self.block_size)])
+                self.output(block[:count])
+                continue
+
+            next_time = time.monotonic()
+            while not self._stopped.is_set():
+                sink.fill(block)
+                self.output(block)
+                if not sink._playing:
+                    break
+                next_time += interval
+                delay = next_time - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    next_time = time.monotonic()
+
+
+class NullBackend(ThreadBackend):
+    """丢弃音频的输出设备，用于无声卡环境和测试"""
+
+    def __init__(self, block_size: int = 1024, realtime: bool = True):
+        super().__init__(block_size, realtime)
+
+
+class FileBackend(ThreadBackend):
+    """把音频写入文件，路径以 .wav 结尾时写 WAV 头"""
+
+    def __init__(self, path: str, block_size: int = 4096, realtime: bool = False):
+        super().__init__(block_size, realtime)
+        self.path = path
+        self._file = None
+        self._bytes = 0
+        self._sample_rate = 24000
+
+    def start(self, sink: PlaybackSink) -> None:
+        self._file = open(self.path, "wb")
+        self._bytes = 0
+        self._sample_rate = sink.sample_rate
+        if self.path.endswith(".wav"):
+            self._file.write(wav_header(0, sink.sample_rate))
+        super().start(sink)
+
+    def output(self, samples: np.ndarray) -> None:
+        data = samples.tobytes()
+        self._file.write(data)
+        self._bytes += len(data)
+
+    def stop(self) -> None:
+        super().stop()
+        if self._file is None:
+            return
+        if self.path.endswith(".wav"):
+            self._file.seek(0)
+            self._file.write(wav_header(self._bytes, self._sample_rate))
+        self._file.close()
+        self._file = None
+
+
+class SoundDeviceBackend(OutputBackend):
+    """通过 sounddevice 播放，由声卡回调直接从环形缓冲区取数据"""
+
+    def __init__(self, block_size: int = 1024, device=None, latency="low"):
+        self.block_size = block_size
+        self.device = device
+        self.latency = latency
+        self._stream = None
+
+    def start(self, sink: PlaybackSink) -> None:
+        # 可选依赖，只在需要声卡时导入
+        import sounddevice as sd
+
+        def callback(outdata, frames, time_info, status):
+            sink.fill(outdata[:, 0])
+
+        self._stream = sd.OutputStream(
+            samplerate=sink.sample_rate,
+            channels=1,
+            dtype="int16",
+            blocksize=self.block_size,
+            device=self.device,
+            latency=self.latency,
+            callback=callback,
+        )
+        self._stream.start()
+
+    def stop(self) -> None:
+        if self._stream is not None:
+            self._stream.stop()
+            self._stream.close()
+            self._stream = None
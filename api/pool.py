@@ -0,0 +1,312 @@
+import asyncio
+import contextlib
+from collections import deque
+
+from .connector import Connector
+from .doubao_tts_api import DoubaoTTSClient, ResultCallback
+from .metrics import MetricsHook
+from .scheduler import INTERACTIVE, QuotaScheduler
+
+
+class DoubaoTTSPool:
+    """维护一组已完成 StartConnection 的长连接，把新 session 分配给空闲连接"""
+
+    def __init__(
+        self,
+        uid: str,
+        app_id: str,
+        token: str,
+        url: str,
+        speaker: str,
+        min_size: int = 1,
+        max_size: int = 10,
+        idle_timeout: float = 60.0,
+        health_check_interval: float = 10.0,
+        acquire_timeout: float | None = None,
+        max_connecting: int = 4,
+        connect_backoff: float = 0.5,
+        max_connect_backoff: float = 30.0,
+        hooks: list[MetricsHook] | None = None,
+        audio_format: str = "pcm",
+        sample_rate: int = 24000,
+        scheduler: QuotaScheduler | None = None,
+        connector: Connector | None = None,
+        client_options: dict | None = None,
+    ):
+        if min_size > max_size:
+            raise Exception("min_size must not be greater than max_size")
+
+        self.uid = uid
+        self.app_id = app_id
+        self.token = token
+        self.url = url
+        self.speaker = speaker
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self.acquire_timeout = acquire_timeout
+        self.connect_backoff = connect_backoff
+        self.max_connect_backoff = max_connect_backoff
+        self.hooks = hooks
+        self.audio_format = audio_format
+        self.sample_rate = sample_rate
+        self.scheduler = scheduler
+        self.connector = connector
+        # 其余 DoubaoTTSClient 参数，例如 max_frame_bytes、read_buffer_bytes
+        self.client_options = client_options or {}
+
+        self._idle: deque[DoubaoTTSClient] = deque()
+        self._last_used: dict[DoubaoTTSClient, float] = {}
+        self._size = 0
+        self._cond = asyncio.Condition()
+        self._connecting = asyncio.Semaphore(max_connecting)
+        self._connect_failures = 0
+        self._health_task: asyncio.Task | None = None
+        # 后台补充连接最近一次失败的原因，建连恢复后清空
+        self.last_connect_error: Exception | None = None
+        self._closed = False
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @property
+    def idle(self) -> int:
+        return len(self._idle)
+
+    def _new_client(self) -> DoubaoTTSClient:
+        return DoubaoTTSClient(
+            self.uid,
+            self.app_id,
+            self.token,
+            self.url,
+            self.speaker,
+            ResultCallback(),
+            keep_alive=True,
+            hooks=self.hooks,
+            scheduler=self.scheduler,
+            connector=self.connector,
+            **self.client_options,
+        )
+
+    async def _open(self) -> DoubaoTTSClient:
+        # 限制同时建连的数量，并在连续失败后退避，避免重连风暴
+        async with self._connecting:
+            if self._connect_failures:
+                delay = min(
+                    self.connect_backoff * 2 ** (self._connect_failures - 1),
+                    self.max_connect_backoff,
+                )
+                await asyncio.sleep(delay)
+            client = self._new_client()
+            try:
+                await client.connect()
+            except asyncio.CancelledError:
+                # 取消不是建连失败，不计入退避
+                await self._close_client(client)
+                raise
+            except Exception:
+                self._connect_failures += 1
+                await self._close_client(client)
+                raise
+            self._connect_failures = 0
+            return client
+
+    async def _close_client(self, client: DoubaoTTSClient):
+        self._last_used.pop(client, None)
+        try:
+            await client.close()
+        except Exception:
+            pass
+
+    async def _discard(self, client: DoubaoTTSClient):
+        async with self._cond:
+            self._size -= 1
+            self._cond.notify()
+        await self._close_client(client)
+
+    async def _fill(self):
+        while not self._closed:
+            async with self._cond:
+                if self._size >= self.min_size:
+                    return
+                self._size += 1
+            try:
+                client = await self._open()
+            except BaseException:
+                async with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                raise
+            async with self._cond:
+                self._idle.append(client)
+                self._last_used[client] = asyncio.get_running_loop().time()
+                self._cond.notify()
+
+    async def start(self):
+        """建立 min_size 条连接，建连失败时抛出第一个错误"""
+        await self._fill()
+        if self._health_task is None:
+            self._health_task = asyncio.create_task(self._health_loop())
+
+    async def _health_loop(self):
+        while not self._closed:
+            await asyncio.sleep(self.health_check_interval)
+            try:
+                await self.check_health()
+            except Exception as e:
+                # 补充连接失败时保留原因，下一轮继续重试
+                self.last_connect_error = e
+            else:
+                self.last_connect_error = None
+
+    async def check_health(self):
+        now = asyncio.get_running_loop().time()
+        dead = []
+        async with self._cond:
+            # 空闲连接按归还顺序排列，最左边的空闲时间最长
+            for client in list(self._idle):
+                if not client.is_connected:
+                    self._idle.remove(client)
+                    dead.append(client)
+                elif (
+                    self._size - len(dead) > self.min_size
+                    and now - self._last_used.get(client, now) > self.idle_timeout
+                ):
+                    self._idle.remove(client)
+                    dead.append(client)
+            self._size -= len(dead)
+            if dead:
+                self._cond.notify(len(dead))
+        for client in dead:
+            await self._close_client(client)
+        await self._fill()
+
+    async def acquire(
+        self,
+        callback: ResultCallback | None = None,
+        speaker: str | None = None,
+        audio_format: str | None = None,
+        sample_rate: int | None = None,
+        priority: int = INTERACTIVE,
+    ) -> DoubaoTTSClient:
+        if self._closed:
+            raise Exception("pool is closed")
+
+        client = None
+        dead = []
+        # 截止时间只计算一次，被唤醒后没抢到连接时只等剩余的时间
+        deadline = (
+            None
+            if self.acquire_timeout is None
+            else asyncio.get_running_loop().time() + self.acquire_timeout
+        )
+        async with self._cond:
+            while True:
+                if self._closed:
+                    raise Exception("pool is closed")
+                while self._idle:
+                    candidate = self._idle.pop()
+                    if candidate.is_connected:
+                        client = candidate
+                        break
+                    self._size -= 1
+                    dead.append(candidate)
+                if client is not None or self._size < self.max_size:
+                    break
+                if deadline is None:
+                    await self._cond.wait()
+                    continue
+                remaining = deadline - asyncio.get_running_loop().time()
+                if remaining <= 0:
+                    raise Exception("no idle connection in pool")
+                try:
+                    await asyncio.wait_for(self._cond.wait(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    raise Exception("no idle connection in pool")
+            if client is None:
+                self._size += 1
+
+        for candidate in dead:
+            await self._close_client(candidate)
+
+        if client is None:
+            try:
+                client = await self._open()
+            except BaseException:
+                async with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                raise
+
+        client.callback = callback or ResultCallback()
+        client.speaker = speaker or self.speaker
+        client.audio_format = audio_format or self.audio_format
+        client.sample_rate = sample_rate or self.sample_rate
+        client.priority = priority
+        return client
+
+    async def release(self, client: DoubaoTTSClient):
+        if client._is_started:
+            try:
+                await client.streaming_cancel()
+            except Exception:
+                pass
+        client._reset_session()
+        client.callback = ResultCallback()
+
+        if self._closed or not client.is_connected:
+            await self._discard(client)
+            return
+
+        async with self._cond:
+            self._idle.append(client)
+            self._last_used[client] = asyncio.get_running_loop().time()
+            self._cond.notify()
+
+    @contextlib.asynccontextmanager
+    async def session(
+        self,
+        callback: ResultCallback | None = None,
+        speaker: str | None = None,
+        audio_format: str | None = None,
+        sample_rate: int | None = None,
+        priority: int = INTERACTIVE,
+    ):
+        client = await self.acquire(
+            callback, speaker, audio_format, sample_rate, priority
+        )
+        try:
+            yield client
+        finally:
+            await self.release(client)
+
+    async def close(self):
+        self._closed = True
+        if self._health_task:
+            self._health_task.cancel()
+            try:
+                await self._health_task
+            except asyncio.CancelledError:
+                pass
+            self._health_task = None
+        async with self._cond:
+            clients = list(self._idle)
+            self._idle.clear()
+            self._size -= len(clients)
+            self._cond.notify_all()
+        for client in clients:
+            await self._close_client(client)
+
+    async def __aenter__(self):
+        try:
+            await self.start()
+        except BaseException:
+            # 部分建好的连接也要关闭
+            await self.close()
+            raise
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
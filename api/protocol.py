@@ -0,0 +1,356 @@
+import functools
+import gzip
+import json
+import struct
+
+PROTOCOL_VERSION = 0b0001
+DEFAULT_HEADER_SIZE = 0b0001
+
+# Message Type:
+FULL_CLIENT_REQUEST = 0b0001
+AUDIO_ONLY_RESPONSE = 0b1011
+FULL_SERVER_RESPONSE = 0b1001
+ERROR_INFORMATION = 0b1111
+
+# Message Type Specific Flags
+MsgTypeFlagNoSeq = 0b0000  # Non-terminal packet with no sequence
+MsgTypeFlagPositiveSeq = 0b1  # Non-terminal packet with sequence > 0
+MsgTypeFlagLastNoSeq = 0b10  # last packet with no sequence
+MsgTypeFlagNegativeSeq = 0b11  # Payload contains event number (int32)
+MsgTypeFlagWithEvent = 0b100
+# Message Serialization
+NO_SERIALIZATION = 0b0000
+JSON = 0b0001
+# Message Compression
+COMPRESSION_NO = 0b0000
+COMPRESSION_GZIP = 0b0001
+
+EVENT_NONE = 0
+EVENT_Start_Connection = 1
+
+EVENT_FinishConnection = 2
+
+EVENT_ConnectionStarted = 50  # 成功建连
+
+EVENT_ConnectionFailed = 51  # 建连失败（可能是无法通过权限认证）
+
+EVENT_ConnectionFinished = 52  # 连接结束
+
+# 上行Session事件
+EVENT_StartSession = 100
+
+EVENT_FinishSession = 102
+# 下行Session事件
+EVENT_SessionStarted = 150
+EVENT_SessionFinished = 152
+
+EVENT_SessionFailed = 153
+
+# 上行通用事件
+EVENT_TaskRequest = 200
+
+# 下行TTS事件
+EVENT_TTSSentenceStart = 350
+
+EVENT_TTSSentenceEnd = 351
+
+EVENT_TTSResponse = 352
+
+_I32 = struct.Struct(">i")
+_U32 = struct.Struct(">I")
+
+# 各事件在 event 之后携带的字段：(是否带 session id, 是否带 meta, 是否带 payload)
+_LAYOUTS = {
+    EVENT_ConnectionStarted: (False, False, False),
+    EVENT_ConnectionFailed: (False, True, False),
+    EVENT_SessionStarted: (True, True, False),
+    EVENT_SessionFailed: (True, True, False),
+    EVENT_SessionFinished: (True, True, False),
+    EVENT_TTSResponse: (True, False, True),
+    EVENT_TTSSentenceStart: (True, False, True),
+    EVENT_TTSSentenceEnd: (True, False, True),
+}
+
+
+class Frame:
+    """服务端帧。session_id/meta/payload 都是原始报文上的 memoryview，不做拷贝"""
+
+    __slots__ = (
+        "message_type",
+        "flags",
+        "serialization",
+        "compression",
+        "event",
+        "error_code",
+        "raw_session_id",
+        "raw_connection_id",
+        "meta",
+        "payload",
+    )
+
+    def __init__(self, message_type, flags, serialization, compression):
+        self.message_type = message_type
+        self.flags = flags
+        self.serialization = serialization
+        self.compression = compression
+        self.event = EVENT_NONE
+        self.error_code = 0
+        self.raw_session_id = None
+        self.raw_connection_id = None
+        self.meta = None
+        self.payload = None
+
+    @property
+    def session_id(self) -> str | None:
+        if self.raw_session_id is None:
+            return None
+        return str(self.raw_session_id, "utf8")
+
+    @property
+    def connection_id(self) -> str | None:
+        if self.raw_connection_id is None:
+            return None
+        return str(self.raw_connection_id, "utf8")
+
+    @property
+    def meta_json(self) -> str | None:
+        if self.meta is None:
+            return None
+        return str(self.meta, "utf8")
+
+    @property
+    def payload_json(self) -> str | None:
+        if self.payload is None or self.serialization != JSON:
+            return None
+        return str(self.payload, "utf8")
+
+
+def decode_frame(data: bytes) -> Frame:
+    view = memoryview(data)
+    b1 = data[1]
+    b2 = data[2]
+    frame = Frame(b1 >> 4, b1 & 0x0F, b2 >> 4, b2 & 0x0F)
+    offset = (data[0] & 0x0F) * 4
+    message_type = frame.message_type
+
+    if message_type == FULL_SERVER_RESPONSE or message_type == AUDIO_ONLY_RESPONSE:
+        if frame.flags != MsgTypeFlagWithEvent:
+            return frame
+        event = _I32.unpack_from(data, offset)[0]
+        offset += 4
+        frame.event = event
+        layout = _LAYOUTS.get(event)
+        if layout is None:
+            return frame
+        if event == EVENT_ConnectionStarted:
+            size = _U32.unpack_from(data, offset)[0]
+            offset += 4
+            frame.raw_connection_id = view[offset : offset + size]
+            return frame
+        with_session, with_meta, with_payload = layout
+        if with_session:
+            size = _U32.unpack_from(data, offset)[0]
+            offset += 4
+            frame.raw_session_id = view[offset : offset + size]
+            offset += size
+        if with_meta:
+            size = _U32.unpack_from(data, offset)[0]
+            offset += 4
+            frame.meta = view[offset : offset + size]
+            offset += size
+        if with_payload:
+            size = _U32.unpack_from(data, offset)[0]
+            offset += 4
+            frame.payload = view[offset : offset + size]
+    elif message_type == ERROR_INFORMATION:
+        frame.error_code = _I32.unpack_from(data, offset)[0]
+        offset += 4
+        size = _U32.unpack_from(data, offset)[0]
+        offset += 4
+        frame.payload = view[offset : offset + size]
+    return frame
+
+
+def peek_event(data: bytes) -> int:
+    """只读 header 和 event 字段，不解析帧的其余部分"""
+    if data[1] & 0x0F != MsgTypeFlagWithEvent:
+        return EVENT_NONE
+    return _I32.unpack_from(data, (data[0] & 0x0F) * 4)[0]
+
+
+# 客户端上行帧中带 session id 的事件
+_CLIENT_SESSION_EVENTS = {EVENT_StartSession, EVENT_FinishSession, EVENT_TaskRequest}
+
+
+def decode_client_frame(data: bytes) -> Frame:
+    """解析客户端发出的帧（供本地 mock 服务端和抓包回放使用）"""
+    view = memoryview(data)
+    b1 = data[1]
+    b2 = data[2]
+    frame = Frame(b1 >> 4, b1 & 0x0F, b2 >> 4, b2 & 0x0F)
+    offset = (data[0] & 0x0F) * 4
+    if frame.flags == MsgTypeFlagWithEvent:
+        frame.event = _I32.unpack_from(data, offset)[0]
+        offset += 4
+        if frame.event in _CLIENT_SESSION_EVENTS:
+            size = _U32.unpack_from(data, offset)[0]
+            offset += 4
+            frame.raw_session_id = view[offset : offset + size]
+            offset += size
+    size = _U32.unpack_from(data, offset)[0]
+    offset += 4
+    frame.payload = view[offset : offset + size]
+    return frame
+
+
+def encode_server_frame(
+    message_type: int,
+    event: int,
+    session_id: bytes | None = None,
+    meta: bytes | None = None,
+    payload: bytes | None = None,
+    connection_id: bytes | None = None,
+    serialization: int = JSON,
+    compression: int = COMPRESSION_NO,
+) -> bytes:
+    """按 decode_frame 的布局构造服务端帧"""
+    parts = [
+        header_bytes(message_type, MsgTypeFlagWithEvent, serialization, compression),
+        _I32.pack(event),
+    ]
+    for field in (connection_id, session_id, meta, payload):
+        if field is not None:
+            parts.append(_U32.pack(len(field)))
+            parts.append(field)
+    return b"".join(parts)
+
+
+@functools.lru_cache(maxsize=None)
+def header_bytes(
+    message_type: int,
+    flags: int,
+    serialization: int = NO_SERIALIZATION,
+    compression: int = COMPRESSION_NO,
+) -> bytes:
+    return bytes(
+        [
+            (PROTOCOL_VERSION << 4) | DEFAULT_HEADER_SIZE,
+            (message_type << 4) | flags,
+            (serialization << 4) | compression,
+            0,
+        ]
+    )
+
+
+GZIP_LEVEL = 6
+
+_TEXT_PLACEHOLDER = "\x00text\x00"
+
+
+class FrameEncoder:
+    """预编译 TaskRequest 帧：header、session 前缀和 JSON 模板都只构造一次，
+    每个文本片段只需转义文本并拼进一块预分配的缓冲区"""
+
+    __slots__ = (
+        "uid",
+        "compression_threshold",
+        "_prefix",
+        "_session",
+        "_before",
+        "_after",
+    )
+
+    def __init__(self, uid: str, compression_threshold: int | None = None):
+        self.uid = uid
+        # payload 达到该字节数时用 gzip 压缩，None 表示不压缩
+        self.compression_threshold = compression_threshold
+        self._prefix = b""
+        self._session = b""
+        self._before = b""
+        self._after = b""
+
+    def start_session(
+        self,
+        session_id: str,
+        speaker: str,
+        audio_format: str = "pcm",
+        audio_sample_rate: int = 24000,
+    ):
+        session_id_bytes = session_id.encode()
+        self._session = b"".join(
+            [
+                _I32.pack(EVENT_TaskRequest),
+                _U32.pack(len(session_id_bytes)),
+                session_id_bytes,
+            ]
+        )
+        self._prefix = (
+            header_bytes(FULL_CLIENT_REQUEST, MsgTypeFlagWithEvent, JSON)
+            + self._session
+        )
+        # 与 Request.get_payload_bytes 的输出逐字节一致
+        template = json.dumps(
+            {
+                "user": {"uid": self.uid},
+                "event": EVENT_TaskRequest,
+                "namespace": "BidirectionalTTS",
+                "req_params": {
+                    "text": _TEXT_PLACEHOLDER,
+                    "speaker": speaker,
+                    "audio_params": {
+                        "format": audio_format,
+                        "sample_rate": audio_sample_rate,
+                    },
+                },
+            }
+        ).encode()
+        self._before, self._after = template.split(
+            json.dumps(_TEXT_PLACEHOLDER).encode()
+        )
+
+    def task_request(self, text: str) -> bytearray:
+        prefix = self._prefix
+        before = self._before
+        after = self._after
+        quoted = json.dumps(text).encode()
+
+        payload_size = len(before) + len(quoted) + len(after)
+        threshold = self.compression_threshold
+        if threshold is not None and payload_size >= threshold:
+            return self._compressed(before + quoted + after)
+
+        offset = len(prefix)
+        frame = bytearray(offset + 4 + payload_size)
+        frame[:offset] = prefix
+        _U32.pack_into(frame, offset, payload_size)
+        offset += 4
+        frame[offset : offset + len(before)] = before
+        offset += len(before)
+        frame[offset : offset + len(quoted)] = quoted
+        offset += len(quoted)
+        frame[offset:] = after
+        return frame
+
+    def _compressed(self, payload: bytes) -> bytes:
+        payload = gzip.compress(payload, compresslevel=GZIP_LEVEL, mtime=0)
+        return b"".join(
+            [
+                header_bytes(
+                    FULL_CLIENT_REQUEST, MsgTypeFlagWithEvent, JSON, COMPRESSION_GZIP
+                ),
+                self._session,
+                _U32.pack(len(payload)),
+                payload,
+            ]
+        )
+
+
+def decompress_frame(frame: Frame) -> Frame:
+    """按 header 中的压缩位就地解压 payload / meta"""
+    if frame.compression == COMPRESSION_GZIP:
+        if frame.payload is not None:
+            frame.payload = memoryview(gzip.decompress(frame.payload))
+        if frame.meta is not None:
+            frame.meta = memoryview(gzip.decompress(frame.meta))
+        frame.compression = COMPRESSION_NO
+    return frame
@@ -0,0 +1,115 @@
+from collections import deque
+
+
+class ReplayTracker:
+    """按句子记录当前 session 已发送、但还没有合成完的文本。
+
+    连接意外断开后，客户端在新 session 上按原来的分帧只重放 replay() 返回的文本；
+    服务端重新合成时，消费端已经收到的整句和半句音频会被丢弃，同一句话不会听到两次。
+    半句按已收到的音频字节数跳过，依赖服务端对相同文本给出相同的切句。
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self, enabled: bool = True):
+        # 不重连的 session 不记录文本，也不解析 TTSSentenceEnd
+        self.enabled = enabled
+        # 最后一个能定位到的 TTSSentenceEnd 之后发送的文本，保留原来的分帧；
+        # 第一帧的前 _head 个字符已经合成完
+        self.unacked: deque[str] = deque()
+        self._head = 0
+        # 未确认文本拼接成的字符串，_pos 之前的部分已经合成完；_new 为还没有拼接进来的帧
+        self._text = ""
+        self._pos = 0
+        self._new: list[str] = []
+        # unacked 开头已经合成完、但无法在文本中定位的句子数
+        self._unmatched = 0
+        self._in_sentence = False
+        self._sentence_bytes = 0
+        # 重放时需要丢弃的整句数、半句的字节数
+        self._skip_sentences = 0
+        self._skip_partial: int | None = None
+        self._skip_bytes = 0
+        self._skipping = False
+
+    def sent(self, text: str):
+        if self.enabled:
+            self.unacked.append(text)
+            self._new.append(text)
+
+    def _ack(self, count: int):
+        # 丢弃未确认文本开头的 count 个字符
+        self._pos += count
+        while count > 0 and self.unacked:
+            rest = len(self.unacked[0]) - self._head
+            if rest <= count:
+                count -= rest
+                self.unacked.popleft()
+                self._head = 0
+            else:
+                self._head += count
+                count = 0
+
+    def _match(self, event):
+        sentence = event.text.strip() if event is not None else ""
+        index = -1
+        if sentence and not self._unmatched:
+            if self._new:
+                # 只在有新文本时拼接一次，并丢掉已确认的前缀
+                self._text = self._text[self._pos :] + "".join(self._new)
+                self._pos = 0
+                self._new = []
+            index = self._text.find(sentence, self._pos)
+        if index >= 0:
+            self._ack(index + len(sentence) - self._pos)
+        else:
+            self._unmatched += 1
+
+    def replay(self) -> list[str]:
+        self._skip_sentences = self._unmatched
+        self._skip_partial = self._sentence_bytes if self._in_sentence else None
+        self._skip_bytes = 0
+        self._skipping = False
+        frames = list(self.unacked)
+        if frames and self._head:
+            frames[0] = frames[0][self._head :]
+        return frames
+
+    def sentence_start(self) -> bool:
+        """返回 False 表示这是重放的重复句子，不应交给消费端"""
+        if self._skip_sentences:
+            self._skipping = True
+            return False
+        if self._skip_partial is not None:
+            self._skip_bytes = self._skip_partial
+            self._skip_partial = None
+            return False
+        self._in_sentence = True
+        self._sentence_bytes = 0
+        return True
+
+    def audio(self, payload):
+        """返回应交给消费端的音频，整帧都已收到过时返回 None"""
+        if self._skipping:
+            return None
+        if self._skip_bytes:
+            if len(payload) <= self._skip_bytes:
+                self._skip_bytes -= len(payload)
+                return None
+            payload = payload[self._skip_bytes :]
+            self._skip_bytes = 0
+        self._sentence_bytes += len(payload)
+        return payload
+
+    def sentence_end(self, event) -> bool:
+        """event 为 SentenceEvent，到达时即按当前位置确认已合成完的文本"""
+        if self._skipping:
+            self._skipping = False
+            self._skip_sentences -= 1
+            return False
+        self._skip_bytes = 0
+        self._in_sentence = False
+        if self.enabled:
+            self._match(event)
+        return True
@@ -0,0 +1,23 @@
+import random
+
+
+class Backoff:
+    """指数退避：第 n 次重试前等待 base * factor ** n 秒，带随机抖动，不超过 max_delay"""
+
+    def __init__(
+        self,
+        base: float = 0.5,
+        factor: float = 2.0,
+        max_delay: float = 30.0,
+        jitter: float = 0.2,
+    ):
+        self.base = base
+        self.factor = factor
+        self.max_delay = max_delay
+        self.jitter = jitter
+
+    def delay(self, attempt: int) -> float:
+        delay = min(self.base * self.factor**attempt, self.max_delay)
+        if self.jitter:
+            delay *= 1 + random.uniform(-self.jitter, self.jitter)
+        return max(delay, 0.0)
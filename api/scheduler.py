@@ -0,0 +1,241 @@
+"""按 app_id 的配额调度：限制同时进行的 session 数和每秒字符数。
+
+火山引擎按 app 限制并发和字符速率，超出时只会收到 ConnectionFailed / SessionFailed。
+QuotaScheduler 在客户端侧排队：交互请求优先于批量请求，
+收到限流错误时按乘性减小限额，之后一段时间没有限流再逐步恢复（AIMD）。
+
+    scheduler = scheduler_for(app_id, max_sessions=20, chars_per_second=3000)
+    pool = DoubaoTTSPool(uid, app_id, token, url, speaker, scheduler=scheduler)
+    async with pool.session(priority=BATCH) as client:
+        ...
+"""
+
+import asyncio
+import heapq
+import itertools
+import json
+import time
+
+# 数值越小越优先
+INTERACTIVE = 0
+BATCH = 10
+
+_THROTTLE_KEYWORDS = (
+    "quota",
+    "rate limit",
+    "too many",
+    "concurren",
+    "qps",
+    "限流",
+    "超限",
+    "频率",
+    "并发",
+)
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now: float | None = None):
+        now = time.monotonic() if now is None else now
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        return max(0.0, (amount - self.tokens) / self.rate)
+
+
+class QuotaScheduler:
+    def __init__(
+        self,
+        max_sessions: int = 10,
+        chars_per_second: float | None = None,
+        burst_seconds: float = 1.0,
+        min_sessions: int = 1,
+        decrease_factor: float = 0.5,
+        recovery_interval: float = 5.0,
+        throttle_codes=(),
+    ):
+        self.max_sessions = max_sessions
+        self.min_sessions = min_sessions
+        # 当前生效的并发上限，限流时减小，恢复期后逐步加回 max_sessions
+        self.session_limit = max_sessions
+        self.active = 0
+
+        self.chars_per_second = chars_per_second
+        self._chars = None
+        if chars_per_second:
+            self._chars = TokenBucket(
+                chars_per_second, chars_per_second * burst_seconds
+            )
+
+        self.decrease_factor = decrease_factor
+        self.recovery_interval = recovery_interval
+        self.throttle_codes = set(throttle_codes)
+        self._last_change = time.monotonic()
+
+        self._waiters: list = []
+        self._seq = itertools.count()
+        # 等待令牌的请求按 (priority, seq) 排队，只有队首按令牌桶计时等待
+        self._char_waiters: list = []
+        self._char_timer: asyncio.TimerHandle | None = None
+
+        self.queued = 0
+        self.throttled = 0
+
+    @property
+    def char_rate(self) -> float | None:
+        return self._chars.rate if self._chars else None
+
+    async def acquire_session(self, priority: int = INTERACTIVE):
+        """占用一个 session 名额，名额不足时按优先级排队"""
+        if self.active < self.session_limit and not self._waiters:
+            self.active += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        self.queued += 1
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # 名额已经分配给这个请求，归还给下一个
+                self.release_session()
+            raise
+        finally:
+            self.queued -= 1
+
+    def release_session(self):
+        self.active -= 1
+        self._wake()
+
+    def _wake(self):
+        while self._waiters and self.active < self.session_limit:
+            _, _, future = heapq.heappop(self._waiters)
+            if future.done():
+                continue
+            self.active += 1
+            future.set_result(None)
+
+    async def consume(self, chars: int, priority: int = INTERACTIVE):
+        """发送文本前按字符数取令牌，高优先级请求在等待时低优先级请求让路"""
+        bucket = self._chars
+        if bucket is None or chars <= 0:
+            return
+        if not self._char_waiters:
+            bucket.refill()
+            # 超过桶容量的文本允许透支，之后的请求多等一会
+            if bucket.tokens >= min(chars, bucket.capacity):
+                bucket.tokens -= chars
+                return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._char_waiters, (priority, next(self._seq), chars, future))
+        self._wake_chars()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # 令牌已经扣除，退回给后面的请求
+                bucket.tokens += chars
+            self._wake_chars()
+            raise
+
+    def _wake_chars(self):
+        """按优先级发放令牌，不够时为队首设置一个定时器，不轮询"""
+        if self._char_timer is not None:
+            self._char_timer.cancel()
+            self._char_timer = None
+        bucket = self._chars
+        waiters = self._char_waiters
+        while waiters:
+            _, _, chars, future = waiters[0]
+            if future.done():
+                heapq.heappop(waiters)
+                continue
+            bucket.refill()
+            needed = min(chars, bucket.capacity)
+            if bucket.tokens < needed:
+                self._char_timer = future.get_loop().call_later(
+                    bucket.wait_time(needed), self._wake_chars
+                )
+                return
+            heapq.heappop(waiters)
+            bucket.tokens -= chars
+            future.set_result(None)
+
+    def is_throttle(self, meta) -> bool:
+        """判断 ConnectionFailed / SessionFailed 的 meta 是否是配额或限流错误"""
+        if meta is None:
+            return False
+        try:
+            info = json.loads(meta) if isinstance(meta, (str, bytes)) else meta
+        except ValueError:
+            info = {"message": str(meta)}
+        if not isinstance(info, dict):
+            info = {"message": str(info)}
+        if info.get("status_code") in self.throttle_codes:
+            return True
+        message = str(info.get("message", "")).lower()
+        return any(keyword in message for keyword in _THROTTLE_KEYWORDS)
+
+    def report_throttled(self):
+        """乘性减小：同一个恢复期内的多次限流只减一次"""
+        now = time.monotonic()
+        self.throttled += 1
+        if now - self._last_change < 1.0 and self.session_limit < self.max_sessions:
+            return
+        self._last_change = now
+        self.session_limit = max(
+            self.min_sessions, int(self.session_limit * self.decrease_factor)
+        )
+        if self._chars is not None:
+            self._chars.refill(now)
+            self._chars.rate = max(
+                self._chars.rate * self.decrease_factor, self.chars_per_second * 0.05
+            )
+            self._wake_chars()
+
+    def report_success(self):
+        """加性恢复：距离上次调整超过 recovery_interval 时放宽一步"""
+        now = time.monotonic()
+        if now - self._last_change < self.recovery_interval:
+            return
+        changed = False
+        if self.session_limit < self.max_sessions:
+            self.session_limit += 1
+            changed = True
+        if self._chars is not None and self._chars.rate < self.chars_per_second:
+            self._chars.refill(now)
+            self._chars.rate = min(
+                self.chars_per_second, self._chars.rate + self.chars_per_second * 0.1
+            )
+            changed = True
+        if changed:
+            self._last_change = now
+            self._wake()
+            if self._chars is not None:
+                self._wake_chars()
+
+    def stats(self) -> dict:
+        return {
+            "active": self.active,
+            "queued": self.queued,
+            "session_limit": self.session_limit,
+            "char_rate": self.char_rate,
+            "throttled": self.throttled,
+        }
+
+
+_schedulers: dict[str, QuotaScheduler] = {}
+
+
+def scheduler_for(app_id: str, **options) -> QuotaScheduler:
+    """同一个 app_id 共享一个调度器，options 只在第一次创建时生效"""
+    scheduler = _schedulers.get(app_id)
+    if scheduler is None:
+        scheduler = _schedulers[app_id] = QuotaScheduler(**options)
+    return scheduler
@@ -0,0 +1,156 @@
+import asyncio
+
+# 句末标点：遇到即可断句
+_STRONG = set("。！？!?；;….\n")
+# 句中标点：长度足够时也可以在这里断开
+_WEAK = set("，、：,:—")
+_CLOSING = set("”’」』）)]\"'")
+
+
+class TextSegmenter:
+    """把大模型逐 token 输出的文本片段合并成按标点和长度切分的文本块。
+
+    首块尽早发出以缩短首包音频延迟：达到 first_min_chars 后遇到任意标点即发出，
+    超过 first_max_chars 或 first_timeout 秒内没有新片段时强制发出。
+    之后的块尽量大以减少帧数：达到 min_chars 后在句末标点处发出，
+    超过 max_chars 时退而在句中标点或空白处切开。
+    """
+
+    def __init__(
+        self,
+        first_min_chars: int = 4,
+        first_max_chars: int = 30,
+        first_timeout: float | None = 0.3,
+        min_chars: int = 40,
+        max_chars: int = 200,
+    ):
+        self.first_min_chars = first_min_chars
+        self.first_max_chars = first_max_chars
+        self.first_timeout = first_timeout
+        self.min_chars = min_chars
+        self.max_chars = max_chars
+        self._buffer = ""
+        self._first = True
+
+    def reset(self):
+        self._buffer = ""
+        self._first = True
+
+    @staticmethod
+    def _is_boundary(text: str, index: int, marks: set) -> bool:
+        char = text[index]
+        if char not in marks:
+            return False
+        if char in ".,:" and index + 1 < len(text):
+            # 3.14、1,000 这类数字中的符号不是断句点
+            return not text[index + 1].isalnum()
+        return True
+
+    def _find_cut(self, text: str, start: int, marks: set, last: bool = True) -> int:
+        # 返回断点之后的位置（last 为 False 时取第一个断点），没有则返回 -1
+        cut = -1
+        for index in range(start, len(text)):
+            if self._is_boundary(text, index, marks):
+                end = index + 1
+                while end < len(text) and text[end] in _CLOSING:
+                    end += 1
+                cut = end
+                if not last:
+                    break
+        return cut
+
+    def _next_chunk(self) -> str | None:
+        text = self._buffer
+        if self._first:
+            min_chars, max_chars = self.first_min_chars, self.first_max_chars
+            marks = _STRONG | _WEAK
+        else:
+            min_chars, max_chars = self.min_chars, self.max_chars
+            marks = _STRONG
+
+        if len(text) < min_chars:
+            return None
+
+        cut = self._find_cut(
+            text[:max_chars], min_chars - 1, marks, last=not self._first
+        )
+        if cut == -1 and len(text) > max_chars:
+            cut = self._find_cut(text[:max_chars], 0, _STRONG | _WEAK)
+            if cut == -1:
+                space = text.rfind(" ", 0, max_chars)
+                cut = space + 1 if space > 0 else max_chars
+        if cut == -1:
+            return None
+
+        # 英文句号等标点必须确认后面不是数字，尾部的 "." 需要等下一个片段
+        if cut == len(text) and text[-1] in ".,:":
+            return None
+
+        self._first = False
+        self._buffer = text[cut:].lstrip(" ")
+        return text[:cut]
+
+    def feed(self, delta: str) -> list[str]:
+        self._buffer += delta
+        chunks = []
+        while True:
+            chunk = self._next_chunk()
+            if chunk is None:
+                return chunks
+            if chunk.strip():
+                chunks.append(chunk)
+
+    def flush(self) -> str | None:
+        text, self._buffer = self._buffer, ""
+        if not text.strip():
+            return None
+        self._first = False
+        return text
+
+    async def segment(self, deltas):
+        """async for chunk in segmenter.segment(llm_deltas): ..."""
+        self.reset()
+        if self.first_timeout is None:
+            async for delta in deltas:
+                for chunk in self.feed(delta):
+                    yield chunk
+            tail = self.flush()
+            if tail:
+                yield tail
+            return
+
+        # 首块需要超时控制，用单独的任务读取上游，避免取消上游的 __anext__
+        queue: asyncio.Queue = asyncio.Queue()
+        done = object()
+
+        async def pump():
+            try:
+                async for delta in deltas:
+                    await queue.put(delta)
+            finally:
+                await queue.put(done)
+
+        task = asyncio.create_task(pump())
+        try:
+            while True:
+                if self._first and self._buffer:
+                    try:
+                        delta = await asyncio.wait_for(queue.get(), self.first_timeout)
+                    except asyncio.TimeoutError:
+                        chunk = self.flush()
+                        if chunk:
+                            yield chunk
+                        continue
+                else:
+                    delta = await queue.get()
+                if delta is done:
+                    break
+                for chunk in self.feed(delta):
+                    yield chunk
+            await task
+            tail = self.flush()
+            if tail:
+                yield tail
+        finally:
+            if not task.done():
+                task.cancel()
@@ -0,0 +1,76 @@
+import asyncio
+from collections import deque
+
+AUDIO = "audio"
+SENTENCE_START = "sentence_start"
+SENTENCE_END = "sentence_end"
+
+
+class StreamChunk:
+    __slots__ = ("kind", "data")
+
+    def __init__(self, kind: str, data):
+        self.kind = kind
+        self.data = data
+
+    def __repr__(self):
+        return f"StreamChunk({self.kind!r}, {len(self.data or b'')} bytes)"
+
+
+class ChunkQueue:
+    """按字节数限流的队列：缓冲超过 max_bytes 时 put 会阻塞，读 socket 的协程随之暂停"""
+
+    def __init__(self, max_bytes: int = 256 * 1024):
+        self.max_bytes = max_bytes
+        self._items: deque[StreamChunk] = deque()
+        self._bytes = 0
+        self._readable = asyncio.Event()
+        self._writable = asyncio.Event()
+        self._writable.set()
+        self._done = False
+        self._closed = False
+        self._error: BaseException | None = None
+
+    @property
+    def buffered_bytes(self) -> int:
+        return self._bytes
+
+    async def put(self, kind: str, data):
+        while self._bytes >= self.max_bytes and not self._closed:
+            await self._writable.wait()
+        if self._closed or self._done:
+            return
+        self._items.append(StreamChunk(kind, data))
+        self._bytes += len(data) if data else 0
+        if self._bytes >= self.max_bytes:
+            self._writable.clear()
+        self._readable.set()
+
+    def finish(self, error: BaseException | None = None):
+        if self._done:
+            return
+        self._done = True
+        self._error = error
+        self._readable.set()
+
+    def close(self):
+        # 消费端放弃读取，丢弃缓冲并放行所有阻塞中的 put
+        self._closed = True
+        self._items.clear()
+        self._bytes = 0
+        self._writable.set()
+
+    async def get(self) -> StreamChunk | None:
+        while not self._items:
+            if self._done:
+                if self._error is not None:
+                    raise self._error
+                return None
+            self._readable.clear()
+            await self._readable.wait()
+        chunk = self._items.popleft()
+        self._bytes -= len(chunk.data) if chunk.data else 0
+        if self._bytes < self.max_bytes:
+            self._writable.set()
+        return chunk
+
@@ -0,0 +1,233 @@
+"""同步接口：给 WSGI、Celery 等线程模型的调用方使用。
+
+SyncTTSClient 持有一个后台事件循环线程和一个连接池，任意线程都可以并发调用，
+请求在少量长连接上复用，不需要每次 asyncio.run() 重新建循环、建连和鉴权：
+
+    with SyncTTSClient(uid, app_id, token, url, speaker, max_size=4) as tts:
+        audio = tts.synthesize("您好，欢迎致电。").result()
+        for chunk in tts.stream("正在为您转接人工客服。"):
+            ...
+"""
+
+import asyncio
+import concurrent.futures
+import threading
+from collections import deque
+
+from .pool import DoubaoTTSPool
+from .stream import AUDIO, StreamChunk
+
+_DONE = object()
+
+
+class _ChunkBridge:
+    """事件循环到调用线程的按字节数限流的队列。
+
+    事件循环一侧缓冲超过 max_bytes 时等待，调用线程读走数据后再唤醒，
+    读得慢的调用方不会让音频在内存中无限堆积。
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, max_bytes: int):
+        self._loop = loop
+        self.max_bytes = max_bytes
+        self._items: deque = deque()
+        self._bytes = 0
+        self._cond = threading.Condition()
+        self._space: asyncio.Future | None = None
+        self._error: BaseException | None = None
+
+    async def put(self, chunk: StreamChunk):
+        size = len(chunk.data) if chunk.data else 0
+        while True:
+            with self._cond:
+                if self._bytes < self.max_bytes:
+                    self._items.append(chunk)
+                    self._bytes += size
+                    self._cond.notify()
+                    return
+                self._space = self._loop.create_future()
+            await self._space
+
+    def finish(self, error: BaseException | None = None):
+        with self._cond:
+            self._error = error
+            self._items.append(_DONE)
+            self._cond.notify()
+
+    def get(self, timeout: float | None = None) -> StreamChunk | None:
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._items, timeout):
+                raise TimeoutError("no audio received within timeout")
+            item = self._items.popleft()
+            if item is _DONE:
+                if self._error is not None:
+                    raise self._error
+                return None
+            self._bytes -= len(item.data) if item.data else 0
+            space, self._space = self._space, None
+        if space is not None:
+            self._loop.call_soon_threadsafe(_resolve, space)
+        return item
+
+
+def _resolve(future: asyncio.Future):
+    if not future.done():
+        future.set_result(None)
+
+
+class SyncTTSClient:
+    def __init__(
+        self,
+        uid: str,
+        app_id: str,
+        token: str,
+        url: str,
+        speaker: str,
+        min_size: int = 1,
+        max_size: int = 10,
+        max_buffer_bytes: int = 256 * 1024,
+        **pool_options,
+    ):
+        self.max_buffer_bytes = max_buffer_bytes
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="doubao-tts-loop", daemon=True
+        )
+        self._thread.start()
+        self._closed = False
+        try:
+            self.pool: DoubaoTTSPool = self._submit(
+                self._open_pool(
+                    uid, app_id, token, url, speaker, min_size, max_size, pool_options
+                )
+            ).result()
+        except BaseException:
+            self._stop_loop()
+            raise
+
+    @staticmethod
+    async def _open_pool(
+        uid, app_id, token, url, speaker, min_size, max_size, pool_options
+    ):
+        # 连接池里的锁和事件必须在后台循环中创建
+        pool = DoubaoTTSPool(
+            uid,
+            app_id,
+            token,
+            url,
+            speaker,
+            min_size=min_size,
+            max_size=max_size,
+            **pool_options,
+        )
+        await pool.start()
+        return pool
+
+    def _submit(self, coro) -> concurrent.futures.Future:
+        if self._closed:
+            coro.close()
+            raise Exception("client is closed")
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    async def _text_source(self, text):
+        # 同步迭代器（例如大模型的流式输出）在线程池中逐个读取，不阻塞事件循环
+        iterator = iter(text)
+        while True:
+            delta = await self._loop.run_in_executor(None, next, iterator, _DONE)
+            if delta is _DONE:
+                return
+            yield delta
+
+    async def _produce(self, bridge: _ChunkBridge, text, session_options: dict):
+        if not isinstance(text, str):
+            text = self._text_source(text)
+        try:
+            async with self.pool.session(**session_options) as client:
+                async for chunk in client.synthesize(text, self.max_buffer_bytes):
+                    await bridge.put(chunk)
+        except asyncio.CancelledError:
+            bridge.finish(Exception("synthesis is cancelled"))
+            raise
+        except BaseException as e:
+            bridge.finish(e)
+            return
+        bridge.finish()
+
+    def stream(
+        self,
+        text,
+        speaker: str | None = None,
+        audio_format: str | None = None,
+        sample_rate: int | None = None,
+        timeout: float | None = None,
+    ):
+        """阻塞迭代器，产出 StreamChunk。
+
+        text 可以是字符串或文本片段的同步迭代器；timeout 为等待下一个数据块的最长时间。
+        提前退出循环时会结束服务端的 session。
+        """
+        bridge = _ChunkBridge(self._loop, self.max_buffer_bytes)
+        future = self._submit(
+            self._produce(
+                bridge,
+                text,
+                {
+                    "speaker": speaker,
+                    "audio_format": audio_format,
+                    "sample_rate": sample_rate,
+                },
+            )
+        )
+        try:
+            while True:
+                chunk = bridge.get(timeout)
+                if chunk is None:
+                    return
+                yield chunk
+        finally:
+            future.cancel()
+
+    async def _collect(self, text, session_options: dict) -> bytes:
+        audio = bytearray()
+        async with self.pool.session(**session_options) as client:
+            async for chunk in client.synthesize(text, self.max_buffer_bytes):
+                if chunk.kind == AUDIO:
+                    audio += chunk.data
+        return bytes(audio)
+
+    def synthesize(
+        self,
+        text: str,
+        speaker: str | None = None,
+        audio_format: str | None = None,
+        sample_rate: int | None = None,
+    ) -> concurrent.futures.Future:
+        """提交合成任务，返回 concurrent.futures.Future，结果为完整的音频 bytes"""
+        return self._submit(
+            self._collect(
+                text,
+                {
+                    "speaker": speaker,
+                    "audio_format": audio_format,
+                    "sample_rate": sample_rate,
+                },
+            )
+        )
+
+    def _stop_loop(self):
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    def close(self):
+        if self._closed:
+            return
+        self._submit(self.pool.close()).result()
+        self._closed = True
+        self._stop_loop()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,105 @@
+"""对比 parser_response 与 decode_frame 的解帧速度和内存分配
+
+python -m benchmarks.bench_decoder
+python -m benchmarks.bench_decoder --capture incident.cap   # 用抓包中的真实下行帧
+"""
+
+import argparse
+import struct
+import time
+import tracemalloc
+import uuid
+
+from api.doubao_tts_api import (
+    AUDIO_ONLY_RESPONSE,
+    EVENT_TTSResponse,
+    EVENT_TTSSentenceEnd,
+    EVENT_TTSSentenceStart,
+    FULL_SERVER_RESPONSE,
+    JSON,
+    MsgTypeFlagWithEvent,
+    DoubaoTTSClient,
+    ResultCallback,
+)
+from api.capture_replay import CaptureReplayer
+from api.protocol import decode_frame
+
+
+def build_frame(message_type, event, session_id: bytes, payload: bytes) -> bytes:
+    return b"".join(
+        [
+            bytes([0x11, (message_type << 4) | MsgTypeFlagWithEvent, JSON << 4, 0]),
+            struct.pack(">i", event),
+            struct.pack(">I", len(session_id)),
+            session_id,
+            struct.pack(">I", len(payload)),
+            payload,
+        ]
+    )
+
+
+def sample_frames(count: int, chunk_size: int) -> list[bytes]:
+    session_id = str(uuid.uuid4()).encode()
+    audio = build_frame(
+        AUDIO_ONLY_RESPONSE, EVENT_TTSResponse, session_id, bytes(chunk_size)
+    )
+    sentence = '{"res_params":{"text":"你好，很高兴为您服务！"}}'.encode()
+    start = build_frame(
+        FULL_SERVER_RESPONSE, EVENT_TTSSentenceStart, session_id, sentence
+    )
+    end = build_frame(FULL_SERVER_RESPONSE, EVENT_TTSSentenceEnd, session_id, sentence)
+    frames = []
+    for i in range(count):
+        # 每 20 个音频帧一个句子
+        if i % 22 == 0:
+            frames.append(start)
+        elif i % 22 == 21:
+            frames.append(end)
+        else:
+            frames.append(audio)
+    return frames
+
+
+def run(name, decode, frames, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for frame in frames:
+            decode(frame)
+    elapsed = time.perf_counter() - start
+
+    # 保留解析结果，统计每帧占用的内存和分配次数
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    results = [decode(frame) for frame in frames]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = after.compare_to(before, "filename")
+    size = sum(stat.size_diff for stat in stats)
+    blocks = sum(stat.count_diff for stat in stats)
+    del results
+
+    total = len(frames) * rounds
+    print(
+        f"{name:<16} {total / elapsed:>12,.0f} frames/s "
+        f"{size / len(frames):>10,.1f} B/frame {blocks / len(frames):>6.2f} allocs/frame"
+    )
+
+
+def main(count=10_000, chunk_size=3200, rounds=20, capture=None):
+    if capture is not None:
+        frames = CaptureReplayer(capture).inbound()
+        print(f"{len(frames)} frames from {capture} x {rounds} rounds")
+    else:
+        frames = sample_frames(count, chunk_size)
+        print(f"{count} frames x {rounds} rounds, audio chunk {chunk_size} bytes")
+    client = DoubaoTTSClient("", "", "", "", "", ResultCallback())
+    run("parser_response", client.parser_response, frames, rounds)
+    run("decode_frame", decode_frame, frames, rounds)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--capture", default=None)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+    main(rounds=args.rounds, capture=args.capture)
@@ -0,0 +1,136 @@
+"""基于本地 mock 服务端的端到端延迟 / 吞吐基准测试
+
+python -m benchmarks.bench_e2e --sessions 1 2 4 8 16 --chunk-delay 0.005
+
+对每个并发数分别统计：建连耗时、session 启动耗时、首包音频延迟（TTFA）、
+音频吞吐（bytes/s）以及事件循环延迟。传入 --url 时改为压测真实服务。
+"""
+
+import argparse
+import asyncio
+import time
+
+from api.doubao_tts_api import DoubaoTTSClient, ResultCallback
+from api.mock_server import MockTTSServer
+
+TEXT = "你好，我是字节跳动的语音合成系统，很高兴为您服务！今天天气不错。"
+
+
+class TimingCallback(ResultCallback):
+    def __init__(self):
+        self.opened_at = None
+        self.errors = []
+
+    def on_open(self):
+        self.opened_at = time.perf_counter()
+
+    def on_error(self, message):
+        self.errors.append(message)
+
+
+async def run_session(args, url):
+    callback = TimingCallback()
+    client = DoubaoTTSClient(
+        args.uid, args.app_id, args.token, url, args.speaker, callback
+    )
+    start = time.perf_counter()
+    await client.connect()
+    connected = time.perf_counter()
+
+    first_audio = None
+    audio_bytes = 0
+    async for chunk in client.synthesize(args.text):
+        if chunk.kind == "audio":
+            if first_audio is None:
+                first_audio = time.perf_counter()
+            audio_bytes += len(chunk.data)
+    finished = time.perf_counter()
+
+    if callback.errors or first_audio is None:
+        raise Exception(f"session failed: {callback.errors}")
+    return {
+        "connect": connected - start,
+        "session_start": callback.opened_at - connected,
+        "ttfa": first_audio - connected,
+        "bytes_per_sec": audio_bytes / (finished - connected),
+        "audio_bytes": audio_bytes,
+    }
+
+
+async def monitor_loop_lag(samples: list, interval: float = 0.01):
+    loop = asyncio.get_running_loop()
+    while True:
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, loop.time() - expected))
+
+
+def percentile(values, q):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+
+def fmt_ms(values):
+    return (
+        f"{percentile(values, 0.5) * 1000:8.2f} {percentile(values, 0.95) * 1000:8.2f}"
+    )
+
+
+async def run_level(args, url, sessions):
+    lag = []
+    monitor = asyncio.create_task(monitor_loop_lag(lag))
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        *[run_session(args, url) for _ in range(sessions)], return_exceptions=True
+    )
+    wall = time.perf_counter() - start
+    monitor.cancel()
+
+    ok = [r for r in results if isinstance(r, dict)]
+    failed = len(results) - len(ok)
+    total_bytes = sum(r["audio_bytes"] for r in ok)
+    print(
+        f"{sessions:>8} "
+        f"{fmt_ms([r['connect'] for r in ok])} "
+        f"{fmt_ms([r['session_start'] for r in ok])} "
+        f"{fmt_ms([r['ttfa'] for r in ok])} "
+        f"{total_bytes / wall / 1024:>12,.1f} "
+        f"{percentile(lag, 0.99) * 1000:8.2f} {max(lag, default=0) * 1000:8.2f} "
+        f"{failed:>6}"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--text", default=TEXT)
+    parser.add_argument("--chunk-size", type=int, default=3200)
+    parser.add_argument("--chunk-delay", type=float, default=0.0)
+    parser.add_argument("--url", default=None)
+    parser.add_argument("--uid", default="bench")
+    parser.add_argument("--app-id", default="bench")
+    parser.add_argument("--token", default="bench")
+    parser.add_argument("--speaker", default="zh_female_wanwanxiaohe_moon_bigtts")
+    args = parser.parse_args()
+
+    print(
+        f"{'sessions':>8} {'connect p50/p95 ms':>17} {'start p50/p95 ms':>17} "
+        f"{'ttfa p50/p95 ms':>17} {'audio KiB/s':>12} {'lag p99/max ms':>17} "
+        f"{'failed':>6}"
+    )
+    if args.url:
+        for sessions in args.sessions:
+            await run_level(args, args.url, sessions)
+        return
+
+    async with MockTTSServer(
+        chunk_size=args.chunk_size, chunk_delay=args.chunk_delay
+    ) as server:
+        for sessions in args.sessions:
+            await run_level(args, server.url, sessions)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,79 @@
+"""对比逐帧构造 Header/Optional/json.dumps 与 FrameEncoder 的编码速度
+
+python -m benchmarks.bench_encoder
+"""
+
+import time
+import uuid
+
+from api.doubao_tts_api import (
+    EVENT_TaskRequest,
+    FULL_CLIENT_REQUEST,
+    JSON,
+    MsgTypeFlagWithEvent,
+    Header,
+    Optional,
+    Request,
+)
+from api.protocol import FrameEncoder
+
+
+def legacy_task_request(request: Request, speaker: str, text: str, session_id: str):
+    # 与改造前 __send_text + __send_event 的路径相同
+    header = Header(
+        message_type=FULL_CLIENT_REQUEST,
+        message_type_specific_flags=MsgTypeFlagWithEvent,
+        serial_method=JSON,
+    ).as_bytes()
+    optional = Optional(event=EVENT_TaskRequest, sessionId=session_id).as_bytes()
+    payload = request.get_payload_bytes(
+        event=EVENT_TaskRequest, text=text, speaker=speaker
+    )
+    frame = bytearray(header)
+    frame.extend(optional)
+    frame.extend(len(payload).to_bytes(4, "big", signed=True))
+    frame.extend(payload)
+    return frame
+
+
+def main(count=200_000):
+    uid = "bench"
+    speaker = "zh_female_wanwanxiaohe_moon_bigtts"
+    session_id = str(uuid.uuid4())
+    # 模拟大模型逐 token 输出的短文本片段
+    texts = [
+        "你好",
+        "，",
+        "我是",
+        "语音",
+        "合成",
+        "系统",
+        "。",
+        " Hello",
+        " world",
+        "!",
+    ]
+
+    request = Request(uid)
+    encoder = FrameEncoder(uid)
+    encoder.start_session(session_id, speaker)
+    for text in texts:
+        assert encoder.task_request(text) == legacy_task_request(
+            request, speaker, text, session_id
+        )
+
+    results = {}
+    for name, encode in [
+        ("legacy", lambda t: legacy_task_request(request, speaker, t, session_id)),
+        ("FrameEncoder", encoder.task_request),
+    ]:
+        start = time.perf_counter()
+        for i in range(count):
+            encode(texts[i % len(texts)])
+        results[name] = count / (time.perf_counter() - start)
+        print(f"{name:<14} {results[name]:>12,.0f} frames/s")
+    print(f"speedup        {results['FrameEncoder'] / results['legacy']:>12.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""用 tracemalloc 统计每条空闲连接和每个进行中 session 占用的内存
+
+python -m benchmarks.bench_memory --connections 500
+python -m benchmarks.bench_memory --max-idle-bytes 25000 --max-active-bytes 200000
+
+mock 服务端在子进程中运行，只统计客户端一侧的分配。进行中的 session 在收到首个音频帧后暂停读取，
+此时的占用包括 websocket 读缓冲和 synthesize() 的队列，受 max_queue / max_buffer_bytes 限制。
+超过 --max-idle-bytes / --max-active-bytes 时以非零状态退出，可以放进 CI 防止回退。
+
+客户端使用 HIGH_DENSITY_OPTIONS；--default-options 改为测量客户端默认参数（开启 permessage-deflate 等）。
+
+参考值（Linux、Python 3.11、websockets 17、本机 mock 服务端、200 条连接、HIGH_DENSITY_OPTIONS）：空闲连接约 18KB；进行中的 session 在 max_buffer_bytes=64KB 时约 130–160KB，
+16KB 时约 95–110KB。进行中的占用随调度时机波动，上面的阈值留了余量。
+"""
+
+import argparse
+import asyncio
+import contextlib
+import gc
+import socket
+import subprocess
+import sys
+import tracemalloc
+
+from api.doubao_tts_api import HIGH_DENSITY_OPTIONS, DoubaoTTSClient, ResultCallback
+from api.stream import AUDIO
+
+TEXT = "你好，我是字节跳动的语音合成系统，很高兴为您服务！今天天气不错。" * 20
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextlib.contextmanager
+def mock_server_process(chunk_delay: float):
+    port = _free_port()
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-u",
+            "-m",
+            "api.mock_server",
+            "--port",
+            str(port),
+            "--chunk-delay",
+            str(chunk_delay),
+        ],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    try:
+        process.stdout.readline()
+        yield f"ws://127.0.0.1:{port}"
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def traced() -> int:
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0]
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--connections", type=int, default=200)
+    parser.add_argument("--chunk-delay", type=float, default=0.01)
+    parser.add_argument("--max-buffer-bytes", type=int, default=64 * 1024)
+    parser.add_argument("--default-options", action="store_true")
+    parser.add_argument("--max-idle-bytes", type=int, default=None)
+    parser.add_argument("--max-active-bytes", type=int, default=None)
+    args = parser.parse_args()
+
+    with mock_server_process(args.chunk_delay) as url:
+        # 先建一条连接，模块导入、SSLContext 等一次性开销不计入
+        warmup = DoubaoTTSClient(
+            "bench", "bench", "bench", url, "speaker", ResultCallback(), True
+        )
+        await warmup.connect()
+        await warmup.close()
+
+        options = {} if args.default_options else HIGH_DENSITY_OPTIONS
+        tracemalloc.start()
+        base = traced()
+        clients = [
+            DoubaoTTSClient(
+                "bench",
+                "bench",
+                "bench",
+                url,
+                "speaker",
+                ResultCallback(),
+                True,
+                **options,
+            )
+            for _ in range(args.connections)
+        ]
+        await asyncio.gather(*[client.connect() for client in clients])
+        idle = (traced() - base) / args.connections
+
+        streams = [client.synthesize(TEXT, args.max_buffer_bytes) for client in clients]
+
+        async def first_audio(stream):
+            async for chunk in stream:
+                if chunk.kind == AUDIO:
+                    return
+
+        await asyncio.gather(*[first_audio(stream) for stream in streams])
+        # 等服务端继续推送，直到各级缓冲区写满
+        await asyncio.sleep(max(1.0, args.chunk_delay * 100))
+        active = (traced() - base) / args.connections
+        tracemalloc.stop()
+
+        for stream in streams:
+            await stream.aclose()
+        await asyncio.gather(*[client.close() for client in clients])
+
+    print(f"connections          {args.connections:>10}")
+    print(f"bytes/idle connection {idle:>10,.0f}")
+    print(f"bytes/active session  {active:>10,.0f}")
+
+    failed = False
+    if args.max_idle_bytes is not None and idle > args.max_idle_bytes:
+        print(f"idle connection footprint exceeds {args.max_idle_bytes} bytes")
+        failed = True
+    if args.max_active_bytes is not None and active > args.max_active_bytes:
+        print(f"active session footprint exceeds {args.max_active_bytes} bytes")
+        failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
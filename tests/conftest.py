@@ -0,0 +1,36 @@
+from api.doubao_tts_api import DoubaoTTSClient, ResultCallback
+
+# test_api.py 需要真实密钥和声卡，只通过 python -m tests.test_api 手动运行
+collect_ignore = ["test_api.py"]
+
+# mock 服务端按句末标点切句，TEXT 合成为 SENTENCES 三句
+TEXT = "你好，世界。Hello world. 再见"
+SENTENCES = ["你好，世界。", "Hello world.", "再见"]
+
+
+class RecordingCallback(ResultCallback):
+    def __init__(self):
+        self.data = bytearray()
+        self.errors = []
+        self.completed = 0
+
+    def on_data(self, data: bytes) -> None:
+        self.data.extend(data)
+
+    def on_error(self, message) -> None:
+        self.errors.append(message)
+
+    def on_complete(self) -> None:
+        self.completed += 1
+
+
+def new_client(server, callback=None, **kwargs):
+    return DoubaoTTSClient(
+        "uid",
+        "app_id",
+        "token",
+        server.url,
+        "speaker",
+        callback if callback is not None else ResultCallback(),
+        **kwargs,
+    )
@@ -1,44 +1,12 @@
-import threading
-import sounddevice as sd
-import numpy as np
-from collections import deque
-import time
 import uuid
 import websockets
 import asyncio
 from api import DoubaoTTSClient
+from api.playback import PlaybackSink, SoundDeviceBackend
 
 SAMPLE_RATE = 24000
-CHANNELS = 1
-audio_buffer = deque()
-playing = True
-
-
-def audio_player():
-    """音频播放线程函数"""
-    try:
-        with sd.OutputStream(
-            samplerate=SAMPLE_RATE, channels=CHANNELS, dtype="int16", blocksize=1024
-        ) as stream:
-            while playing:
-                if audio_buffer:
-                    try:
-                        data = audio_buffer.popleft()
-                        if len(data) > 0:
-                            audio_data = np.frombuffer(data, dtype=np.int16)
-                            if len(audio_data) > 0:
-                                stream.write(audio_data)
-                                print(f"播放音频块: {len(audio_data)} 样本")
-                    except Exception as e:
-                        print(f"播放音频块时出错: {e}")
-                else:
-                    time.sleep(0.01)  # 避免CPU占用过高
-    except Exception as e:
-        print(f"音频播放线程出错: {e}")
-
-
-audio_thread = threading.Thread(target=audio_player, daemon=True)
-audio_thread.start()
+# 声卡回调直接从环形缓冲区取数据，攒够 0.2 秒再开始播放
+sink = PlaybackSink(SoundDeviceBackend(), sample_rate=SAMPLE_RATE)
 
 
 class ResultCallback:
@@ -58,11 +26,7 @@ class ResultCallback:
         print(f"TTS事件: {message}")
 
     def on_data(self, data: bytes) -> None:
-        try:
-            if data and len(data) > 0:
-                audio_buffer.append(data)
-        except Exception as e:
-            print(f"音频数据处理错误: {e}")
+        sink.write_nowait(data)
 
 
 async def main():
@@ -77,6 +41,7 @@ async def main():
 
     callback = ResultCallback()
     client = DoubaoTTSClient(uid, app_id, token, url, speaker, callback)
+    sink.start()
 
     try:
         # 发送文本进行TTS合成
@@ -89,11 +54,14 @@ async def main():
 
         # 等待播放完成
         print("等待音频播放完成...")
-        await asyncio.sleep(20)
+        sink.finish()
+        await sink.drain()
+        print(f"播放统计: {sink.stats()}")
 
     except Exception as e:
         print(f"测试出错: {e}")
     finally:
+        sink.close()
         print("测试完成")
 
 async def test_connect():
@@ -0,0 +1,85 @@
+import asyncio
+import io
+import wave
+
+import numpy as np
+
+from api.audio import (
+    AudioOutput,
+    StreamResampler,
+    float_to_pcm16,
+    normalize_loudness,
+    pcm16_to_float,
+    resample,
+    transcode,
+)
+
+
+def tone(frequency: float, sample_rate: int, seconds: float = 0.5) -> np.ndarray:
+    t = np.arange(int(sample_rate * seconds)) / sample_rate
+    return (0.5 * np.sin(2 * np.pi * frequency * t)).astype(np.float32)
+
+
+def dominant_frequency(samples: np.ndarray, sample_rate: int) -> float:
+    spectrum = np.abs(np.fft.rfft(samples))
+    return np.argmax(spectrum) * sample_rate / len(samples)
+
+
+def test_pcm16_round_trip():
+    samples = tone(440, 24000)
+    pcm = float_to_pcm16(samples)
+    assert len(pcm) == len(samples) * 2
+    assert np.max(np.abs(pcm16_to_float(pcm) - samples)) < 1 / 32768
+    assert float_to_pcm16(pcm16_to_float(pcm)) == pcm
+
+
+def test_resample_keeps_pitch_and_filters_aliasing():
+    samples = tone(440, 24000)
+    for rate in (8000, 48000):
+        out = resample(samples, 24000, rate)
+        assert len(out) == len(samples) * rate // 24000
+        assert abs(dominant_frequency(out, rate) - 440) < 5
+
+    # 6kHz 超出 8kHz 的奈奎斯特频率，降采样后应被滤掉而不是混叠成 2kHz
+    out = resample(tone(6000, 24000), 24000, 8000)
+    assert np.sqrt(np.mean(out[100:-100] ** 2)) < 0.05
+
+
+def test_stream_resampler_matches_one_shot():
+    pcm = float_to_pcm16(tone(440, 24000) + 0.1 * tone(5000, 24000))
+    rng = np.random.default_rng(0)
+    for rate in (8000, 16000, 22050, 48000):
+        expected = float_to_pcm16(resample(pcm16_to_float(pcm), 24000, rate))
+        # 任意切分，包括在样本中间切开和空块
+        cuts = sorted(rng.integers(0, len(pcm), 40)) + [len(pcm)]
+        resampler = StreamResampler(24000, rate)
+        out = bytearray()
+        start = 0
+        for cut in cuts:
+            out += resampler.feed(pcm[start:cut])
+            start = cut
+        out += resampler.finish()
+        assert bytes(out) == expected
+
+        resampler = StreamResampler(24000, rate)
+        out = b"".join(resampler.feed(pcm[i : i + 1]) for i in range(len(pcm)))
+        assert out + resampler.finish() == expected
+
+
+def test_normalize_loudness_respects_peak():
+    samples = tone(440, 24000) * 0.01
+    out = normalize_loudness(samples, target_dbfs=-20)
+    assert abs(20 * np.log10(np.sqrt(np.mean(out**2))) + 20) < 0.1
+    out = normalize_loudness(samples, target_dbfs=0, peak_dbfs=-1)
+    assert np.max(np.abs(out)) <= 10 ** (-1 / 20) + 1e-6
+
+
+def test_transcode_to_multiple_outputs():
+    pcm = float_to_pcm16(tone(440, 24000))
+    narrowband, wideband = asyncio.run(
+        transcode(pcm, 24000, [AudioOutput(8000), AudioOutput(48000, container="wav")])
+    )
+    assert len(narrowband) == len(pcm) // 3
+    with wave.open(io.BytesIO(wideband)) as f:
+        assert f.getframerate() == 48000
+        assert f.getnframes() == len(pcm)
@@ -0,0 +1,146 @@
+import asyncio
+import json
+import os
+import threading
+import wave
+
+import api.batch
+from api.batch import BatchRunner, Checkpoint
+from api.mock_server import MockTTSServer
+from api.pool import DoubaoTTSPool
+from api.retry import Backoff
+
+
+def write_jobs(path, lines):
+    with open(path, "w", encoding="utf-8") as f:
+        for line in lines:
+            f.write((line if isinstance(line, str) else json.dumps(line)) + "\n")
+
+
+async def run_batch(server, jobs, checkpoint, output_dir, **kwargs):
+    async with DoubaoTTSPool(
+        "uid", "app_id", "token", server.url, "speaker", max_size=4
+    ) as pool:
+        runner = BatchRunner(
+            pool,
+            concurrency=4,
+            retries=kwargs.pop("retries", 1),
+            backoff=Backoff(base=0.01, max_delay=0.01),
+            checkpoint=checkpoint,
+            output_dir=output_dir,
+            on_progress=lambda line: None,
+        )
+        return await runner.run(jobs, **kwargs)
+
+
+def test_bad_lines_do_not_abort_batch(tmp_path):
+    jobs = str(tmp_path / "jobs.jsonl")
+    checkpoint = str(tmp_path / "jobs.ckpt")
+    write_jobs(
+        jobs,
+        [
+            {"id": "a", "text": "你好。", "format": "wav"},
+            "{not json",
+            {"id": "b", "text": "再见。"},
+            "",
+            {"id": "missing"},
+            {"id": "c", "text": "谢谢。", "format": "wav"},
+        ],
+    )
+
+    async def main():
+        async with MockTTSServer(bytes_per_char=10) as server:
+            stats = await run_batch(server, jobs, checkpoint, str(tmp_path))
+            assert (stats.completed, stats.failed) == (3, 2)
+            with wave.open(str(tmp_path / "a.wav"), "rb") as f:
+                assert f.readframes(f.getnframes()) == server.synthesize("你好。")
+            with open(tmp_path / "b.pcm", "rb") as f:
+                assert f.read() == server.synthesize("再见。")
+            assert os.path.exists(tmp_path / "c.wav")
+
+    asyncio.run(main())
+    saved = Checkpoint(checkpoint)
+    assert saved.watermark == 6
+    assert saved.failed == {1, 4}
+
+
+def test_resume_and_retry_failed(tmp_path):
+    jobs = str(tmp_path / "jobs.jsonl")
+    checkpoint = str(tmp_path / "jobs.ckpt")
+    write_jobs(jobs, [{"id": str(i), "text": f"第{i}句。"} for i in range(6)])
+
+    async def main():
+        async with MockTTSServer(bytes_per_char=10, fail_session_rate=1.0) as server:
+            stats = await run_batch(server, jobs, checkpoint, str(tmp_path), retries=0)
+            assert (stats.completed, stats.failed) == (0, 6)
+
+        async with MockTTSServer(bytes_per_char=10) as server:
+            # 已处理（包括失败）的行不会重新合成
+            stats = await run_batch(server, jobs, checkpoint, str(tmp_path))
+            assert (stats.completed, stats.skipped) == (0, 6)
+            stats = await run_batch(
+                server, jobs, checkpoint, str(tmp_path), retry_failed=True
+            )
+            assert (stats.completed, stats.failed) == (6, 0)
+            assert server.sessions == 6
+
+    asyncio.run(main())
+    assert Checkpoint(checkpoint).failed == set()
+    assert sorted(os.listdir(tmp_path)) == sorted(
+        ["jobs.jsonl", "jobs.ckpt"] + [f"{i}.pcm" for i in range(6)]
+    )
+
+
+def test_jobs_are_read_off_loop_and_compressed_audio_is_labelled(tmp_path, monkeypatch):
+    jobs = str(tmp_path / "jobs.jsonl")
+    write_jobs(
+        jobs,
+        [
+            {"id": "a", "text": "你好。"},
+            {"id": "b", "text": "再见。", "format": "mp3"},
+            {"id": "c", "text": "谢谢。", "format": "wav", "sample_rate": 8000},
+        ],
+    )
+    parse_job = api.batch._parse_job
+    threads = set()
+
+    def recording_parse_job(*args):
+        threads.add(threading.current_thread())
+        return parse_job(*args)
+
+    monkeypatch.setattr(api.batch, "_parse_job", recording_parse_job)
+
+    async def main():
+        async with MockTTSServer(bytes_per_char=10) as server:
+            stats = await run_batch(server, jobs, None, str(tmp_path))
+            assert (stats.completed, stats.compressed) == (3, 1)
+            expected = len(server.synthesize("你好。")) / 48000 + len(
+                server.synthesize("谢谢。", sample_rate=8000)
+            ) / (2 * 8000)
+            assert abs(stats.audio_seconds - expected) < 1e-9
+            assert "pcm-audio-s/s=" in stats.report()
+            assert "compressed=1" in stats.report()
+
+    asyncio.run(main())
+    assert threads and threading.main_thread() not in threads
+
+
+def test_checkpoint_watermark(tmp_path):
+    path = str(tmp_path / "ckpt")
+    checkpoint = Checkpoint(path)
+    for index in (2, 0, 4):
+        checkpoint.advance(index)
+    checkpoint.mark(4, failed=True)
+    assert checkpoint.watermark == 1
+    assert checkpoint.is_done(2) and not checkpoint.is_done(3)
+    checkpoint.save()
+
+    checkpoint = Checkpoint(path)
+    assert (checkpoint.watermark, checkpoint.done, checkpoint.failed) == (
+        1,
+        {2, 4},
+        {4},
+    )
+    checkpoint.advance(1)
+    checkpoint.advance(3)
+    assert checkpoint.watermark == 5 and checkpoint.done == set()
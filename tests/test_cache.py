@@ -0,0 +1,191 @@
+import asyncio
+
+from api import DoubaoTTSClient
+from api.cache import SynthesisCache, cache_key
+from api.mock_server import MockTTSServer
+from api.stream import AUDIO, SENTENCE_END, SENTENCE_START, StreamChunk
+from conftest import TEXT, RecordingCallback, new_client
+
+
+def sample_chunks(size=100):
+    return [
+        StreamChunk(SENTENCE_START, '{"text": "你好"}'),
+        StreamChunk(AUDIO, bytes(range(256)) * (size // 256 + 1)),
+        StreamChunk(SENTENCE_END, '{"text": "你好"}'),
+    ]
+
+
+def test_memory_lru_evicts_by_bytes():
+    cache = SynthesisCache(memory_bytes=1200)
+    keys = [cache_key("speaker", f"text {i}") for i in range(3)]
+    for key in keys:
+        cache.put(key, sample_chunks(400))
+    assert cache.get(keys[0]) is None
+    assert cache.get(keys[2]) is not None
+    assert cache.evictions == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    key = cache_key("speaker", "你好")
+    cache = SynthesisCache(memory_bytes=0, disk_dir=str(tmp_path))
+    cache.put(key, sample_chunks())
+    cache.close()
+
+    cache = SynthesisCache(disk_dir=str(tmp_path))
+    chunks = cache.get(key)
+    assert [c.kind for c in chunks] == [SENTENCE_START, AUDIO, SENTENCE_END]
+    assert chunks[1].data == sample_chunks()[1].data
+    assert str(chunks[0].data) == '{"text": "你好"}'
+    assert cache.disk_hits == 1
+    assert cache.get(key) is not None
+    assert cache.memory_hits == 1
+    cache.close()
+
+
+def test_disk_hits_reference_the_mapping(tmp_path):
+    cache = SynthesisCache(
+        memory_bytes=0, disk_dir=str(tmp_path), disk_bytes=1500, segment_bytes=1000
+    )
+    first = cache_key("speaker", "first")
+    cache.put(first, sample_chunks(600))
+    audio = cache.get(first)[1].data
+    assert isinstance(audio, memoryview)
+    assert audio == sample_chunks(600)[1].data
+
+    # 命中结果仍在使用时，分段被删除、映射被替换或缓存关闭都不影响它
+    for i in range(3):
+        cache.put(cache_key("speaker", f"text {i}"), sample_chunks(600))
+    assert cache.get(first) is None
+    cache.close()
+    assert audio == sample_chunks(600)[1].data
+
+
+def test_disk_tier_drops_oldest_segment(tmp_path):
+    cache = SynthesisCache(
+        memory_bytes=0, disk_dir=str(tmp_path), disk_bytes=3000, segment_bytes=1000
+    )
+    keys = [cache_key("speaker", f"text {i}") for i in range(8)]
+    for key in keys:
+        cache.put(key, sample_chunks(600))
+    assert cache.get(keys[0]) is None
+    assert cache.get(keys[-1]) is not None
+    assert cache.disk_evictions > 0
+    assert cache.stats()["disk_bytes"] <= 3000 + 1000
+    cache.close()
+
+
+def test_client_replays_cached_synthesis():
+    async def main():
+        async with MockTTSServer(bytes_per_char=10) as server:
+            cache = SynthesisCache()
+            client = DoubaoTTSClient(
+                "uid", "app_id", "token", server.url, "speaker", None, cache=cache
+            )
+            first = [c async for c in client.synthesize("你好。")]
+            second = [c async for c in client.synthesize("你好。")]
+            assert [c.kind for c in first] == [c.kind for c in second]
+            assert b"".join(c.data for c in first if c.kind == "audio") == b"".join(
+                c.data for c in second if c.kind == "audio"
+            )
+            assert server.sessions == 1
+            assert cache.hits == 1 and cache.misses == 1
+
+    asyncio.run(main())
+
+
+def test_callback_mode_replays_cached_synthesis():
+    async def main():
+        async with MockTTSServer(bytes_per_char=10) as server:
+            cache = SynthesisCache()
+            first = RecordingCallback()
+            client = new_client(server, first, cache=cache, keep_alive=True)
+            await client.streaming_call("你好。再见。")
+            await client.streaming_complete()
+
+            second = RecordingCallback()
+            client.callback = second
+            await client.streaming_call("你好。再见。")
+            await client.streaming_complete()
+            await client.close()
+
+            assert bytes(second.data) == bytes(first.data) != b""
+            assert second.completed == first.completed == 2
+            assert server.sessions == 1
+            assert cache.hits == 1
+
+            # synthesize() 命中回调模式写入的缓存
+            client = new_client(server, cache=cache)
+            chunks = [c async for c in client.synthesize("你好。再见。")]
+            assert b"".join(c.data for c in chunks if c.kind == AUDIO) == bytes(
+                first.data
+            )
+            assert server.sessions == 1
+
+    asyncio.run(main())
+
+
+def test_callback_mode_cache_miss_on_more_text():
+    async def main():
+        async with MockTTSServer(bytes_per_char=10) as server:
+            cache = SynthesisCache()
+            client = new_client(server, RecordingCallback(), cache=cache)
+            await client.streaming_call("你好。")
+            await client.streaming_complete()
+
+            # 第一段命中，但之后还有文本，整个 session 走网络
+            callback = RecordingCallback()
+            client = new_client(server, callback, cache=cache)
+            await client.streaming_call("你好。")
+            await client.streaming_call("再见。")
+            await client.streaming_complete()
+            assert bytes(callback.data) == server.synthesize(
+                "你好。"
+            ) + server.synthesize("再见。")
+            assert server.sessions == 2
+
+            callback = RecordingCallback()
+            client = new_client(server, callback, cache=cache)
+            await client.streaming_call("你好。再见。")
+            await client.streaming_complete()
+            assert server.sessions == 2
+
+    asyncio.run(main())
+
+
+def test_recording_stops_above_max_entry_bytes():
+    async def main():
+        async with MockTTSServer(chunk_size=16, bytes_per_char=10) as server:
+            cache = SynthesisCache(max_entry_bytes=100)
+            peak = 0
+
+            class PeakCallback(RecordingCallback):
+                def on_data(self, data: bytes) -> None:
+                    nonlocal peak
+                    if client._cache_recorded is not None:
+                        size = sum(len(c.data) for c in client._cache_recorded)
+                        peak = max(peak, size)
+                    super().on_data(data)
+
+            callback = PeakCallback()
+            client = new_client(server, callback, cache=cache)
+            await client.streaming_call(TEXT)
+            await client.streaming_complete()
+            # 录制在超过上限时立即停止，而不是录完整个 session 再丢弃
+            assert 0 < peak <= 100
+            assert len(callback.data) > 100
+            assert cache.stats()["memory_entries"] == 0
+
+            client = new_client(server, cache=cache)
+            async for _ in client.synthesize(TEXT):
+                pass
+            assert cache.stats()["memory_entries"] == 0
+
+            # 小于上限的结果仍然缓存
+            client = new_client(server, cache=cache)
+            async for _ in client.synthesize("你好。"):
+                pass
+            assert cache.stats()["memory_entries"] == 1
+            assert server.sessions == 3
+
+    asyncio.run(main())
@@ -0,0 +1,62 @@
+import asyncio
+
+from api.capture import INBOUND, OUTBOUND, FrameRecorder, read_capture
+from api.capture_replay import CaptureReplayer
+from api.doubao_tts_api import EVENT_Start_Connection, EVENT_StartSession
+from api.mock_server import MockTTSServer
+from api.protocol import decode_client_frame
+from conftest import SENTENCES, TEXT, RecordingCallback, new_client
+
+
+def test_capture_and_replay(tmp_path):
+    path = str(tmp_path / "session.cap")
+
+    async def main():
+        async with MockTTSServer(chunk_size=16, bytes_per_char=10) as server:
+            with FrameRecorder(path) as recorder:
+                for _ in range(2):
+                    callback = RecordingCallback()
+                    client = new_client(server, callback, recorder=recorder)
+                    await client.streaming_call(TEXT)
+                    await client.streaming_complete()
+            expected = b"".join(server.synthesize(s) for s in SENTENCES)
+            assert bytes(callback.data) == expected
+
+        frames = list(read_capture(path))
+        assert {frame.channel for frame in frames} == {1, 2}
+        first = [frame for frame in frames if frame.channel == 1]
+        assert first[0].direction == OUTBOUND
+        assert any(frame.direction == INBOUND for frame in first)
+        sent = [
+            decode_client_frame(frame.data).event
+            for frame in first
+            if frame.direction == OUTBOUND
+        ]
+        assert sent[:2] == [EVENT_Start_Connection, EVENT_StartSession]
+        timestamps = [frame.timestamp for frame in frames]
+        assert timestamps == sorted(timestamps)
+
+        replayer = CaptureReplayer(path, channel=1)
+        for realtime in (False, True):
+            callback = RecordingCallback()
+            stats = await replayer.replay(callback, realtime=realtime, speed=10.0)
+            assert bytes(callback.data) == expected
+            assert stats["channels"] == 1
+
+        callback = RecordingCallback()
+        stats = await CaptureReplayer(path).replay(callback)
+        assert stats["channels"] == 2
+        assert bytes(callback.data) == expected * 2
+
+    asyncio.run(main())
+
+
+def test_recorder_stops_at_max_bytes(tmp_path):
+    path = str(tmp_path / "limited.cap")
+    with FrameRecorder(path, max_bytes=100) as recorder:
+        channel = recorder.channel()
+        recorder.record(channel, INBOUND, b"x" * 40)
+        recorder.record(channel, INBOUND, b"x" * 40)
+    assert recorder.frames == 1
+    assert recorder.dropped == 1
+    assert [frame.data for frame in read_capture(path)] == [b"x" * 40]
@@ -0,0 +1,397 @@
+import asyncio
+
+import pytest
+import websockets
+
+from api.audio import StreamResampler
+from api.doubao_tts_api import HIGH_DENSITY_OPTIONS, DoubaoTTSClient
+from api.mock_server import MockTTSServer
+from conftest import SENTENCES, TEXT, RecordingCallback, new_client
+
+
+def test_streaming_call_with_callback():
+    async def main():
+        async with MockTTSServer(bytes_per_char=10) as server:
+            callback = RecordingCallback()
+            client = new_client(server, callback)
+            await client.streaming_call(TEXT)
+            await client.streaming_complete()
+            expected = b"".join(server.synthesize(s) for s in SENTENCES)
+            assert bytes(callback.data) == expected
+            assert callback.errors == []
+
+    asyncio.run(main())
+
+
+def test_callback_receives_bytes():
+    class TypeCallback(RecordingCallback):
+        def __init__(self):
+            super().__init__()
+            self.types = set()
+
+        def on_data(self, data: bytes) -> None:
+            self.types.add(type(data))
+            super().on_data(data)
+
+    async def main():
+        async with MockTTSServer(bytes_per_char=10) as server:
+            callback = TypeCallback()
+            client = new_client(server, callback)
+            await client.streaming_call(TEXT)
+            await client.streaming_complete()
+            assert callback.types == {bytes}
+
+    asyncio.run(main())
+
+
+def test_keep_alive_reuses_connection():
+    async def main():
+        async with MockTTSServer(bytes_per_char=10) as server:
+            client = new_client(server, RecordingCallback(), keep_alive=True)
+            for _ in range(3):
+                await client.streaming_call(TEXT)
+                await client.streaming_complete()
+                assert client.is_connected
+            await client.close()
+            assert server.connections == 1
+            assert server.sessions == 3
+
+    asyncio.run(main())
+
+
+def test_synthesize_yields_audio_and_sentence_events():
+    async def main():
+        async with MockTTSServer(chunk_size=16, bytes_per_char=10) as server:
+            client = new_client(server)
+
+            async def deltas():
+                for delta in ["你好，", "世界。", "Hello world. 再见"]:
+                    yield delta
+
+            kinds = []
+            audio = bytearray()
+            async for chunk in client.synthesize(deltas(), max_buffer_bytes=32):
+                kinds.append(chunk.kind)
+                if chunk.kind == "audio":
+                    audio.extend(chunk.data)
+                    await asyncio.sleep(0)
+            assert kinds.count("sentence_start") == 3
+            assert kinds.count("sentence_end") == 3
+            assert bytes(audio) == b"".join(server.synthesize(s) for s in SENTENCES)
+
+    asyncio.run(main())
+
+
+def test_session_failure_is_raised_from_synthesize():
+    async def main():
+        async with MockTTSServer(fail_session_rate=1.0) as server:
+            client = new_client(server, keep_alive=True)
+            try:
+                async for _ in client.synthesize(TEXT):
+                    pass
+            except Exception as e:
+                assert "TTS is not started" in str(e) or "mock session" in str(e)
+            else:
+                raise AssertionError("session failure was not raised")
+            await client.close()
+
+    asyncio.run(main())
+
+
+def test_gzip_payloads_round_trip():
+    async def main():
+        async with MockTTSServer(bytes_per_char=10, compress_responses=True) as server:
+            client = new_client(server, compression_threshold=64)
+            long_text = "很长的一段文本，" * 50 + "结束。"
+            kinds = []
+            audio = bytearray()
+            async for chunk in client.synthesize(long_text):
+                kinds.append(chunk.kind)
+                if chunk.kind == "audio":
+                    audio.extend(chunk.data)
+                else:
+                    assert chunk.data.text == long_text
+            assert kinds[0] == "sentence_start" and kinds[-1] == "sentence_end"
+            assert bytes(audio) == server.synthesize(long_text)
+
+    asyncio.run(main())
+
+
+def test_metrics_hooks_record_session_timeline():
+    from api.metrics import PrometheusExporter
+
+    async def main():
+        async with MockTTSServer(bytes_per_char=10) as server:
+            exporter = PrometheusExporter()
+            client = new_client(server, keep_alive=True, hooks=[exporter])
+            for _ in range(2):
+                async for _ in client.synthesize(TEXT):
+                    pass
+            await client.close()
+
+            stats = client.stats
+            assert not stats.failed
+            # 第二个 session 复用连接，没有建连耗时
+            assert stats.connect_time is None
+            assert stats.time_to_first_audio is not None
+            assert stats.audio_bytes == sum(
+                len(server.synthesize(s)) for s in SENTENCES
+            )
+
+            text = exporter.render()
+            assert 'doubao_tts_connect_seconds_count{speaker="speaker"' in text
+            assert (
+                'doubao_tts_sessions_total{speaker="speaker",'
+                f'endpoint="{server.url}",status="ok"}} 2'
+            ) in text
+
+    asyncio.run(main())
+
+
+def test_reconnect_replays_unfinished_text_without_duplicates():
+    async def main():
+        # 每条连接发出 9 个音频帧后断开，需要重连两次才能合成完
+        async with MockTTSServer(
+            chunk_size=16, bytes_per_char=10, drop_after_chunks=9
+        ) as server:
+            client = new_client(server)
+            kinds = []
+            audio = bytearray()
+            async for chunk in client.synthesize(TEXT):
+                kinds.append(chunk.kind)
+                if chunk.kind == "audio":
+                    audio.extend(chunk.data)
+            assert bytes(audio) == b"".join(server.synthesize(s) for s in SENTENCES)
+            assert kinds.count("sentence_start") == len(SENTENCES)
+            assert kinds.count("sentence_end") == len(SENTENCES)
+            assert client.stats.reconnects == 2
+            assert server.connections == 3
+
+    asyncio.run(main())
+
+
+def reconnect_with_slow_replay(monkeypatch, fail_at=None):
+    """第一次断线后的连接上每帧发送都很慢（写缓冲满），调用方在重放期间提交剩余文本并结束 session；
+    fail_at 为该连接上第几次发送时连接再次断开"""
+    send_text = DoubaoTTSClient._DoubaoTTSClient__send_text
+    sockets = []
+    sends = 0
+
+    async def slow_send_text(self, text):
+        nonlocal sends
+        if self.websocket not in sockets:
+            sockets.append(self.websocket)
+        if len(sockets) == 2 and self.websocket is sockets[1]:
+            sends += 1
+            await asyncio.sleep(0.01)
+            if sends == fail_at:
+                await self.websocket.close()
+                raise websockets.exceptions.ConnectionClosed(None, None)
+        await send_text(self, text)
+
+    monkeypatch.setattr(DoubaoTTSClient, "_DoubaoTTSClient__send_text", slow_send_text)
+
+    async def per_char():
+        for i, char in enumerate(TEXT):
+            if i > len(TEXT) // 2:
+                # 后一半文本在重放开始之后才提交
+                while len(sockets) < 2:
+                    await asyncio.sleep(0.001)
+            yield char
+
+    async def main():
+        async with MockTTSServer(chunk_size=16, bytes_per_char=10) as server:
+            client = new_client(server, reconnect_retries=5)
+            audio = bytearray()
+            async for chunk in client.synthesize(per_char()):
+                if chunk.kind == "audio":
+                    if not audio:
+                        # 收到第一个音频帧后网络断开
+                        client.websocket.transport.abort()
+                    audio.extend(chunk.data)
+            assert bytes(audio) == b"".join(server.synthesize(s) for s in SENTENCES)
+            return len(sockets)
+
+    return asyncio.run(main())
+
+
+def test_text_submitted_during_replay_is_sent_after_it(monkeypatch):
+    assert reconnect_with_slow_replay(monkeypatch) >= 2
+
+
+def test_reconnect_survives_failed_send_during_replay(monkeypatch):
+    assert reconnect_with_slow_replay(monkeypatch, fail_at=2) >= 3
+
+
+def test_reconnect_gives_up_without_progress():
+    async def main():
+        async with MockTTSServer(
+            chunk_size=16, bytes_per_char=10, drop_after_chunks=3
+        ) as server:
+            client = new_client(server, reconnect_retries=2)
+            try:
+                async for _ in client.synthesize(TEXT):
+                    pass
+            except Exception as e:
+                assert "connection is closed" in str(e)
+            else:
+                raise AssertionError("connection failure was not raised")
+            assert server.connections <= 1 + 2 * 3
+
+    asyncio.run(main())
+
+
+def test_audio_format_is_sent_with_session():
+    async def main():
+        async with MockTTSServer(bytes_per_char=10) as server:
+            client = new_client(server, audio_format="ogg_opus", sample_rate=16000)
+            audio = bytearray()
+            async for chunk in client.synthesize(TEXT):
+                if chunk.kind == "audio":
+                    audio.extend(chunk.data)
+            assert server.audio_params == [{"format": "ogg_opus", "sample_rate": 16000}]
+            assert bytes(audio) == b"".join(
+                server.synthesize(s, "ogg_opus", 16000) for s in SENTENCES
+            )
+
+    asyncio.run(main())
+
+
+def test_synthesize_resamples_pcm_stream():
+    async def main():
+        async with MockTTSServer(chunk_size=333, bytes_per_char=100) as server:
+            client = new_client(server)
+            kinds = []
+            audio = bytearray()
+            async for chunk in client.synthesize(TEXT, output_sample_rate=8000):
+                kinds.append(chunk.kind)
+                if chunk.kind == "audio":
+                    audio.extend(chunk.data)
+            assert kinds.count("sentence_end") == len(SENTENCES)
+            resampler = StreamResampler(24000, 8000)
+            pcm = b"".join(server.synthesize(s) for s in SENTENCES)
+            assert bytes(audio) == resampler.feed(pcm) + resampler.finish()
+
+            client = new_client(server, audio_format="mp3")
+            try:
+                async for _ in client.synthesize(TEXT, output_sample_rate=8000):
+                    pass
+            except Exception as e:
+                assert "requires pcm" in str(e)
+            else:
+                raise AssertionError("resampling mp3 was accepted")
+
+    asyncio.run(main())
+
+
+def test_high_density_options_and_deprecated_events():
+    async def main():
+        async with MockTTSServer(bytes_per_char=10) as server:
+            client = new_client(server, keep_alive=True, **HIGH_DENSITY_OPTIONS)
+            # 实例仍然可以添加属性
+            client.request_tag = "tag"
+            with pytest.warns(DeprecationWarning):
+                finished = client.session_finished_event
+            with pytest.warns(DeprecationWarning):
+                complete = client.complete_event
+            assert not finished.is_set()
+            await client.streaming_call(TEXT)
+            await asyncio.wait_for(complete.wait(), 1)
+            waiter = asyncio.create_task(finished.wait())
+            await client.streaming_complete()
+            await asyncio.wait_for(waiter, 1)
+            # keep_alive 连接开始下一个 session 前清除
+            assert not finished.is_set()
+            with pytest.warns(DeprecationWarning):
+                assert client.start_connection_event.is_set()
+            await client.close()
+            assert client.websocket.state.name == "CLOSED"
+            assert client.request_tag == "tag"
+
+    asyncio.run(main())
+
+
+def test_oversized_frame_closes_connection():
+    async def main():
+        async with MockTTSServer(chunk_size=64 * 1024, bytes_per_char=20000) as server:
+            client = new_client(server, max_frame_bytes=16 * 1024, reconnect_retries=0)
+            try:
+                async for _ in client.synthesize(TEXT):
+                    pass
+            except Exception as e:
+                assert "connection is closed" in str(e)
+            else:
+                raise AssertionError("oversized frame was accepted")
+            assert not client.is_connected
+
+    asyncio.run(main())
+
+
+def test_streaming_complete_times_out_when_session_never_finishes():
+    async def main():
+        async with MockTTSServer(bytes_per_char=10, ignore_finish=True) as server:
+            client = new_client(
+                server, RecordingCallback(), keep_alive=True, finish_timeout=0.2
+            )
+            await client.streaming_call(TEXT)
+            try:
+                await asyncio.wait_for(client.streaming_complete(), 2)
+            except asyncio.TimeoutError:
+                raise AssertionError("streaming_complete did not time out")
+            except Exception as e:
+                assert "not finished" in str(e)
+            else:
+                raise AssertionError("streaming_complete did not fail")
+            assert not client.is_connected
+
+    asyncio.run(main())
+
+
+def test_slow_consumer_does_not_hit_finish_timeout():
+    async def main():
+        async with MockTTSServer(chunk_size=64, bytes_per_char=100) as server:
+            client = new_client(server, finish_timeout=0.2)
+            audio = bytearray()
+            # 消费端比 finish_timeout 慢得多，读取 socket 因反压暂停
+            async for chunk in client.synthesize(TEXT, max_buffer_bytes=64):
+                if chunk.kind == "audio":
+                    audio.extend(chunk.data)
+                    await asyncio.sleep(0.01)
+            assert bytes(audio) == b"".join(server.synthesize(s) for s in SENTENCES)
+
+    asyncio.run(main())
+
+
+def test_keep_alive_recovers_after_session_failure():
+    async def main():
+        async with MockTTSServer(bytes_per_char=10, fail_session_rate=1) as server:
+            callback = RecordingCallback()
+            client = new_client(server, callback, keep_alive=True)
+            try:
+                await client.streaming_call(TEXT)
+                await client.streaming_complete()
+            except Exception as e:
+                assert "stopped" in str(e) or "not started" in str(e)
+            assert callback.errors
+            try:
+                async for _ in client.synthesize(TEXT):
+                    pass
+            except Exception:
+                pass
+            else:
+                raise AssertionError("session failure was not raised")
+            assert client.is_connected
+
+            server.fail_session_rate = 0
+            callback = RecordingCallback()
+            client.callback = callback
+            await client.streaming_call(TEXT)
+            await client.streaming_complete()
+            expected = b"".join(server.synthesize(s) for s in SENTENCES)
+            assert bytes(callback.data) == expected
+            audio = [c.data async for c in client.synthesize(TEXT) if c.kind == "audio"]
+            assert b"".join(audio) == expected
+            assert server.connections == 1
+            await client.close()
+
+    asyncio.run(main())
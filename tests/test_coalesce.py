@@ -0,0 +1,53 @@
+import asyncio
+
+from api.coalesce import CoalescingSynthesizer
+from api.mock_server import MockTTSServer
+from api.pool import DoubaoTTSPool
+from api.stream import AUDIO
+
+
+def test_identical_requests_share_one_session():
+    async def main():
+        text = "直播马上开始，请不要走开。"
+        async with MockTTSServer(
+            bytes_per_char=1000, chunk_size=1000, chunk_delay=0.005
+        ) as server:
+            expected = server.synthesize(text)
+            async with DoubaoTTSPool(
+                "uid", "app_id", "token", server.url, "speaker", max_size=4
+            ) as pool:
+                coalescer = CoalescingSynthesizer(pool, max_ahead_bytes=4000)
+                loop = asyncio.get_running_loop()
+                finished = {}
+
+                async def listen(name, delay=0.0, start=0.0):
+                    await asyncio.sleep(start)
+                    audio = b""
+                    async for chunk in coalescer.synthesize(text):
+                        if chunk.kind == AUDIO:
+                            audio += chunk.data
+                        await asyncio.sleep(delay)
+                    finished[name] = loop.time()
+                    return audio
+
+                results = await asyncio.gather(
+                    *[listen(i) for i in range(20)],
+                    listen("slow", delay=0.02),
+                    listen("late", start=0.03),
+                )
+                assert all(audio == expected for audio in results)
+                assert server.sessions == 1
+                # 慢的订阅者不拖慢其他订阅者
+                assert max(finished[i] for i in range(20)) < finished["slow"] - 0.1
+                assert coalescer.stats() == {
+                    "upstream": 1,
+                    "coalesced": 21,
+                    "in_flight": 0,
+                }
+
+                # 合成结束后的相同请求重新发起 session
+                async for _ in coalescer.synthesize(text):
+                    pass
+                assert server.sessions == 2
+
+    asyncio.run(main())
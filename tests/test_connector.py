@@ -0,0 +1,69 @@
+import asyncio
+import os
+import ssl
+
+from api.connector import Connector
+from api.doubao_tts_api import DoubaoTTSClient, ResultCallback
+from api.mock_server import MockTTSServer
+from api.stream import AUDIO
+
+CERT = os.path.join(os.path.dirname(__file__), "data", "localhost.pem")
+
+
+def _server_context():
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(CERT)
+    return context
+
+
+def test_tls_session_resumption_and_dns_cache():
+    async def main():
+        async with MockTTSServer(bytes_per_char=10, ssl=_server_context()) as server:
+            url = f"wss://localhost:{server.port}"
+            connector = Connector(cafile=CERT)
+            stats = []
+            for _ in range(3):
+                client = DoubaoTTSClient(
+                    "uid",
+                    "app_id",
+                    "token",
+                    url,
+                    "speaker",
+                    ResultCallback(),
+                    connector=connector,
+                )
+                audio = b""
+                async for chunk in client.synthesize("您好。"):
+                    if chunk.kind == AUDIO:
+                        audio += chunk.data
+                assert len(audio) == 30
+                stats.append(client.stats)
+
+            assert [s.tls_resumed for s in stats] == [False, True, True]
+            assert all(s.tls_time is not None and s.tcp_time is not None for s in stats)
+            assert connector.stats()["dns_misses"] == 1
+            assert connector.stats()["dns_hits"] == 2
+            assert server.connections == 3
+
+    asyncio.run(main())
+
+
+def test_happy_eyeballs_with_pre_resolved_addresses():
+    async def main():
+        async with MockTTSServer(bytes_per_char=10) as server:
+            # 第一个地址不可达（或一直没有响应），下一个地址在延迟后并行尝试
+            connector = Connector(
+                happy_eyeballs_delay=0.05,
+                addresses={"tts.invalid": ["192.0.2.1", "127.0.0.1"]},
+            )
+            websocket = await connector.connect(
+                f"ws://tts.invalid:{server.port}", open_timeout=2
+            )
+            try:
+                assert websocket.connect_times.address == "127.0.0.1"
+                assert websocket.connect_times.tls is None
+            finally:
+                await websocket.close()
+            assert connector.stats()["dns_misses"] == 0
+
+    asyncio.run(main())
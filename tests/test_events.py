@@ -0,0 +1,126 @@
+import asyncio
+
+from api.events import AlignmentIndex, SentenceEvent
+from api.mock_server import MockTTSServer
+from api.stream import AUDIO, SENTENCE_END, SENTENCE_START
+from conftest import SENTENCES, TEXT, RecordingCallback, new_client
+
+
+def test_sentence_event_parses_lazily():
+    event = SentenceEvent(
+        SENTENCE_END,
+        '{"text": "你好", "words": [{"word": "你", "startTime": 0, "endTime": 0.2},'
+        ' {"word": "好", "startTime": 0.2, "endTime": 0.4}]}'.encode(),
+    )
+    assert event._json is None
+    assert event.text == "你好"
+    assert [(w.word, w.start, w.end) for w in event.words] == [
+        ("你", 0.0, 0.2),
+        ("好", 0.2, 0.4),
+    ]
+    legacy = SentenceEvent(SENTENCE_START, '{"res_params": {"text": "再见"}}'.encode())
+    assert legacy.text == "再见"
+    assert SentenceEvent(SENTENCE_END, b"not json").text == ""
+
+
+def test_unsubscribed_events_are_skipped():
+    async def main():
+        async with MockTTSServer(chunk_size=16, bytes_per_char=10) as server:
+            client = new_client(server, events=(), reconnect_retries=0)
+            kinds = set()
+            audio = bytearray()
+            async for chunk in client.synthesize(TEXT):
+                kinds.add(chunk.kind)
+                audio.extend(chunk.data)
+            assert kinds == {AUDIO}
+            assert bytes(audio) == b"".join(server.synthesize(s) for s in SENTENCES)
+
+            client = new_client(server, events={SENTENCE_END}, reconnect_retries=0)
+            ends = [
+                chunk.data.text
+                async for chunk in client.synthesize(TEXT)
+                if chunk.kind != AUDIO
+            ]
+            assert ends == SENTENCES
+
+    asyncio.run(main())
+
+
+def test_alignment_index_maps_audio_to_text():
+    async def main():
+        async with MockTTSServer(chunk_size=32, bytes_per_char=100) as server:
+            client = new_client(server, events={SENTENCE_END}, alignment=True)
+            audio = bytearray()
+            async for chunk in client.synthesize(TEXT):
+                if chunk.kind == AUDIO:
+                    audio.extend(chunk.data)
+                else:
+                    assert chunk.data.words
+
+            index = client.alignment
+            assert index._pending and not index._sentences
+            assert [s.text for s in index.sentences] == SENTENCES
+            offset = 0
+            for sentence in index.sentences:
+                assert sentence.audio_start == offset
+                offset = sentence.audio_end
+                assert TEXT[sentence.char_start : sentence.char_end] == sentence.text
+            assert offset == len(audio)
+
+            second = index.sentences[1]
+            assert index.find(second.audio_start) is second
+            assert index.find(second.audio_end - 1) is second
+            assert index.find(len(audio)) is None
+            # 第二句 "Hello world." 每个字符 100 字节，第 3 个字符是 "l"
+            assert index.word_at(second.audio_start + 2 * 100 + 50).word == "l"
+
+    asyncio.run(main())
+
+
+def test_alignment_index_without_start_events():
+    index = AlignmentIndex()
+    index.reset(bytes_per_second=48000)
+    index.add_text("一。二。")
+    index.audio(10)
+    index.sentence_end(SentenceEvent(SENTENCE_END, '{"text": "一。"}'.encode()))
+    index.audio(6)
+    index.sentence_end(SentenceEvent(SENTENCE_END, '{"text": "未知"}'.encode()))
+    first, second = index.sentences
+    assert (first.char_start, first.char_end, first.audio_end) == (0, 2, 10)
+    assert (second.char_start, second.audio_start, second.audio_end) == (None, 10, 16)
+
+
+def test_on_complete_fires_without_sentence_end_subscription():
+    async def main():
+        async with MockTTSServer(bytes_per_char=10) as server:
+            for retries in (0, 3):
+                callback = RecordingCallback()
+                client = new_client(
+                    server,
+                    callback,
+                    events={SENTENCE_START},
+                    reconnect_retries=retries,
+                )
+                await client.streaming_call(TEXT)
+                await client.streaming_complete()
+                assert callback.completed == len(SENTENCES)
+
+    asyncio.run(main())
+
+
+def test_sentence_end_json_is_not_parsed_without_reconnect():
+    async def main():
+        async with MockTTSServer(bytes_per_char=10) as server:
+            client = new_client(server, keep_alive=True, reconnect_retries=0)
+            ended = [
+                chunk.data
+                async for chunk in client.synthesize(TEXT)
+                if chunk.kind == SENTENCE_END
+            ]
+            # 不重连时断线重放不记录文本，也不解析 TTSSentenceEnd
+            assert len(ended) == len(SENTENCES)
+            assert all(event._json is None for event in ended)
+            assert not client._replay.unacked
+            await client.close()
+
+    asyncio.run(main())
@@ -0,0 +1,48 @@
+import asyncio
+import wave
+
+from api.file_sink import FSYNC_BATCH, AudioFileSink
+from api.mock_server import MockTTSServer
+from conftest import SENTENCES, TEXT, new_client
+
+
+def test_wav_sink_batches_writes_and_patches_header(tmp_path):
+    path = str(tmp_path / "out.wav")
+
+    async def main():
+        async with MockTTSServer(chunk_size=64, bytes_per_char=100) as server:
+            client = new_client(server)
+            async with AudioFileSink(path, 24000, batch_bytes=1024) as sink:
+                # 合成过程中文件头的长度是未知值
+                with open(path, "rb") as f:
+                    assert f.read(8)[4:] == b"\xff\xff\xff\xff"
+                audio_bytes = await sink.write_stream(client.synthesize(TEXT))
+            expected = b"".join(server.synthesize(s) for s in SENTENCES)
+            assert audio_bytes == len(expected)
+            # 64 字节的音频块按 1024 字节一批写入
+            assert 1 < sink.writes <= len(expected) // 1024 + 1
+            return expected
+
+    expected = asyncio.run(main())
+    with wave.open(path, "rb") as f:
+        assert f.getframerate() == 24000
+        assert f.getsampwidth() == 2
+        assert f.readframes(f.getnframes()) == expected
+
+
+def test_callback_sink_writes_raw_pcm(tmp_path):
+    path = str(tmp_path / "out.pcm")
+
+    async def main():
+        sink = AudioFileSink(path, batch_bytes=100, fsync=FSYNC_BATCH)
+        chunks = [bytes([i]) * 30 for i in range(20)]
+        for chunk in chunks:
+            sink.write_nowait(memoryview(chunk))
+            await asyncio.sleep(0)
+        await sink.close()
+        assert sink.writes >= 2
+        return b"".join(chunks)
+
+    expected = asyncio.run(main())
+    with open(path, "rb") as f:
+        assert f.read() == expected
@@ -0,0 +1,202 @@
+import asyncio
+import base64
+import json
+
+from api.gateway import TTSGateway
+from api.mock_server import MockTTSServer
+from api.pool import DoubaoTTSPool
+from conftest import SENTENCES, TEXT
+
+
+async def call(app, path, body_parts=(b"",), method="POST", headers=(), query=b""):
+    """直接按 ASGI 协议调用应用，返回 (status, headers, [body 分块])"""
+    messages = [
+        {"type": "http.request", "body": part, "more_body": i < len(body_parts) - 1}
+        for i, part in enumerate(body_parts)
+    ]
+    sent = []
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        await asyncio.sleep(3600)
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "http",
+        "method": method,
+        "path": path,
+        "query_string": query,
+        "headers": [(k.lower(), v) for k, v in headers],
+    }
+    await app(scope, receive, send)
+    start = sent[0]
+    return (
+        start["status"],
+        dict(start["headers"]),
+        [m["body"] for m in sent[1:] if m["body"]],
+    )
+
+
+def gateway_test(test, **gateway_options):
+    async def main():
+        async with MockTTSServer(chunk_size=16, bytes_per_char=10) as server:
+            async with DoubaoTTSPool(
+                "uid", "app_id", "token", server.url, "speaker", max_size=4
+            ) as pool:
+                await test(server, TTSGateway(pool, **gateway_options))
+
+    asyncio.run(main())
+
+
+def test_streams_audio_for_plain_and_chunked_uploads():
+    async def test(server, app):
+        expected = b"".join(server.synthesize(s) for s in SENTENCES)
+        status, headers, chunks = await call(app, "/v1/tts", [TEXT.encode()])
+        assert status == 200 and headers[b"content-type"] == b"audio/pcm"
+        assert len(chunks) > 1 and b"".join(chunks) == expected
+
+        # 分块上传，多字节字符被切在两个分块之间
+        data = TEXT.encode()
+        parts = [data[:4], data[4:20], data[20:]]
+        status, _, chunks = await call(app, "/v1/tts", parts)
+        assert status == 200 and b"".join(chunks) == expected
+
+    gateway_test(test)
+
+
+def test_sse_json_request_and_health():
+    async def test(server, app):
+        body = json.dumps({"text": "再见。", "sample_rate": 16000}).encode()
+        status, headers, chunks = await call(
+            app,
+            "/v1/tts",
+            [body],
+            headers=[
+                (b"content-type", b"application/json"),
+                (b"accept", b"text/event-stream"),
+            ],
+        )
+        assert status == 200 and headers[b"content-type"] == b"text/event-stream"
+        events = [c.decode().split("\n") for c in chunks]
+        kinds = [e[0] for e in events]
+        assert (
+            kinds[0] == "event: sentence_start" and kinds[-1] == "event: sentence_end"
+        )
+        audio = b"".join(
+            base64.b64decode(e[1][len("data: ") :])
+            for e in events
+            if e[0] == "event: audio"
+        )
+        assert audio == server.synthesize("再见。", "pcm", 16000)
+
+        status, _, chunks = await call(app, "/healthz", method="GET")
+        assert status == 200 and json.loads(chunks[0])["status"] == "ok"
+
+    gateway_test(test)
+
+
+def test_tenant_limit_returns_429():
+    async def test(server, app):
+        app._active["a"] = 1
+        status, headers, _ = await call(
+            app, "/v1/tts", [TEXT.encode()], headers=[(b"x-tenant-id", b"a")]
+        )
+        assert status == 429 and headers[b"retry-after"] == b"1"
+        status, _, _ = await call(
+            app, "/v1/tts", [TEXT.encode()], headers=[(b"x-tenant-id", b"b")]
+        )
+        assert status == 200
+
+    gateway_test(test, tenant_limit=1)
+
+
+def test_oversized_upload_returns_413():
+    async def test(server, app):
+        data = ("你好。" * 10).encode()
+        status, _, _ = await call(app, "/v1/tts", [data[:9], data[9:]])
+        assert status == 413
+
+        status, _, _ = await call(
+            app,
+            "/v1/tts",
+            [data],
+            headers=[(b"content-length", str(len(data)).encode())],
+        )
+        assert status == 413
+
+        status, _, chunks = await call(app, "/v1/tts", [data[:9], data[9:18]])
+        assert status == 200 and b"".join(chunks) == server.synthesize("你好。") * 2
+
+    gateway_test(test, max_text_bytes=20)
+
+
+def test_upstream_failure_after_headers_aborts_raw_response():
+    async def main():
+        async with MockTTSServer(
+            chunk_size=16, bytes_per_char=10, drop_after_chunks=2
+        ) as server:
+            async with DoubaoTTSPool(
+                "uid",
+                "app_id",
+                "token",
+                server.url,
+                "speaker",
+                client_options={"reconnect_retries": 0},
+            ) as pool:
+                app = TTSGateway(pool)
+                try:
+                    await call(app, "/v1/tts", [TEXT.encode()])
+                except Exception as e:
+                    assert "response aborted" in str(e)
+                else:
+                    raise AssertionError("truncated response ended cleanly")
+
+    asyncio.run(main())
+
+
+def test_client_disconnect_cancels_synthesis():
+    async def main():
+        async with MockTTSServer(
+            chunk_size=16, chunk_delay=0.01, bytes_per_char=10
+        ) as server:
+            async with DoubaoTTSPool(
+                "uid", "app_id", "token", server.url, "speaker"
+            ) as pool:
+                app = TTSGateway(pool, tenant_limit=1)
+                sent = []
+                messages = [{"type": "http.request", "body": TEXT.encode()}]
+
+                async def receive():
+                    if messages:
+                        return messages.pop(0)
+                    # 收到第一个音频块后客户端断开
+                    while len(sent) < 2:
+                        await asyncio.sleep(0.001)
+                    return {"type": "http.disconnect"}
+
+                async def send(message):
+                    sent.append(message)
+
+                scope = {
+                    "type": "http",
+                    "method": "POST",
+                    "path": "/v1/tts",
+                    "query_string": b"",
+                    "headers": [],
+                }
+                await asyncio.wait_for(app(scope, receive, send), 1)
+                audio = sum(len(m.get("body", b"")) for m in sent[1:])
+                expected = b"".join(server.synthesize(s) for s in SENTENCES)
+                assert 0 < audio < len(expected)
+                assert app._active == {}
+                assert pool.idle == pool.size == 1
+
+                # 同一租户可以立即发起下一个请求，连接仍可复用
+                status, _, chunks = await call(app, "/v1/tts", ["再见。".encode()])
+                assert status == 200 and b"".join(chunks) == server.synthesize("再见。")
+                assert server.connections == 1
+
+    asyncio.run(main())
@@ -0,0 +1,72 @@
+import asyncio
+
+from api.hedge import HedgedSynthesizer
+from api.mock_server import MockTTSServer
+from api.pool import DoubaoTTSPool
+from api.stream import AUDIO
+
+
+def test_hedging_cuts_slow_session_starts():
+    async def main():
+        async with MockTTSServer(
+            bytes_per_char=10, slow_session_rate=0.5, slow_session_delay=1.0, seed=3
+        ) as server:
+            async with DoubaoTTSPool(
+                "uid", "app_id", "token", server.url, "speaker", max_size=4
+            ) as pool:
+                hedger = HedgedSynthesizer(pool, delay=0.2)
+                loop = asyncio.get_running_loop()
+                slow = 0
+                for _ in range(8):
+                    start = loop.time()
+                    audio = b""
+                    async for chunk in hedger.synthesize("您好。"):
+                        if chunk.kind == AUDIO:
+                            audio += chunk.data
+                    assert len(audio) == 30
+                    slow += loop.time() - start > 0.9
+                stats = hedger.stats()
+                assert stats["requests"] == 8
+                assert stats["hedged"] >= 1 and stats["hedge_wins"] >= 1
+                # 只有两路都慢时才需要等满 1 秒
+                assert slow == stats["hedged"] - stats["hedge_wins"]
+                # 落后的连接被关闭或取消，没有泄漏 session
+                await asyncio.sleep(1.2)
+                assert pool.size == pool.idle
+
+    asyncio.run(main())
+
+
+def test_learned_threshold_uses_primary_latency():
+    async def main():
+        async with MockTTSServer(
+            bytes_per_char=10, slow_session_rate=0.5, slow_session_delay=0.3, seed=3
+        ) as server:
+            async with DoubaoTTSPool(
+                "uid", "app_id", "token", server.url, "speaker", max_size=4
+            ) as pool:
+                hedger = HedgedSynthesizer(
+                    pool, delay=0.1, percentile=0.9, min_samples=1, min_delay=0.01
+                )
+                for _ in range(10):
+                    async for _ in hedger.synthesize("您好。"):
+                        pass
+                assert hedger.hedge_wins >= 1
+                await asyncio.sleep(0.5)
+                # 对冲赢了的请求记录的是第一路自己的（慢）首包延迟，而不是对冲那一路的
+                assert len(hedger._latencies) == 10
+                assert all(
+                    latency < 0.05 or latency >= 0.3 for latency in hedger._latencies
+                )
+                assert pool.size == pool.idle
+
+    asyncio.run(main())
+
+
+def test_learned_threshold():
+    hedger = HedgedSynthesizer(None, delay=1.0, percentile=0.9, min_samples=10)
+    assert hedger.threshold == 1.0
+    hedger._latencies.extend(i / 100 for i in range(1, 21))
+    assert hedger.threshold == 0.19
+    hedger.min_delay = 0.5
+    assert hedger.threshold == 0.5
@@ -0,0 +1,66 @@
+import asyncio
+
+from api.longform import LongformSynthesizer, split_document
+from api.mock_server import MockTTSServer
+from api.pool import DoubaoTTSPool
+from api.stream import AUDIO
+
+
+def test_split_document():
+    text = "第一章 风起之时。\n" + "这是一段比较长的正文，用来测试切分。" * 30
+    segments = split_document(text, min_chars=50, max_chars=120)
+    assert "".join(segments) == text
+    assert segments[0] == "第一章 风起之时。"
+    assert all(len(s) <= 120 for s in segments)
+    assert all(s.endswith("。") for s in segments)
+
+
+def test_split_english_document_at_sentence_ends():
+    sentence = "It was a sunny day and the park was full of people."
+    text = "Chapter one. " + " ".join([sentence] * 30)
+    segments = split_document(text, min_chars=100, max_chars=300)
+    assert len(segments) > 2
+    assert " ".join(s.strip() for s in segments) == text
+    assert all(len(s) <= 300 for s in segments)
+    assert all(s.strip().endswith(".") for s in segments)
+
+
+def test_parallel_segments_are_stitched_in_order():
+    async def main():
+        sentences = [f"这是第{i}句话，内容各不相同。" for i in range(40)]
+        text = "".join(sentences)
+        async with MockTTSServer(
+            bytes_per_char=200, chunk_size=1000, chunk_delay=0.01
+        ) as server:
+            expected = b"".join(server.synthesize(s) for s in sentences)
+            async with DoubaoTTSPool(
+                "uid", "app_id", "token", server.url, "speaker", max_size=8
+            ) as pool:
+                loop = asyncio.get_running_loop()
+                longform = LongformSynthesizer(
+                    pool,
+                    concurrency=8,
+                    max_buffer_bytes=64 * 1024,
+                    min_chars=30,
+                    max_chars=60,
+                )
+                start = loop.time()
+                audio = bytearray()
+                first_audio = None
+                async for chunk in longform.synthesize(text):
+                    if chunk.kind == AUDIO:
+                        if first_audio is None:
+                            first_audio = loop.time() - start
+                        audio += chunk.data
+                parallel = loop.time() - start
+                assert bytes(audio) == expected
+                assert first_audio < 0.3
+
+                start = loop.time()
+                async with pool.session() as client:
+                    async for chunk in client.synthesize(text):
+                        pass
+                sequential = loop.time() - start
+                assert parallel < sequential / 2
+
+    asyncio.run(main())
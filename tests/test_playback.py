@@ -0,0 +1,78 @@
+import asyncio
+import time
+import wave
+
+import numpy as np
+
+from api.playback import FileBackend, NullBackend, PlaybackSink, RingBuffer
+
+
+def pcm(samples: int, start: int = 0) -> bytes:
+    return (np.arange(start, start + samples) % 30000).astype(np.int16).tobytes()
+
+
+def test_ring_buffer_wraps_around():
+    ring = RingBuffer(8)
+    out = np.zeros(8, dtype=np.int16)
+    assert ring.write(np.arange(6, dtype=np.int16)) == 6
+    assert ring.read_into(out[:4]) == 4
+    assert ring.write(np.arange(6, 12, dtype=np.int16)) == 6
+    assert ring.free == 0
+    assert ring.read_into(out) == 8
+    assert out.tolist() == list(range(4, 12))
+
+
+def test_file_backend_keeps_every_sample(tmp_path):
+    path = str(tmp_path / "out.wav")
+    data = pcm(5000)
+    with PlaybackSink(FileBackend(path, block_size=256), sample_rate=8000) as sink:
+        # 奇数长度的帧会把半个样本留到下一次
+        for offset in range(0, len(data), 333):
+            sink.write_nowait(data[offset : offset + 333])
+        sink.finish()
+        assert sink.wait_drained(5)
+    with wave.open(path) as f:
+        assert f.getframerate() == 8000
+        assert f.readframes(f.getnframes()) == data
+    assert sink.underruns == 0 and sink.overruns == 0
+
+
+def test_prebuffer_and_underrun_counters():
+    sink = PlaybackSink(
+        NullBackend(block_size=80), sample_rate=8000, prebuffer_seconds=0.05
+    )
+    with sink:
+        sink.write_nowait(pcm(200))
+        assert not sink.wait_drained(0.1)
+        # 不足 prebuffer（400 个样本）时不会开始播放
+        assert sink.played_samples == 0
+        sink.write_nowait(pcm(300))
+        # 播放完 500 个样本后没有新数据：欠载
+        deadline = 50
+        while sink.underruns == 0 and deadline:
+            time.sleep(0.01)
+            deadline -= 1
+        assert sink.underruns == 1
+        assert sink.played_samples == 500
+        sink.write_nowait(pcm(100))
+        sink.finish()
+        assert sink.wait_drained(1)
+        assert sink.played_samples == 600
+        assert sink.underruns == 1
+
+
+def test_overrun_drops_and_async_write_waits_for_space():
+    sink = PlaybackSink(
+        NullBackend(block_size=80), sample_rate=8000, capacity_seconds=0.1
+    )
+    assert sink.write_nowait(pcm(1000)) == 800
+    assert sink.overruns == 1 and sink.dropped_samples == 200
+
+    async def main():
+        with sink:
+            await sink.write(pcm(2000))
+            sink.finish()
+            await sink.drain()
+
+    asyncio.run(main())
+    assert sink.played_samples == 2800
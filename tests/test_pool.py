@@ -0,0 +1,185 @@
+import asyncio
+
+from api.mock_server import MockTTSServer
+from api.pool import DoubaoTTSPool
+from conftest import SENTENCES, TEXT
+
+
+def new_pool(server, **kwargs):
+    return DoubaoTTSPool("uid", "app_id", "token", server.url, "speaker", **kwargs)
+
+
+async def synthesize(pool, text=TEXT) -> bytes:
+    async with pool.session() as client:
+        audio = bytearray()
+        async for chunk in client.synthesize(text):
+            if chunk.kind == "audio":
+                audio.extend(chunk.data)
+        return bytes(audio)
+
+
+def test_max_size_caps_connections_and_queues_waiters():
+    async def main():
+        async with MockTTSServer(
+            chunk_size=16, chunk_delay=0.002, bytes_per_char=10
+        ) as server:
+            async with new_pool(server, min_size=1, max_size=2) as pool:
+                peak = 0
+
+                async def watch():
+                    nonlocal peak
+                    while True:
+                        peak = max(peak, pool.size)
+                        await asyncio.sleep(0.001)
+
+                watcher = asyncio.create_task(watch())
+                results = await asyncio.gather(*[synthesize(pool) for _ in range(6)])
+                watcher.cancel()
+
+                expected = b"".join(server.synthesize(s) for s in SENTENCES)
+                assert results == [expected] * 6
+                assert server.connections == 2 and server.sessions == 6
+                assert peak == pool.size == pool.idle == 2
+
+    asyncio.run(main())
+
+
+def test_acquire_timeout():
+    async def main():
+        async with MockTTSServer(bytes_per_char=10) as server:
+            async with new_pool(
+                server, min_size=1, max_size=1, acquire_timeout=0.05
+            ) as pool:
+                client = await pool.acquire()
+                try:
+                    await pool.acquire()
+                except Exception as e:
+                    assert "no idle connection" in str(e)
+                else:
+                    raise AssertionError("acquire did not time out")
+
+                # 等待中的请求在连接归还后拿到同一条连接
+                waiter = asyncio.create_task(pool.acquire())
+                await asyncio.sleep(0.01)
+                await pool.release(client)
+                assert await waiter is client
+                await pool.release(client)
+                assert server.connections == 1
+
+    asyncio.run(main())
+
+
+def test_acquire_timeout_is_not_restarted_by_wakeups():
+    async def main():
+        async with MockTTSServer(bytes_per_char=10) as server:
+            async with new_pool(
+                server, min_size=1, max_size=1, acquire_timeout=0.2
+            ) as pool:
+                client = await pool.acquire()
+
+                async def wake():
+                    # 其他连接的归还不断唤醒等待者，但都没有轮到它
+                    while True:
+                        await asyncio.sleep(0.05)
+                        async with pool._cond:
+                            pool._cond.notify_all()
+
+                waker = asyncio.create_task(wake())
+                started = asyncio.get_running_loop().time()
+                try:
+                    await asyncio.wait_for(pool.acquire(), 2)
+                except asyncio.TimeoutError:
+                    raise AssertionError("acquire_timeout restarted on every wakeup")
+                except Exception as e:
+                    assert "no idle connection" in str(e)
+                else:
+                    raise AssertionError("acquire did not time out")
+                finally:
+                    waker.cancel()
+                assert asyncio.get_running_loop().time() - started < 0.5
+                await pool.release(client)
+
+    asyncio.run(main())
+
+
+def test_start_raises_connect_error():
+    async def main():
+        async with MockTTSServer(bytes_per_char=10, fail_connection_rate=1) as server:
+            try:
+                async with new_pool(server, min_size=2):
+                    pass
+            except Exception as e:
+                assert "mock connection failed" in str(e)
+            else:
+                raise AssertionError("pool started without connections")
+
+    asyncio.run(main())
+
+
+def test_cancelled_connect_is_not_a_failure():
+    async def main():
+        async with MockTTSServer(bytes_per_char=10, connection_delay=1) as server:
+            pool = new_pool(server, min_size=0, max_size=1)
+            await pool.start()
+            task = asyncio.create_task(pool.acquire())
+            await asyncio.sleep(0.05)
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+            assert pool._connect_failures == 0
+            assert pool.size == 0
+            await pool.close()
+
+    asyncio.run(main())
+
+
+def test_idle_connections_shrink_to_min_size():
+    async def main():
+        async with MockTTSServer(bytes_per_char=10) as server:
+            async with new_pool(
+                server,
+                min_size=1,
+                max_size=3,
+                idle_timeout=0.05,
+                health_check_interval=3600,
+            ) as pool:
+                clients = [await pool.acquire() for _ in range(3)]
+                for client in clients:
+                    await pool.release(client)
+                assert pool.size == pool.idle == 3
+
+                await pool.check_health()
+                assert pool.size == 3
+
+                await asyncio.sleep(0.1)
+                await pool.check_health()
+                assert pool.size == pool.idle == 1
+                assert sum(client.is_connected for client in clients) == 1
+
+    asyncio.run(main())
+
+
+def test_dead_connections_are_replaced():
+    async def main():
+        async with MockTTSServer(bytes_per_char=10) as server:
+            async with new_pool(
+                server, min_size=2, max_size=4, health_check_interval=3600
+            ) as pool:
+                first, second = [await pool.acquire() for _ in range(2)]
+                await pool.release(first)
+                await pool.release(second)
+
+                # 健康检查关闭断开的空闲连接，并补足到 min_size
+                await first.close()
+                await pool.check_health()
+                assert pool.size == pool.idle == 2
+                assert server.connections == 3
+
+                # acquire 跳过断开的空闲连接
+                await second.close()
+                assert await synthesize(pool, "你好。") == server.synthesize("你好。")
+                assert pool.size == 2
+
+    asyncio.run(main())
@@ -0,0 +1,46 @@
+import json
+
+from api.events import SentenceEvent
+from api.replay import ReplayTracker
+from api.stream import SENTENCE_END
+
+
+def sentence_end(text):
+    return SentenceEvent(SENTENCE_END, json.dumps({"text": text}).encode())
+
+
+def test_sentence_ends_ack_text_as_they_arrive():
+    tracker = ReplayTracker()
+    for frame in ["你好，", "世界。再", "见。", "明天", "见"]:
+        tracker.sent(frame)
+    tracker.sentence_start()
+    assert tracker.sentence_end(sentence_end("你好，世界。"))
+    assert list(tracker.unacked) == ["世界。再", "见。", "明天", "见"]
+    assert tracker.replay() == ["再", "见。", "明天", "见"]
+
+    tracker.sentence_start()
+    tracker.sentence_end(sentence_end("再见。"))
+    assert tracker.replay() == ["明天", "见"]
+
+
+def test_long_session_keeps_only_unfinished_text():
+    tracker = ReplayTracker()
+    for i in range(10000):
+        sentence = f"第{i}句。"
+        tracker.sent(sentence[:2])
+        tracker.sent(sentence[2:])
+        tracker.sentence_start()
+        tracker.audio(b"\0" * 10)
+        tracker.sentence_end(sentence_end(sentence))
+        assert len(tracker.unacked) <= 1
+    tracker.sent("最后")
+    assert tracker.replay() == ["最后"]
+
+
+def test_disabled_tracker_records_nothing():
+    tracker = ReplayTracker()
+    tracker.reset(enabled=False)
+    tracker.sent("你好。")
+    event = sentence_end("你好。")
+    assert tracker.sentence_end(event)
+    assert tracker.replay() == [] and event._json is None
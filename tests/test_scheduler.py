@@ -0,0 +1,110 @@
+import asyncio
+
+from api.mock_server import MockTTSServer
+from api.pool import DoubaoTTSPool
+from api.scheduler import BATCH, INTERACTIVE, QuotaScheduler
+
+
+def test_interactive_requests_jump_the_queue():
+    async def main():
+        scheduler = QuotaScheduler(max_sessions=1)
+        await scheduler.acquire_session(BATCH)
+        order = []
+
+        async def request(name, priority):
+            await scheduler.acquire_session(priority)
+            order.append(name)
+            scheduler.release_session()
+
+        tasks = [asyncio.create_task(request("batch", BATCH))]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(request("interactive", INTERACTIVE)))
+        await asyncio.sleep(0)
+        assert scheduler.queued == 2
+        scheduler.release_session()
+        await asyncio.gather(*tasks)
+        assert order == ["interactive", "batch"]
+        assert scheduler.active == 0
+
+    asyncio.run(main())
+
+
+def test_char_rate_and_aimd():
+    async def main():
+        scheduler = QuotaScheduler(
+            max_sessions=8, chars_per_second=1000, burst_seconds=0.05
+        )
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        for _ in range(10):
+            await scheduler.consume(50)
+        # 桶里有 50 个令牌，其余 450 个字符按每秒 1000 个发放
+        assert loop.time() - start >= 0.4
+
+        assert scheduler.is_throttle('{"message": "quota exceeded"}')
+        assert not scheduler.is_throttle('{"message": "invalid speaker"}')
+        scheduler.report_throttled()
+        assert scheduler.session_limit == 4 and scheduler.char_rate == 500
+        scheduler.recovery_interval = 0
+        scheduler.report_success()
+        assert scheduler.session_limit == 5 and scheduler.char_rate == 600
+
+    asyncio.run(main())
+
+
+def test_char_waiters_are_served_by_priority_without_polling():
+    async def main():
+        scheduler = QuotaScheduler(chars_per_second=1000, burst_seconds=0.05)
+        await scheduler.consume(50)
+        order = []
+        wakeups = 0
+        wake_chars = scheduler._wake_chars
+
+        def counting_wake():
+            nonlocal wakeups
+            wakeups += 1
+            wake_chars()
+
+        scheduler._wake_chars = counting_wake
+
+        async def request(name, priority):
+            await scheduler.consume(50, priority)
+            order.append(name)
+
+        tasks = [asyncio.create_task(request(f"batch{i}", BATCH)) for i in range(2)]
+        await asyncio.sleep(0.01)
+        tasks.append(asyncio.create_task(request("interactive", INTERACTIVE)))
+        await asyncio.gather(*tasks)
+        assert order == ["interactive", "batch0", "batch1"]
+        # 每次入队和每次令牌补足各唤醒一次，不随等待时间增长
+        assert wakeups <= 8
+
+    asyncio.run(main())
+
+
+def test_pool_backs_off_when_upstream_throttles():
+    async def main():
+        async with MockTTSServer(bytes_per_char=10, max_sessions=2) as server:
+            scheduler = QuotaScheduler(max_sessions=4, recovery_interval=60)
+            async with DoubaoTTSPool(
+                "uid", "app_id", "token", server.url, "speaker", scheduler=scheduler
+            ) as pool:
+
+                async def request():
+                    for _ in range(5):
+                        try:
+                            async with pool.session() as client:
+                                async for _ in client.synthesize("你好。"):
+                                    pass
+                            return True
+                        except Exception:
+                            await asyncio.sleep(0.01)
+                    return False
+
+                results = await asyncio.gather(*(request() for _ in range(8)))
+            assert all(results)
+            assert server.throttled_sessions > 0
+            assert scheduler.session_limit == 2
+            assert scheduler.active == 0
+
+    asyncio.run(main())
@@ -0,0 +1,71 @@
+import asyncio
+
+from api import TextSegmenter
+
+TEXT = (
+    "你好，我是语音合成系统，很高兴为您服务！今天的温度是 23.5 度。"
+    "Hello there, how are you doing today? The price is 1,000 dollars. "
+    "这是一段没有标点而且很长很长的文本" * 3
+)
+
+
+def feed_all(segmenter, text, step=2):
+    chunks = []
+    for i in range(0, len(text), step):
+        chunks += segmenter.feed(text[i : i + step])
+    tail = segmenter.flush()
+    if tail:
+        chunks.append(tail)
+    return chunks
+
+
+def test_chunks_cover_text():
+    chunks = feed_all(TextSegmenter(), TEXT)
+    assert "".join(chunks).replace(" ", "") == TEXT.replace(" ", "")
+    assert len(chunks) < len(TEXT) // 2
+
+
+def test_first_chunk_is_flushed_early():
+    chunks = feed_all(TextSegmenter(first_min_chars=2), TEXT)
+    assert chunks[0] == "你好，"
+    assert all(len(chunk) >= 40 for chunk in chunks[1:-1])
+
+
+def test_numbers_are_not_boundaries():
+    chunks = feed_all(TextSegmenter(first_min_chars=1, min_chars=1), TEXT)
+    assert not any(chunk.endswith("23.") for chunk in chunks)
+    assert not any(chunk.endswith("1,") for chunk in chunks)
+    # 同一段文本中数字之后的英文句号仍然是断句点
+    assert any(chunk.endswith("dollars.") for chunk in chunks)
+
+
+def test_english_sentences_are_split_at_periods():
+    sentences = [
+        "The weather was lovely that morning.",
+        "It was a sunny day and the park was full of people.",
+        "Version 2.5 shipped last week.",
+        "Everyone went home happy.",
+    ]
+    chunks = feed_all(
+        TextSegmenter(first_min_chars=1, first_max_chars=200, min_chars=1),
+        " ".join(sentences),
+    )
+    assert [chunk.strip() for chunk in chunks] == sentences
+
+
+def test_long_text_without_punctuation_is_cut_at_max_chars():
+    chunks = feed_all(TextSegmenter(max_chars=50), "字" * 180)
+    assert max(len(chunk) for chunk in chunks) <= 50
+
+
+def test_segment_flushes_first_chunk_on_timeout():
+    async def deltas():
+        yield "你好"
+        await asyncio.sleep(0.2)
+        yield "世界，今天天气不错。"
+
+    async def main():
+        segmenter = TextSegmenter(first_timeout=0.05)
+        return [chunk async for chunk in segmenter.segment(deltas())]
+
+    assert asyncio.run(main()) == ["你好", "世界，今天天气不错。"]
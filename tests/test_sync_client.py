@@ -0,0 +1,67 @@
+import asyncio
+import concurrent.futures
+import threading
+
+from api.mock_server import MockTTSServer
+from api.sync_client import SyncTTSClient
+from conftest import SENTENCES, TEXT
+
+
+class BackgroundServer:
+    """在独立线程的事件循环中运行 mock 服务端，模拟远端服务"""
+
+    def __init__(self, **options):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        self.server = MockTTSServer(**options)
+        asyncio.run_coroutine_threadsafe(self.server.start(), self.loop).result()
+
+    def close(self):
+        asyncio.run_coroutine_threadsafe(self.server.close(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+
+def test_threads_share_a_few_connections():
+    background = BackgroundServer(bytes_per_char=10, chunk_delay=0.001)
+    server = background.server
+    expected = b"".join(server.synthesize(s) for s in SENTENCES)
+    try:
+        with SyncTTSClient(
+            "uid", "app_id", "token", server.url, "speaker", max_size=3
+        ) as tts:
+            with concurrent.futures.ThreadPoolExecutor(16) as workers:
+                results = list(
+                    workers.map(lambda _: tts.synthesize(TEXT).result(), range(32))
+                )
+            assert results == [expected] * 32
+            assert server.connections <= 3
+            assert server.sessions == 32
+    finally:
+        background.close()
+
+
+def test_stream_yields_chunks_and_accepts_sync_iterators():
+    background = BackgroundServer(chunk_size=16, bytes_per_char=10)
+    server = background.server
+    try:
+        with SyncTTSClient(
+            "uid", "app_id", "token", server.url, "speaker", max_buffer_bytes=32
+        ) as tts:
+            kinds = []
+            audio = bytearray()
+            for chunk in tts.stream(iter(["你好，", "世界。Hello ", "world. 再见"])):
+                kinds.append(chunk.kind)
+                if chunk.kind == "audio":
+                    audio.extend(chunk.data)
+            assert kinds.count("sentence_end") == len(SENTENCES)
+            assert bytes(audio) == b"".join(server.synthesize(s) for s in SENTENCES)
+
+            # 提前退出后连接可以继续使用
+            for chunk in tts.stream(TEXT):
+                break
+            assert tts.synthesize("再见").result() == server.synthesize("再见")
+    finally:
+        background.close()